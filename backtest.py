@@ -0,0 +1,64 @@
+from functools import partial
+
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from solar_ia.avaliacao import backtest, dobras_backtest, resumo_backtest
+from solar_ia.dataset import CAMINHO_DATAFRAME, TARGETS
+from solar_ia.floresta import PRESETS_RF
+from solar_ia.matrizes import CAMINHO_CACHE_MATRIZES
+from solar_ia.modelos import criar_modelo_xgb
+
+# --- 1. CONFIGURAÇÃO ---
+
+# Backtest com origem móvel (solar_ia/avaliacao.py): cada dobra treina com
+# tudo antes de um ano e é avaliada nesse ano. Com 3 dobras: 2022, 2023 e 2024.
+N_DOBRAS = 3
+
+# Mesmo recorte dos treinos: só as linhas de dia entram no modelo
+SOMENTE_DIA = True
+
+# Processos em paralelo (um por dobra) e threads de cada um (None = metade
+# dos núcleos em processos, e os núcleos divididos igualmente entre eles)
+MAX_PROCESSOS = None
+THREADS_POR_PROCESSO = None
+
+# Matrizes do dataset em .npy (solar_ia/matrizes.py), gravadas uma vez e abertas
+# por memmap em todas as dobras. None faz cada dobra ler o Parquet.
+PASTA_MATRIZES = CAMINHO_CACHE_MATRIZES
+
+# Modelos avaliados. Cada um é uma fábrica sem argumentos (functools.partial,
+# para poder ir para os processos). Sem conjunto de validação em cada dobra,
+# o XGBoost usa um número fixo de árvores em vez do early stopping.
+MODELOS = {
+    'xgboost': partial(criar_modelo_xgb, 'uma_matriz', n_estimators=500, learning_rate=0.05, random_state=42),
+    'random_forest': partial(RandomForestRegressor, n_estimators=50, random_state=42, **PRESETS_RF['compacto']),
+}
+
+CAMINHO_RESUMO = 'training/backtest.csv'
+
+# --- 2. BACKTEST ---
+
+if __name__ == '__main__':
+    dobras = dobras_backtest(N_DOBRAS)
+    print(f"Dobras (início e fim do teste): {dobras}")
+
+    resumos = {}
+    for nome, fabrica in MODELOS.items():
+        print(f"\nRodando o backtest de '{nome}'...")
+        try:
+            resultados = backtest(fabrica, dobras, CAMINHO_DATAFRAME, somente_dia=SOMENTE_DIA,
+                                  max_processos=MAX_PROCESSOS, threads_por_processo=THREADS_POR_PROCESSO,
+                                  pasta_matrizes=PASTA_MATRIZES)
+        except FileNotFoundError:
+            print("ERRO: Dataset final não encontrado. Execute o script 'dataframe.py' primeiro.")
+            exit(1)
+        resumos[nome] = resumo_backtest(resultados)
+
+        colunas = [(alvo, metrica) for alvo in TARGETS for metrica in ('mae', 'rmse', 'mbe', 'skill_persistencia')]
+        print(resumos[nome][colunas].round(3).to_string())
+
+    tabela = pd.concat(resumos, names=['modelo'])
+    tabela.columns = [f'{alvo}_{metrica}' for alvo, metrica in tabela.columns]
+    tabela.to_csv(CAMINHO_RESUMO)
+    print(f"\nResumo salvo em '{CAMINHO_RESUMO}'")
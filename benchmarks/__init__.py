@@ -0,0 +1,5 @@
+"""
+Benchmarks do pipeline. Rode da raiz do repositório, por exemplo:
+
+    python -m benchmarks.bench_estacoes
+"""
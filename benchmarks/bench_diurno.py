@@ -0,0 +1,91 @@
+"""
+Modelo completo x modelo diurno (solar_ia/modelos.py) na validação de 2023.
+
+Para cada modelo pedido, treina duas vezes com os mesmos hiperparâmetros:
+com todas as linhas do treino ('completo') e só com as de dia ('diurno',
+noite = 0 sem passar pelo modelo). Compara linhas de treino, tempo de treino,
+tempo de previsão e MAE/RMSE de GHI e DNI, na validação inteira e só de dia.
+
+    python -m benchmarks.bench_diurno --modelos rf xgb --arvores 50
+"""
+import argparse
+import time
+
+import numpy as np
+
+from solar_ia.dataset import CAMINHO_DATAFRAME, carregar_xy
+from solar_ia.modelos import ModeloDiurno
+
+
+def _random_forest(arvores):
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=arvores, min_samples_leaf=5, n_jobs=-1, random_state=42)
+
+
+class _XGBoostGhiDni:
+    """Um XGBRegressor por alvo, com a mesma interface multi-saída do RandomForest."""
+
+    def __init__(self, arvores):
+        import xgboost as xgb
+        self.modelos = [xgb.XGBRegressor(n_estimators=arvores, learning_rate=0.1, n_jobs=-1, random_state=42)
+                        for _ in range(2)]
+
+    def fit(self, X, y):
+        for i, modelo in enumerate(self.modelos):
+            modelo.fit(X, y.iloc[:, i])
+        return self
+
+    def predict(self, X):
+        return np.column_stack([modelo.predict(X) for modelo in self.modelos])
+
+
+MODELOS = {
+    'rf': _random_forest,
+    'xgb': _XGBoostGhiDni,
+}
+
+
+def _erros(y, previsoes, mascara):
+    erro = previsoes[mascara] - y.to_numpy()[mascara]
+    return np.abs(erro).mean(axis=0), np.sqrt((erro ** 2).mean(axis=0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modelos', nargs='+', choices=list(MODELOS), default=list(MODELOS))
+    parser.add_argument('--arvores', type=int, default=50)
+    parser.add_argument('--dataset', default=CAMINHO_DATAFRAME)
+    args = parser.parse_args()
+
+    X_train, y_train = carregar_xy(args.dataset, 'treino')
+    X_val, y_val = carregar_xy(args.dataset, 'validacao')
+    dia_val = ModeloDiurno(None).mascara_dia(X_val)
+    todas = np.ones(len(X_val), dtype=bool)
+    print(f"Treino: {len(X_train)} linhas | validação: {len(X_val)} linhas ({dia_val.mean() * 100:.1f}% de dia)\n")
+
+    print(f"{'modelo':<6} {'modo':<9} {'linhas treino':>13} {'treino (s)':>10} {'previsão (s)':>12} "
+          f"{'MAE ghi':>8} {'RMSE ghi':>9} {'MAE dni':>8} {'RMSE dni':>9} {'MAE ghi dia':>12} {'MAE dni dia':>12}")
+    print("-" * 121)
+    for nome in args.modelos:
+        for modo in ('completo', 'diurno'):
+            modelo = MODELOS[nome](args.arvores)
+            if modo == 'diurno':
+                modelo = ModeloDiurno(modelo)
+
+            inicio = time.perf_counter()
+            modelo.fit(X_train, y_train)
+            tempo_treino = time.perf_counter() - inicio
+            linhas_treino = len(X_train) if modo == 'completo' else int(modelo.mascara_dia(X_train).sum())
+
+            inicio = time.perf_counter()
+            previsoes = modelo.predict(X_val)
+            tempo_previsao = time.perf_counter() - inicio
+
+            mae, rmse = _erros(y_val, previsoes, todas)
+            mae_dia, _ = _erros(y_val, previsoes, dia_val)
+            print(f"{nome:<6} {modo:<9} {linhas_treino:>13} {tempo_treino:>10.2f} {tempo_previsao:>12.3f} "
+                  f"{mae[0]:>8.2f} {rmse[0]:>9.2f} {mae[1]:>8.2f} {rmse[1]:>9.2f} {mae_dia[0]:>12.2f} {mae_dia[1]:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
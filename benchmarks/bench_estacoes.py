@@ -0,0 +1,88 @@
+"""
+Benchmark da junção INMET + NSRDB com N estações sintéticas.
+
+Compara a junção antiga (só pelo timestamp, cruzando todas as estações e
+colapsando depois com groupby().mean()) com a junção por (estação, timestamp)
+de solar_ia.juncao. Cada caso roda num processo novo para que o pico de RSS
+medido seja só dele.
+
+    python -m benchmarks.bench_estacoes --estacoes 4 8 64 --anos 2018 2019
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from solar_ia.juncao import juntar_inmet_nsrdb
+from solar_ia.memoria import pico_rss_mb
+from solar_ia.sintetico import gerar_inmet, gerar_nsrdb
+
+
+def _colapsar(df_final):
+    return (df_final.reset_index()
+                    .groupby(['timestamp', 'codigo_estacao'])
+                    .mean()
+                    .reset_index()
+                    .set_index('timestamp'))
+
+
+def _juncao_antiga(df_inmet, df_nsrdb):
+    df_nsrdb = df_nsrdb.drop(columns='codigo_estacao')
+    return _colapsar(df_inmet.join(df_nsrdb, lsuffix='_inmet', rsuffix='_nsrdb'))
+
+
+def _juncao_por_chave(df_inmet, df_nsrdb):
+    return _colapsar(juntar_inmet_nsrdb(df_inmet, df_nsrdb))
+
+
+ESTRATEGIAS = {
+    'antiga': _juncao_antiga,
+    'por_chave': _juncao_por_chave,
+}
+
+
+def executar_caso(estrategia, n_estacoes, anos):
+    """Roda um caso e devolve tempo de parede, pico de RSS e o acréscimo de RSS da junção."""
+    df_inmet = gerar_inmet(n_estacoes, anos)
+    df_nsrdb = gerar_nsrdb(n_estacoes, anos)
+    rss_antes = pico_rss_mb()
+
+    inicio = time.perf_counter()
+    df_final = ESTRATEGIAS[estrategia](df_inmet, df_nsrdb)
+    duracao = time.perf_counter() - inicio
+
+    pico = pico_rss_mb()
+    return {
+        'estrategia': estrategia,
+        'estacoes': n_estacoes,
+        'linhas': len(df_final),
+        'segundos': duracao,
+        'pico_rss_mb': pico,
+        'acrescimo_rss_mb': pico - rss_antes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estacoes', type=int, nargs='+', default=[4, 8, 64])
+    parser.add_argument('--anos', type=int, nargs='+', default=[2018])
+    parser.add_argument('--max-estacoes-antiga', type=int, default=8,
+                        help="A junção antiga é quadrática no número de estações; acima disso ela é pulada.")
+    args = parser.parse_args()
+
+    contexto = get_context('spawn')
+    print(f"{'estratégia':<12} {'estações':>9} {'linhas':>12} {'tempo (s)':>10} {'pico RSS (MB)':>14} {'Δ RSS (MB)':>11}")
+    print("-" * 73)
+    for n_estacoes in args.estacoes:
+        for estrategia in ESTRATEGIAS:
+            if estrategia == 'antiga' and n_estacoes > args.max_estacoes_antiga:
+                print(f"{estrategia:<12} {n_estacoes:>9} {'(pulada)':>12}")
+                continue
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                r = executor.submit(executar_caso, estrategia, n_estacoes, args.anos).result()
+            print(f"{r['estrategia']:<12} {r['estacoes']:>9} {r['linhas']:>12} {r['segundos']:>10.2f} "
+                  f"{r['pico_rss_mb']:>14.0f} {r['acrescimo_rss_mb']:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Modelo exportado (solar_ia/exportacao.py) contra o joblib.
+
+Treina um RandomForest e um XGBoost diurnos pequenos, salva cada um com
+joblib e com exportar_modelo, e mede em processos novos: partida a frio
+(imports + carga), RSS depois de carregar, previsão em lote da
+validação de 2023 (linhas/s), latência de uma linha (p50) e a maior
+diferença entre as previsões dos dois formatos.
+
+    python -m benchmarks.bench_exportacao --arvores-rf 40 --rodadas-xgb 300
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+def executar_caso(formato, caminho, caminho_dataset, linhas_latencia=200):
+    inicio = time.perf_counter()
+    if formato == 'joblib':
+        import joblib
+        modelo = joblib.load(caminho)
+    else:
+        from solar_ia.exportacao import carregar_exportado
+        modelo = carregar_exportado(caminho)
+    partida = time.perf_counter() - inicio
+
+    import numpy as np
+
+    from solar_ia.dataset import carregar_xy
+    from solar_ia.memoria import rss_atual_mb
+    rss_carga = rss_atual_mb()
+
+    X_val, _ = carregar_xy(caminho_dataset, 'validacao')
+    inicio = time.perf_counter()
+    previsoes = modelo.predict(X_val)
+    tempo_lote = time.perf_counter() - inicio
+
+    if hasattr(modelo, 'set_params') and 'n_jobs' in modelo.get_params():
+        modelo.set_params(n_jobs=1)
+    latencias = []
+    for i in np.linspace(0, len(X_val) - 1, linhas_latencia).astype(int):
+        inicio = time.perf_counter()
+        modelo.predict(X_val.iloc[[i]])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'partida_s': partida,
+        'rss_mb': rss_carga,
+        'linhas_por_s': len(X_val) / tempo_lote,
+        'linha_p50_ms': float(np.percentile(latencias, 50)),
+        'previsoes': previsoes,
+    }
+
+
+def treinar_modelos(caminho_dataset, arvores_rf, rodadas_xgb):
+    from solar_ia.dataset import TARGETS, carregar_xy
+    from solar_ia.floresta import treinar_floresta
+    from solar_ia.modelos import ModeloDiurno, criar_modelo_xgb
+
+    X_train, y_train = carregar_xy(caminho_dataset, 'treino', somente_dia=True)
+    X_val, y_val = carregar_xy(caminho_dataset, 'validacao')
+    floresta, _ = treinar_floresta(X_train, y_train, X_val, y_val, preset='compacto', max_arvores=arvores_rf,
+                                   lote=arvores_rf, somente_dia=True, verbose=False)
+    xgboost = ModeloDiurno(criar_modelo_xgb('uma_matriz', n_estimators=rodadas_xgb, learning_rate=0.1))
+    xgboost.fit(X_train, y_train[TARGETS])
+    return {'rf': floresta, 'xgb': xgboost}
+
+
+def main():
+    import joblib
+    import numpy as np
+
+    from solar_ia.dataset import CAMINHO_DATAFRAME
+    from solar_ia.exportacao import exportar_modelo
+    from solar_ia.floresta import COMPRESSAO_MODELO
+    from solar_ia.memoria import tamanho_em_disco_mb
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arvores-rf', type=int, default=40)
+    parser.add_argument('--rodadas-xgb', type=int, default=300)
+    parser.add_argument('--dataset', default=CAMINHO_DATAFRAME)
+    args = parser.parse_args()
+
+    print("Treinando os modelos...")
+    modelos = treinar_modelos(args.dataset, args.arvores_rf, args.rodadas_xgb)
+
+    contexto = get_context('spawn')
+    with tempfile.TemporaryDirectory() as pasta:
+        print(f"\n{'modelo':<7} {'formato':<10} {'disco (MB)':>11} {'partida (s)':>12} {'RSS (MB)':>9} "
+              f"{'linhas/s':>10} {'1 linha p50 (ms)':>17} {'dif. máx.':>10}")
+        print("-" * 94)
+        for nome, modelo in modelos.items():
+            caminhos = {
+                'joblib': os.path.join(pasta, f'{nome}.joblib'),
+                'exportado': os.path.join(pasta, f'{nome}_exportado'),
+            }
+            joblib.dump(modelo, caminhos['joblib'], compress=COMPRESSAO_MODELO)
+            exportar_modelo(modelo, caminhos['exportado'])
+
+            referencia = None
+            for formato, caminho in caminhos.items():
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                    r = executor.submit(executar_caso, formato, caminho, args.dataset).result()
+                if referencia is None:
+                    referencia = r['previsoes']
+                diferenca = float(np.abs(r['previsoes'] - referencia).max())
+                print(f"{nome:<7} {formato:<10} {tamanho_em_disco_mb(caminho):>11.1f} {r['partida_s']:>12.2f} "
+                      f"{r['rss_mb']:>9.0f} {r['linhas_por_s']:>10.0f} {r['linha_p50_ms']:>17.2f} "
+                      f"{diferenca:>10.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark das features de lag e de janela móvel.
+
+Compara o caminho antigo de dataframe.py (groupby().shift e
+groupby().transform(lambda ...) por coluna) com
+solar_ia.features.adicionar_features_temporais num quadro sintético de
+várias estações e vários anos, e confere que as colunas geradas são as mesmas.
+A igualdade vale porque o quadro sintético não tem horas faltando: com
+lacunas, o caminho antigo contava registros e o atual conta horas da grade
+estação × hora (solar_ia/grade.py).
+
+    python -m benchmarks.bench_features --estacoes 8 --anos 2018 2019 2020
+"""
+import argparse
+import time
+
+import numpy as np
+
+from solar_ia.features import ESPECIFICACAO_FEATURES, adicionar_features_temporais, colunas_geradas
+from solar_ia.juncao import juntar_inmet_nsrdb
+from solar_ia.sintetico import gerar_inmet, gerar_nsrdb
+
+
+def features_antigas(df_final, especificacao=ESPECIFICACAO_FEATURES):
+    """Reprodução fiel do bloco de features de dataframe.py antes do motor vetorizado."""
+    for coluna, spec in especificacao.items():
+        for lag in spec['lags']:
+            df_final[f'{coluna}_lag{lag}h'] = df_final.groupby('codigo_estacao')[coluna].shift(lag)
+
+    for coluna, spec in especificacao.items():
+        for window_size in spec['janelas']:
+            df_final[f'{coluna}_media_movel_{window_size}h'] = df_final.groupby('codigo_estacao')[coluna].transform(
+                lambda x: x.shift(1).rolling(window=window_size).mean()
+            )
+            df_final[f'{coluna}_std_movel_{window_size}h'] = df_final.groupby('codigo_estacao')[coluna].transform(
+                lambda x: x.shift(1).rolling(window=window_size).std()
+            )
+    return df_final
+
+
+def quadro_sintetico(n_estacoes, anos):
+    df = juntar_inmet_nsrdb(gerar_inmet(n_estacoes, anos, fracao_nulos=0.0), gerar_nsrdb(n_estacoes, anos))
+    for coluna in ('ghi', 'dni', 'dhi'):
+        df[coluna] = df[coluna].astype(np.float64)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estacoes', type=int, default=8)
+    parser.add_argument('--anos', type=int, nargs='+', default=[2018, 2019, 2020])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    base = quadro_sintetico(args.estacoes, args.anos)
+    print(f"Quadro sintético: {len(base)} linhas, {args.estacoes} estações, anos {args.anos}\n")
+
+    tempos = {}
+    resultados = {}
+    for nome, funcao in (('antigo', features_antigas), ('vetorizado', adicionar_features_temporais)):
+        melhor = float('inf')
+        for _ in range(args.repeticoes):
+            df = base.copy()
+            inicio = time.perf_counter()
+            resultados[nome] = funcao(df)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[nome] = melhor
+        print(f"{nome:<12} {melhor:8.3f} s (melhor de {args.repeticoes})")
+
+    print(f"\nAceleração: {tempos['antigo'] / tempos['vetorizado']:.1f}x")
+
+    novas = colunas_geradas()
+    antigo, vetorizado = resultados['antigo'], resultados['vetorizado']
+    mesmas_colunas = list(antigo.columns) == list(vetorizado.columns)
+    maior_diferenca = max(
+        float(np.nanmax(np.abs(antigo[col].to_numpy(np.float64) - vetorizado[col].to_numpy(np.float64)), initial=0.0))
+        for col in novas
+    )
+    mesmos_nulos = all((antigo[col].isna() == vetorizado[col].isna()).all() for col in novas)
+    print(f"Mesmas colunas e ordem: {mesmas_colunas}")
+    print(f"Mesmas posições de NaN: {mesmos_nulos}")
+    print(f"Maior diferença absoluta: {maior_diferenca:.3g}")
+
+
+if __name__ == '__main__':
+    main()
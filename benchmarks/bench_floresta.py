@@ -0,0 +1,91 @@
+"""
+Presets de memória do RandomForest (PRESETS_RF em solar_ia/floresta.py).
+
+Cada preset roda num processo novo: treina com treinar_floresta, salva com
+joblib comprimido e reporta tempo de treino, pico de RSS, tamanho em disco,
+tempo de carga, latência de previsão (validação inteira e uma linha, p50/p99)
+e MAE na validação de 2023.
+
+    python -m benchmarks.bench_floresta --presets completo compacto leve --arvores 40
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import joblib
+import numpy as np
+
+from solar_ia.dataset import CAMINHO_DATAFRAME, carregar_xy
+from solar_ia.floresta import COMPRESSAO_MODELO, PRESETS_RF, treinar_floresta
+from solar_ia.memoria import pico_rss_mb, tamanho_em_disco_mb
+
+
+def executar_caso(preset, arvores, lote, caminho, linhas_latencia=200):
+    X_train, y_train = carregar_xy(caminho, 'treino')
+    X_val, y_val = carregar_xy(caminho, 'validacao')
+
+    inicio = time.perf_counter()
+    modelo, _ = treinar_floresta(X_train, y_train, X_val, y_val, preset=preset, max_arvores=arvores,
+                                 lote=lote, paciencia=arvores, verbose=False)
+    tempo_treino = time.perf_counter() - inicio
+    pico_treino = pico_rss_mb()
+    del X_train, y_train
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_modelo = os.path.join(pasta, 'modelo.joblib')
+        joblib.dump(modelo, caminho_modelo, compress=COMPRESSAO_MODELO)
+        tamanho = tamanho_em_disco_mb(caminho_modelo)
+        del modelo
+        inicio = time.perf_counter()
+        modelo = joblib.load(caminho_modelo)
+        tempo_carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    previsoes = modelo.predict(X_val)
+    tempo_lote = time.perf_counter() - inicio
+
+    modelo.set_params(n_jobs=1)
+    latencias = []
+    for i in np.linspace(0, len(X_val) - 1, linhas_latencia).astype(int):
+        inicio = time.perf_counter()
+        modelo.predict(X_val.iloc[[i]])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'preset': preset,
+        'treino_s': tempo_treino,
+        'pico_rss_mb': pico_treino,
+        'disco_mb': tamanho,
+        'carga_s': tempo_carga,
+        'lote_s': tempo_lote,
+        'linha_p50_ms': float(np.percentile(latencias, 50)),
+        'linha_p99_ms': float(np.percentile(latencias, 99)),
+        'mae': float(np.abs(previsoes - y_val.to_numpy()).mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--presets', nargs='+', choices=list(PRESETS_RF), default=list(PRESETS_RF))
+    parser.add_argument('--arvores', type=int, default=40)
+    parser.add_argument('--lote', type=int, default=20)
+    parser.add_argument('--dataset', default=CAMINHO_DATAFRAME)
+    args = parser.parse_args()
+
+    contexto = get_context('spawn')
+    print(f"{'preset':<9} {'treino (s)':>10} {'pico RSS (MB)':>14} {'disco (MB)':>11} {'carga (s)':>10} "
+          f"{'lote val (s)':>12} {'1 linha p50 (ms)':>17} {'p99 (ms)':>9} {'MAE':>7}")
+    print("-" * 108)
+    for preset in args.presets:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            r = executor.submit(executar_caso, preset, args.arvores, args.lote, args.dataset).result()
+        print(f"{r['preset']:<9} {r['treino_s']:>10.1f} {r['pico_rss_mb']:>14.0f} {r['disco_mb']:>11.1f} "
+              f"{r['carga_s']:>10.2f} {r['lote_s']:>12.3f} {r['linha_p50_ms']:>17.2f} {r['linha_p99_ms']:>9.2f} "
+              f"{r['mae']:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
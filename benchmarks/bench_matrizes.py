@@ -0,0 +1,106 @@
+"""
+Cache de matrizes (solar_ia/matrizes.py) contra a leitura do Parquet.
+
+Monta um dataset final sintético (solar_ia/sintetico.py) e, em processos
+novos (spawn), carrega o treino diurno e a validação de três formas:
+
+- 'parquet': carregar_xy, como os treinos faziam;
+- 'matrizes_frio': CacheMatrizes com o cache vazio (lê o Parquet e grava os .npy);
+- 'matrizes': CacheMatrizes com o cache pronto (só abre os memmaps).
+
+Mede o tempo para abrir, o tempo da primeira passada por X (que, no memmap,
+traz as páginas do disco), o RSS e a parte anônima dele (memória própria do
+processo; as páginas do memmap vêm do cache do sistema e são divididas). Por
+fim, abre as matrizes em vários processos ao mesmo tempo.
+
+    python -m benchmarks.bench_matrizes --estacoes 8 --anos 2021 2022 2023 --processos 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from solar_ia.dataset import carregar_xy, salvar_dataset
+from solar_ia.matrizes import CacheMatrizes
+from solar_ia.memoria import rss_anonimo_mb, rss_atual_mb, tamanho_em_disco_mb
+from solar_ia.montagem import montar_dataframe
+from solar_ia.sintetico import estacoes_sinteticas, gerar_inmet, gerar_nsrdb
+
+
+def executar_caso(modo, caminho_dataset, caminho_estacoes, pasta_cache):
+    rss_antes, anonimo_antes = rss_atual_mb(), rss_anonimo_mb()
+    inicio = time.perf_counter()
+    if modo == 'parquet':
+        X_train, y_train = carregar_xy(caminho_dataset, 'treino', somente_dia=True, caminho_estacoes=caminho_estacoes)
+        X_val, y_val = carregar_xy(caminho_dataset, 'validacao', caminho_estacoes=caminho_estacoes)
+    else:
+        cache = CacheMatrizes(pasta_cache)
+        X_train, y_train = cache.abrir(caminho_dataset, 'treino', somente_dia=True, caminho_estacoes=caminho_estacoes)
+        X_val, y_val = cache.abrir(caminho_dataset, 'validacao', caminho_estacoes=caminho_estacoes)
+    abrir = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    soma = float(X_train.to_numpy().sum(dtype='float64') + X_val.to_numpy().sum(dtype='float64'))
+    tocar = time.perf_counter() - inicio
+
+    return {
+        'modo': modo,
+        'linhas': len(X_train) + len(X_val),
+        'abrir_s': abrir,
+        'tocar_s': tocar,
+        'rss_mb': rss_atual_mb() - rss_antes,
+        'anonimo_mb': rss_anonimo_mb() - anonimo_antes,
+        'soma': soma,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estacoes', type=int, default=8)
+    parser.add_argument('--anos', type=int, nargs='+', default=[2021, 2022, 2023])
+    parser.add_argument('--processos', type=int, default=4,
+                        help="Processos abrindo as mesmas matrizes ao mesmo tempo no fim.")
+    args = parser.parse_args()
+
+    contexto = get_context('spawn')
+    with tempfile.TemporaryDirectory() as pasta:
+        print(f"Montando o dataset sintético ({args.estacoes} estações, anos {args.anos})...")
+        tabela_estacoes = estacoes_sinteticas(args.estacoes)
+        df_final = montar_dataframe(gerar_inmet(args.estacoes, args.anos), gerar_nsrdb(args.estacoes, args.anos),
+                                    tabela_estacoes)
+        caminho_dataset = os.path.join(pasta, 'dataframe')
+        caminho_estacoes = os.path.join(pasta, 'estacoes.parquet')
+        pasta_cache = os.path.join(pasta, 'matrizes')
+        salvar_dataset(df_final, caminho_dataset)
+        tabela_estacoes.to_parquet(caminho_estacoes)
+        del df_final
+
+        print(f"\n{'modo':<15} {'linhas':>9} {'abrir (s)':>10} {'1ª passada (s)':>15} {'RSS (MB)':>9} "
+              f"{'anônimo (MB)':>13}")
+        print("-" * 76)
+        resultados = {}
+        for modo in ('parquet', 'matrizes_frio', 'matrizes'):
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                r = executor.submit(executar_caso, modo, caminho_dataset, caminho_estacoes, pasta_cache).result()
+            resultados[modo] = r
+            print(f"{r['modo']:<15} {r['linhas']:>9} {r['abrir_s']:>10.3f} {r['tocar_s']:>15.3f} "
+                  f"{r['rss_mb']:>9.1f} {r['anonimo_mb']:>13.1f}")
+
+        if len({round(r['soma'], 0) for r in resultados.values()}) != 1:
+            print("AVISO: as matrizes abertas não têm os mesmos valores do Parquet.")
+        print(f"\nParquet em disco: {tamanho_em_disco_mb(caminho_dataset):.1f} MB; "
+              f"matrizes: {tamanho_em_disco_mb(pasta_cache):.1f} MB")
+
+        for modo in ('parquet', 'matrizes'):
+            with ProcessPoolExecutor(max_workers=args.processos, mp_context=contexto) as executor:
+                futuros = [executor.submit(executar_caso, modo, caminho_dataset, caminho_estacoes, pasta_cache)
+                           for _ in range(args.processos)]
+                paralelos = [futuro.result() for futuro in futuros]
+            print(f"{args.processos} processos '{modo}': abrir {max(r['abrir_s'] for r in paralelos):.3f}s "
+                  f"(o mais lento), memória própria somada {sum(r['anonimo_mb'] for r in paralelos):.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+Benchmark de todas as etapas do pipeline com dados sintéticos.
+
+Gera INMET e NSRDB sintéticos (solar_ia/sintetico.py) com o esquema real,
+na escala pedida (estações x anos), e mede tempo de parede, tempo de CPU e
+pico de RSS de cada etapa: leitura dos CSVs do INMET e da NSRDB, correção de
+anomalias, junção com colapso de duplicados, features, treino e previsão de
+cada modelo e preparação dos dados dos gráficos. Cada grupo de etapas roda
+num processo novo (spawn), com as mesmas sementes, e só a etapa em si é medida.
+
+As medições são comparadas com a referência gravada em REFERENCIA (por
+escala); etapas mais lentas ou com mais pico de RSS que a referência além da
+tolerância são marcadas como regressão e o script sai com código 1.
+
+A referência vale para o código das etapas no momento em que foi gravada:
+todo commit que muda uma etapa do pipeline (leitura, junção, features,
+modelos, gráficos) grava de novo a referência, com --gravar-referencia, no
+mesmo commit, e diz na mensagem quais etapas mudaram e por quê.
+
+    python -m benchmarks.bench_pipeline --estacoes 4 --anos 2022 2023
+    python -m benchmarks.bench_pipeline --gravar-referencia
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from solar_ia.cache_previsoes import CachePrevisoes
+from solar_ia.dataset import TARGETS, carregar_xy, salvar_dataset
+from solar_ia.features import adicionar_features_temporais, features_calendario
+from solar_ia.inmet import ler_arquivo_inmet
+from solar_ia.juncao import juntar_inmet_nsrdb
+from solar_ia.memoria import pico_rss_mb, rss_atual_mb
+from solar_ia.montagem import (
+    corrigir_anomalias_nsrdb, imputar_com_nsrdb, interpolar_por_estacao, montar_dataframe, separar_xy,
+)
+from solar_ia.nsrdb import ler_arquivo_nsrdb, montar_estacao_nsrdb
+from solar_ia.qualidade import COLUNA_QC, COLUNAS_IRRADIACAO
+from solar_ia.sintetico import (
+    estacoes_sinteticas, gerar_inmet, gerar_nsrdb, gravar_csvs_inmet, gravar_csvs_nsrdb,
+)
+from solar_ia.solar import adicionar_geometria_solar
+from solar_ia.tipos import aplicar_politica_tipos
+
+REFERENCIA = os.path.join(os.path.dirname(__file__), 'referencia_pipeline.json')
+
+# Métricas comparadas com a referência (o tempo de CPU só é informado: ele
+# soma as threads e varia com o número de núcleos)
+METRICAS_COMPARADAS = ('parede_s', 'pico_rss_mb')
+
+# Etapas mais curtas que isto (na referência) não são comparadas: o ruído domina
+PAREDE_MINIMA_S = 0.05
+
+
+class Medidor:
+    """Mede tempo de parede, tempo de CPU e RSS de blocos 'with medidor.medir(nome)'."""
+
+    def __init__(self):
+        self.medicoes = {}
+
+    @contextmanager
+    def medir(self, nome):
+        rss_antes = rss_atual_mb()
+        inicio_parede, inicio_cpu = time.perf_counter(), time.process_time()
+        yield
+        parede, cpu = time.perf_counter() - inicio_parede, time.process_time() - inicio_cpu
+        pico = pico_rss_mb()
+        self.medicoes[nome] = {
+            'parede_s': parede,
+            'cpu_s': cpu,
+            'pico_rss_mb': pico,
+            'acrescimo_rss_mb': max(0.0, pico - rss_antes),
+        }
+
+
+# --- 1. GRUPOS DE ETAPAS ---
+#
+# Cada grupo prepara as entradas sem medir e mede só as suas etapas. Os dados
+# sintéticos são sempre os mesmos para a mesma escala (sementes fixas).
+
+def _leitura(n_estacoes, anos, pasta, medidor):
+    caminhos_inmet = gravar_csvs_inmet(gerar_inmet(n_estacoes, anos), os.path.join(pasta, 'inmet'))
+    caminhos_nsrdb = gravar_csvs_nsrdb(gerar_nsrdb(n_estacoes, anos), os.path.join(pasta, 'nsrdb'))
+
+    with medidor.medir('leitura_inmet'):
+        df_inmet = pd.concat([ler_arquivo_inmet(caminho)[0] for caminho in caminhos_inmet])
+        df_inmet.sort_index(inplace=True, kind='stable')
+    with medidor.medir('leitura_nsrdb'):
+        df_nsrdb = pd.concat([montar_estacao_nsrdb([ler_arquivo_nsrdb(c) for c in caminhos], codigo)
+                              for codigo, caminhos in caminhos_nsrdb.items()])
+        df_nsrdb.sort_index(inplace=True, kind='stable')
+    return {'linhas': len(df_inmet) + len(df_nsrdb)}
+
+
+def _montagem(n_estacoes, anos, pasta, medidor):
+    tabela_estacoes = estacoes_sinteticas(n_estacoes)
+    df_inmet, df_nsrdb = gerar_inmet(n_estacoes, anos), gerar_nsrdb(n_estacoes, anos)
+
+    # Mesmas etapas, na mesma ordem, de montagem.montar_dataframe
+    with medidor.medir('anomalias'):
+        df_nsrdb = corrigir_anomalias_nsrdb(df_nsrdb, tabela_estacoes)
+    with medidor.medir('juncao'):
+        df_final = imputar_com_nsrdb(aplicar_politica_tipos(juntar_inmet_nsrdb(df_inmet, df_nsrdb)))
+        colunas_numericas = [col for col in df_final.select_dtypes('number').columns
+                             if col not in COLUNAS_IRRADIACAO + [COLUNA_QC]]
+        df_final = interpolar_por_estacao(df_final, colunas_numericas, limit_direction='both')
+        df_final.dropna(inplace=True)
+    with medidor.medir('features'):
+        for coluna, valores in features_calendario(df_final.index.hour, df_final.index.dayofyear).items():
+            df_final[coluna] = valores
+        df_final = adicionar_geometria_solar(df_final, tabela_estacoes)
+        df_final = aplicar_politica_tipos(adicionar_features_temporais(df_final).dropna())
+    return {'linhas': len(df_final)}
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestRegressor
+    from solar_ia.floresta import PRESETS_RF
+    return RandomForestRegressor(n_estimators=50, n_jobs=-1, random_state=42, **PRESETS_RF['compacto'])
+
+
+def _xgboost():
+    from solar_ia.modelos import criar_modelo_xgb
+    return criar_modelo_xgb('uma_matriz', n_estimators=200, learning_rate=0.1, n_jobs=-1, random_state=42)
+
+
+MODELOS = {
+    'rf': _random_forest,
+    'xgb': _xgboost,
+}
+
+
+def _dados_modelo(n_estacoes, anos):
+    tabela_estacoes = estacoes_sinteticas(n_estacoes)
+    df_final = montar_dataframe(gerar_inmet(n_estacoes, anos), gerar_nsrdb(n_estacoes, anos), tabela_estacoes)
+    return separar_xy(df_final, tabela_estacoes)
+
+
+def _modelo(nome):
+    def grupo(n_estacoes, anos, pasta, medidor):
+        try:
+            modelo = MODELOS[nome]()
+        except ImportError:
+            print(f"AVISO: modelo '{nome}' indisponível (dependência não instalada). Pulando.")
+            return {}
+        divisoes = _dados_modelo(n_estacoes, anos)
+        X_train, y_train = divisoes['treino']
+        X_val, _ = divisoes['validacao']
+
+        with medidor.medir(f'{nome}_treino'):
+            modelo.fit(X_train, y_train[TARGETS])
+        with medidor.medir(f'{nome}_previsao'):
+            modelo.predict(X_val)
+        return {'linhas': len(X_train) + len(X_val)}
+    return grupo
+
+
+def _graficos(n_estacoes, anos, pasta, medidor):
+    tabela_estacoes = estacoes_sinteticas(n_estacoes)
+    df_final = montar_dataframe(gerar_inmet(n_estacoes, anos), gerar_nsrdb(n_estacoes, anos), tabela_estacoes)
+    caminho_dataset = os.path.join(pasta, 'dataframe')
+    caminho_estacoes = os.path.join(pasta, 'estacoes.parquet')
+    caminho_modelo = os.path.join(pasta, 'modelo.joblib')
+    salvar_dataset(df_final, caminho_dataset)
+    tabela_estacoes.to_parquet(caminho_estacoes)
+    X_train, y_train = separar_xy(df_final, tabela_estacoes)['treino']
+    joblib.dump(_random_forest().fit(X_train, y_train[TARGETS]), caminho_modelo)
+    del df_final, X_train, y_train
+
+    # O que plot-predict.py faz antes de desenhar: ler a janela e prever (do cache)
+    inicio, fim = f'{max(anos)}-05-06', f'{max(anos)}-05-08'
+    cache = CachePrevisoes(os.path.join(pasta, 'cache'))
+    for nome in ('graficos_dados', 'graficos_dados_cache'):
+        with medidor.medir(nome):
+            X, y = carregar_xy(caminho_dataset, None, inicio=inicio, fim=fim, caminho_estacoes=caminho_estacoes)
+            previsoes = cache.prever(caminho_modelo, caminho_dataset, inicio=inicio, fim=fim,
+                                     caminho_estacoes=caminho_estacoes)
+            pd.DataFrame(previsoes[TARGETS].to_numpy(), index=y.index, columns=TARGETS)
+    return {'linhas': len(X)}
+
+
+GRUPOS = {
+    'leitura': _leitura,
+    'montagem': _montagem,
+    'modelo_rf': _modelo('rf'),
+    'modelo_xgb': _modelo('xgb'),
+    'graficos': _graficos,
+}
+
+
+def executar_grupo(grupo, n_estacoes, anos):
+    """Roda um grupo numa pasta temporária e devolve {etapa: medição}."""
+    medidor = Medidor()
+    with tempfile.TemporaryDirectory() as pasta:
+        info = GRUPOS[grupo](n_estacoes, anos, pasta, medidor)
+    for medicao in medidor.medicoes.values():
+        medicao.update(info)
+    return medidor.medicoes
+
+
+# --- 2. REFERÊNCIA E COMPARAÇÃO ---
+
+def chave_escala(n_estacoes, anos):
+    return f"{n_estacoes}x{'-'.join(str(ano) for ano in sorted(anos))}"
+
+
+def ambiente():
+    """Versões e máquina em que as medições foram feitas (gravadas com a referência)."""
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+    }
+
+
+def ler_referencia(caminho=REFERENCIA):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho) as arquivo:
+        return json.load(arquivo)
+
+
+def gravar_referencia(etapas, escala, caminho=REFERENCIA):
+    referencia = ler_referencia(caminho)
+    referencia[escala] = {'ambiente': ambiente(), 'etapas': etapas}
+    with open(caminho, 'w') as arquivo:
+        json.dump(referencia, arquivo, indent=2, sort_keys=True)
+        arquivo.write('\n')
+
+
+def comparar(etapas, referencia, tolerancia):
+    """
+    Lista de (etapa, métrica, atual, referência, razão) das medições que
+    passaram da referência por mais que 'tolerancia' (0.25 = 25%).
+    """
+    regressoes = []
+    for etapa, medicao in etapas.items():
+        anterior = referencia.get(etapa)
+        if anterior is None or anterior['parede_s'] < PAREDE_MINIMA_S:
+            continue
+        for metrica in METRICAS_COMPARADAS:
+            razao = medicao[metrica] / anterior[metrica] if anterior[metrica] > 0 else 1.0
+            if razao > 1 + tolerancia:
+                regressoes.append((etapa, metrica, medicao[metrica], anterior[metrica], razao))
+    return regressoes
+
+
+# --- 3. EXECUÇÃO ---
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estacoes', type=int, default=4)
+    parser.add_argument('--anos', type=int, nargs='+', default=[2022, 2023],
+                        help="Inclua um ano antes e um depois de 2023-01-01 para haver treino e validação.")
+    parser.add_argument('--grupos', nargs='+', choices=list(GRUPOS), default=list(GRUPOS))
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    parser.add_argument('--referencia', default=REFERENCIA)
+    parser.add_argument('--gravar-referencia', action='store_true',
+                        help="Grava as medições como a nova referência desta escala.")
+    parser.add_argument('--saida', help="Grava também as medições desta execução neste JSON.")
+    args = parser.parse_args()
+
+    escala = chave_escala(args.estacoes, args.anos)
+    referencia = ler_referencia(args.referencia).get(escala, {}).get('etapas', {})
+    print(f"Escala: {args.estacoes} estações x anos {args.anos} ({escala})")
+    if not referencia and not args.gravar_referencia:
+        print(f"AVISO: sem referência para '{escala}' em '{args.referencia}'. Use --gravar-referencia.")
+
+    contexto = get_context('spawn')
+    etapas = {}
+    print(f"\n{'etapa':<22} {'linhas':>10} {'parede (s)':>11} {'CPU (s)':>9} {'pico RSS (MB)':>14} "
+          f"{'Δ RSS (MB)':>11} {'ref. (s)':>9}")
+    print("-" * 92)
+    for grupo in args.grupos:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            medicoes = executor.submit(executar_grupo, grupo, args.estacoes, args.anos).result()
+        for etapa, m in medicoes.items():
+            anterior = referencia.get(etapa, {}).get('parede_s')
+            texto_anterior = f"{anterior:>9.2f}" if anterior is not None else f"{'-':>9}"
+            print(f"{etapa:<22} {m['linhas']:>10} {m['parede_s']:>11.2f} {m['cpu_s']:>9.2f} "
+                  f"{m['pico_rss_mb']:>14.0f} {m['acrescimo_rss_mb']:>11.0f} {texto_anterior}")
+        etapas.update(medicoes)
+
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump({'escala': escala, 'ambiente': ambiente(), 'etapas': etapas}, arquivo, indent=2)
+
+    if args.gravar_referencia:
+        gravar_referencia(etapas, escala, args.referencia)
+        print(f"\nReferência de '{escala}' gravada em '{args.referencia}'.")
+        return
+
+    regressoes = comparar(etapas, referencia, args.tolerancia)
+    if not regressoes:
+        print(f"\nNenhuma regressão acima de {args.tolerancia:.0%} em relação à referência.")
+        return
+    print(f"\nREGRESSÕES (acima de {args.tolerancia:.0%} da referência):")
+    for etapa, metrica, atual, anterior, razao in regressoes:
+        print(f"  - {etapa}: {metrica} {atual:.2f} vs {anterior:.2f} ({razao:.2f}x)")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
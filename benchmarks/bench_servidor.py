@@ -0,0 +1,149 @@
+"""
+Carga no servidor de inferência (solar_ia/servidor.py) em localhost.
+
+Para cada configuração de micro-lote o servidor sobe num processo novo com o
+modelo pedido e N clientes (threads, conexões HTTP persistentes) disparam
+pedidos de --linhas linhas da validação de 2023 durante --duracao segundos.
+Reporta latência p50/p99 vista pelo cliente, pedidos/s, linhas/s e o tamanho
+médio dos lotes que chegaram ao predict.
+
+Sem --modelo, treina um RandomForest 'leve' pequeno só para a medição.
+
+    python -m benchmarks.bench_servidor --clientes 1 8 32 --linhas 1 --duracao 10
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing import get_context
+
+import joblib
+import numpy as np
+
+from solar_ia.dataset import CAMINHO_DATAFRAME, CAMINHO_ESTACOES, carregar_xy
+from solar_ia.floresta import treinar_floresta
+
+# (nome, max_linhas, espera_ms): max_linhas=1 desliga o loteamento
+CONFIGURACOES = [
+    ('sem lote', 1, 0.0),
+    ('lote 2ms', 4096, 2.0),
+]
+
+
+def _servir(caminho_modelo, porta, max_linhas, espera_ms, caminho_estacoes):
+    from solar_ia.estacoes import carregar_tabela_estacoes
+    from solar_ia.servidor import criar_servidor
+
+    tabela = carregar_tabela_estacoes(caminho_estacoes) if os.path.exists(caminho_estacoes) else None
+    servidor = criar_servidor({'modelo': joblib.load(caminho_modelo)}, porta=porta, tabela_estacoes=tabela,
+                              max_linhas=max_linhas, espera_ms=espera_ms)
+    servidor.serve_forever()
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _pedir(conexao, metodo, rota, corpo=None):
+    conexao.request(metodo, rota, body=corpo, headers={'Content-Type': 'application/json'})
+    resposta = conexao.getresponse()
+    dados = resposta.read()
+    if resposta.status != 200:
+        raise RuntimeError(f"{resposta.status}: {dados[:200]}")
+    return json.loads(dados)
+
+
+def _aguardar(porta, limite_s=60):
+    prazo = time.time() + limite_s
+    while True:
+        try:
+            return _pedir(http.client.HTTPConnection('127.0.0.1', porta), 'GET', '/saude')
+        except OSError:
+            if time.time() > prazo:
+                raise
+            time.sleep(0.2)
+
+
+def _cliente(porta, corpos, fim, latencias):
+    conexao = http.client.HTTPConnection('127.0.0.1', porta)
+    i = 0
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        _pedir(conexao, 'POST', '/prever/modelo', corpos[i % len(corpos)])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        i += 1
+
+
+def gerar_carga(porta, corpos, clientes, duracao):
+    """N clientes em paralelo por 'duracao' segundos; devolve as latências (ms) e a duração real."""
+    latencias = [[] for _ in range(clientes)]
+    fim = time.perf_counter() + duracao
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=_cliente, args=(porta, corpos, fim, latencias[i])) for i in range(clientes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.concatenate([np.array(l) for l in latencias]), time.perf_counter() - inicio
+
+
+def _modelo_para_medicao(caminho_dataset, pasta):
+    X_val, y_val = carregar_xy(caminho_dataset, 'validacao')
+    modelo, _ = treinar_floresta(X_val, y_val, X_val, y_val, preset='leve', max_arvores=20, lote=20, verbose=False)
+    caminho = os.path.join(pasta, 'modelo.joblib')
+    joblib.dump(modelo, caminho)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modelo', default=None, help="Caminho de um .joblib (ex.: training/xgb_model.joblib)")
+    parser.add_argument('--clientes', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--linhas', type=int, default=1, help="Linhas por pedido")
+    parser.add_argument('--duracao', type=float, default=10.0)
+    parser.add_argument('--dataset', default=CAMINHO_DATAFRAME)
+    args = parser.parse_args()
+
+    X_val, _ = carregar_xy(args.dataset, 'validacao')
+    registros = X_val.astype(float).to_dict(orient='records')
+    rng = np.random.default_rng(42)
+    corpos = [json.dumps({'linhas': [registros[i] for i in rng.integers(len(registros), size=args.linhas)]})
+              for _ in range(500)]
+
+    contexto = get_context('spawn')
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_modelo = args.modelo or _modelo_para_medicao(args.dataset, pasta)
+        print(f"Modelo: {args.modelo or 'RandomForest leve (20 árvores) treinado para a medição'}, "
+              f"{args.linhas} linha(s) por pedido, {args.duracao:.0f}s por caso\n")
+        print(f"{'config':<9} {'clientes':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'pedidos/s':>10} "
+              f"{'linhas/s':>10} {'linhas/lote':>12}")
+        print("-" * 73)
+        for nome, max_linhas, espera_ms in CONFIGURACOES:
+            porta = _porta_livre()
+            processo = contexto.Process(target=_servir,
+                                        args=(caminho_modelo, porta, max_linhas, espera_ms, CAMINHO_ESTACOES))
+            processo.start()
+            try:
+                _aguardar(porta)
+                for clientes in args.clientes:
+                    antes = _pedir(http.client.HTTPConnection('127.0.0.1', porta), 'GET', '/metricas')['modelo']
+                    latencias, duracao = gerar_carga(porta, corpos, clientes, args.duracao)
+                    depois = _pedir(http.client.HTTPConnection('127.0.0.1', porta), 'GET', '/metricas')['modelo']
+                    lotes = depois['lotes'] - antes['lotes']
+                    linhas = depois['linhas'] - antes['linhas']
+                    print(f"{nome:<9} {clientes:>8} {np.percentile(latencias, 50):>9.2f} "
+                          f"{np.percentile(latencias, 99):>9.2f} {len(latencias) / duracao:>10.0f} "
+                          f"{len(latencias) * args.linhas / duracao:>10.0f} {linhas / max(lotes, 1):>12.1f}")
+            finally:
+                processo.terminate()
+                processo.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark da política de tipos (solar_ia/tipos.py).
+
+Monta o quadro final sintético (junção + features) de duas formas e compara
+memória do DataFrame, tamanho em disco (Parquet) e pico de RSS do processo:
+
+- 'antes': como o pipeline gravava antes (tudo float64, código da estação
+  como texto e latitude/longitude repetidas em cada linha);
+- 'depois': com aplicar_politica_tipos (float32, estação categórica,
+  tipo de nuvem int8 e sem coordenadas por linha).
+
+    python -m benchmarks.bench_tipos --estacoes 16 --anos 2018 2019
+"""
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from solar_ia.features import adicionar_features_temporais
+from solar_ia.juncao import juntar_inmet_nsrdb
+from solar_ia.memoria import memoria_df_mb, pico_rss_mb, tamanho_em_disco_mb
+from solar_ia.sintetico import estacoes_sinteticas, gerar_inmet, gerar_nsrdb
+from solar_ia.tipos import aplicar_politica_tipos
+
+
+def _como_antes(df, n_estacoes):
+    """Representação antiga: float64, código como texto e coordenadas em cada linha."""
+    df = df.astype({col: np.float64 for col in df.select_dtypes('number').columns})
+    df['codigo_estacao'] = df['codigo_estacao'].astype(str).astype(object)
+    estacoes = estacoes_sinteticas(n_estacoes)
+    for coluna in ('latitude', 'longitude'):
+        valores = estacoes[coluna].reindex(df['codigo_estacao']).to_numpy()
+        df.insert(1, f'{coluna}_nsrdb', valores)
+        df.insert(1, f'{coluna}_inmet', valores)
+    return df
+
+
+def executar_caso(modo, n_estacoes, anos):
+    df = juntar_inmet_nsrdb(gerar_inmet(n_estacoes, anos, fracao_nulos=0.0), gerar_nsrdb(n_estacoes, anos))
+    df = _como_antes(df, n_estacoes) if modo == 'antes' else aplicar_politica_tipos(df)
+    df = adicionar_features_temporais(df).dropna()
+    if modo == 'depois':
+        df = aplicar_politica_tipos(df)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'dataframe.parquet')
+        df.to_parquet(caminho)
+        em_disco = tamanho_em_disco_mb(caminho)
+
+    return {
+        'modo': modo,
+        'linhas': len(df),
+        'colunas': df.shape[1],
+        'memoria_mb': memoria_df_mb(df),
+        'disco_mb': em_disco,
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estacoes', type=int, default=16)
+    parser.add_argument('--anos', type=int, nargs='+', default=[2018, 2019])
+    args = parser.parse_args()
+
+    contexto = get_context('spawn')
+    print(f"{args.estacoes} estações sintéticas, anos {args.anos}\n")
+    print(f"{'modo':<8} {'linhas':>10} {'colunas':>8} {'memória (MB)':>13} {'disco (MB)':>11} {'pico RSS (MB)':>14}")
+    print("-" * 69)
+    resultados = {}
+    for modo in ('antes', 'depois'):
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            r = executor.submit(executar_caso, modo, args.estacoes, args.anos).result()
+        resultados[modo] = r
+        print(f"{r['modo']:<8} {r['linhas']:>10} {r['colunas']:>8} {r['memoria_mb']:>13.1f} "
+              f"{r['disco_mb']:>11.1f} {r['pico_rss_mb']:>14.0f}")
+
+    antes, depois = resultados['antes'], resultados['depois']
+    print(f"\nMemória: {antes['memoria_mb'] / depois['memoria_mb']:.1f}x menor | "
+          f"disco: {antes['disco_mb'] / depois['disco_mb']:.1f}x menor | "
+          f"pico RSS: {antes['pico_rss_mb'] / depois['pico_rss_mb']:.1f}x menor")
+
+
+if __name__ == '__main__':
+    main()
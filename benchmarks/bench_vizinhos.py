@@ -0,0 +1,115 @@
+"""
+Benchmark das features de estações vizinhas (solar_ia/vizinhos.py).
+
+Com centenas de estações sintéticas (solar_ia/sintetico.py), mede:
+
+- o índice: BallTree (haversine) contra a matriz de distâncias completa
+  (O(n²)), conferindo que os vizinhos são os mesmos;
+- as features: leitura indexada na grade estação × hora
+  (adicionar_features_vizinhos) contra um merge do pandas por vizinho e por
+  lag, conferindo que as colunas geradas são as mesmas.
+
+A NSRDB sintética perde uma fração das linhas ao acaso (--lacunas), para que
+as horas sem registro dos vizinhos também sejam conferidas.
+
+    python -m benchmarks.bench_vizinhos --estacoes 300 --anos 2022
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.memoria import memoria_df_mb
+from solar_ia.sintetico import estacoes_sinteticas, gerar_nsrdb
+from solar_ia.vizinhos import (
+    ESPECIFICACAO_VIZINHOS, RAIO_TERRA_KM, IndiceVizinhos, adicionar_features_vizinhos, colunas_vizinhos,
+    nome_vizinho,
+)
+
+
+def vizinhos_forca_bruta(tabela_estacoes, estacoes, k):
+    """Os k vizinhos de cada estação pela matriz completa de distâncias (haversine)."""
+    latitude = np.radians(tabela_estacoes.loc[estacoes, 'latitude'].to_numpy())
+    longitude = np.radians(tabela_estacoes.loc[estacoes, 'longitude'].to_numpy())
+    seno_dlat = np.sin((latitude[:, None] - latitude[None, :]) / 2)
+    seno_dlon = np.sin((longitude[:, None] - longitude[None, :]) / 2)
+    a = seno_dlat ** 2 + np.cos(latitude[:, None]) * np.cos(latitude[None, :]) * seno_dlon ** 2
+    distancias = 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(a))
+    np.fill_diagonal(distancias, np.inf)
+    return np.argsort(distancias, axis=1, kind='stable')[:, :k]
+
+
+def features_com_merge(df, df_fonte, indice, especificacao=ESPECIFICACAO_VIZINHOS):
+    """O mesmo cálculo com junções do pandas: um merge por vizinho e por lag."""
+    base = pd.DataFrame({'timestamp': df.index, 'codigo_estacao': df['codigo_estacao'].astype(str).to_numpy()})
+    fonte = df_fonte.reset_index()
+    fonte['codigo_estacao'] = fonte['codigo_estacao'].astype(str)
+    codigos = np.asarray(indice.estacoes)
+    posicoes = indice.posicoes(base['codigo_estacao'])
+
+    novas_colunas = {}
+    for ordem in range(especificacao['k']):
+        base['vizinho'] = codigos[indice.vizinhos[posicoes, ordem]]
+        for coluna, lags in especificacao['lags'].items():
+            for lag in lags:
+                defasada = fonte[['codigo_estacao', 'timestamp', coluna]].rename(
+                    columns={'codigo_estacao': 'vizinho', coluna: 'valor'})
+                defasada['timestamp'] = defasada['timestamp'] + pd.Timedelta(hours=lag)
+                juncao = base.merge(defasada, on=['vizinho', 'timestamp'], how='left')
+                novas_colunas[nome_vizinho(coluna, ordem + 1, lag)] = juncao['valor'].to_numpy(dtype=np.float64)
+    for nome in colunas_vizinhos(especificacao):
+        df[nome] = novas_colunas[nome]
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estacoes', type=int, default=300)
+    parser.add_argument('--anos', type=int, nargs='+', default=[2022])
+    parser.add_argument('--lacunas', type=float, default=0.02, help="Fração das linhas da NSRDB removidas ao acaso.")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    tabela_estacoes = estacoes_sinteticas(args.estacoes)
+    df_nsrdb = gerar_nsrdb(args.estacoes, args.anos)
+    rng = np.random.default_rng(0)
+    df_nsrdb = df_nsrdb.loc[rng.random(len(df_nsrdb)) >= args.lacunas]
+    base = df_nsrdb[['codigo_estacao']].copy()
+    print(f"NSRDB sintética: {len(df_nsrdb)} linhas, {args.estacoes} estações, anos {args.anos} "
+          f"({args.lacunas:.0%} de lacunas)\n")
+
+    k = ESPECIFICACAO_VIZINHOS['k']
+    inicio = time.perf_counter()
+    indice = IndiceVizinhos(tabela_estacoes, k=k)
+    tempo_arvore = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    forca_bruta = vizinhos_forca_bruta(tabela_estacoes, indice.estacoes, k)
+    tempo_forca_bruta = time.perf_counter() - inicio
+    print(f"Índice (BallTree)       {tempo_arvore:.4f} s")
+    print(f"Índice (força bruta)    {tempo_forca_bruta:.4f} s")
+    print(f"Mesmos vizinhos: {bool((forca_bruta == indice.vizinhos).all())} | distância média ao vizinho 1: "
+          f"{indice.distancias_km[:, 0].mean():.1f} km\n")
+
+    tempos = {}
+    resultados = {}
+    for nome, funcao in (('merge', features_com_merge), ('grade', adicionar_features_vizinhos)):
+        melhor = float('inf')
+        for _ in range(args.repeticoes):
+            df = base.copy()
+            inicio = time.perf_counter()
+            df = funcao(df, df_nsrdb, indice)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[nome] = melhor
+        resultados[nome] = df[colunas_vizinhos()]
+        print(f"{nome:<15} {melhor:.3f} s (melhor de {args.repeticoes})")
+
+    print(f"\nAceleração: {tempos['merge'] / tempos['grade']:.1f}x")
+    merge, grade = resultados['merge'].to_numpy(), resultados['grade'].to_numpy(dtype=np.float64)
+    print(f"Mesmas posições de NaN: {bool((np.isnan(merge) == np.isnan(grade)).all())}")
+    print(f"Maior diferença absoluta: {np.nanmax(np.abs(merge - grade)):.1e}")
+    print(f"Colunas geradas: {len(colunas_vizinhos())} ({memoria_df_mb(resultados['grade']):.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+XGBoost para GHI e DNI: dois modelos x uma matriz compartilhada x árvores
+multi-saída (ESTRATEGIAS_XGB em solar_ia/modelos.py).
+
+Cada estratégia roda num processo novo, com os mesmos dados e hiperparâmetros,
+e reporta tempo de treino e de previsão, pico de RSS (e o acréscimo sobre o
+RSS com os dados já carregados) e MAE/RMSE na validação de 2023.
+
+    python -m benchmarks.bench_xgb_multi --arvores 300
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from solar_ia.dataset import CAMINHO_DATAFRAME, TARGETS, carregar_xy
+from solar_ia.memoria import pico_rss_mb
+from solar_ia.modelos import ESTRATEGIAS_XGB, criar_modelo_xgb
+
+
+def executar_caso(estrategia, arvores, caminho):
+    X_train, y_train = carregar_xy(caminho, 'treino')
+    X_val, y_val = carregar_xy(caminho, 'validacao')
+    rss_dados = pico_rss_mb()
+
+    modelo = criar_modelo_xgb(estrategia, n_estimators=arvores, learning_rate=0.05, n_jobs=-1,
+                              random_state=42, early_stopping_rounds=50)
+    inicio = time.perf_counter()
+    modelo.fit(X_train, y_train[TARGETS], eval_set=[(X_val, y_val[TARGETS])], verbose=False)
+    tempo_treino = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    previsoes = modelo.predict(X_val)
+    tempo_previsao = time.perf_counter() - inicio
+
+    erro = previsoes - y_val[TARGETS].to_numpy()
+    pico = pico_rss_mb()
+    return {
+        'estrategia': estrategia,
+        'treino_s': tempo_treino,
+        'previsao_s': tempo_previsao,
+        'pico_rss_mb': pico,
+        'acrescimo_rss_mb': pico - rss_dados,
+        'mae': np.abs(erro).mean(axis=0),
+        'rmse': np.sqrt((erro ** 2).mean(axis=0)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--estrategias', nargs='+', choices=list(ESTRATEGIAS_XGB), default=list(ESTRATEGIAS_XGB))
+    parser.add_argument('--arvores', type=int, default=300)
+    parser.add_argument('--dataset', default=CAMINHO_DATAFRAME)
+    args = parser.parse_args()
+
+    contexto = get_context('spawn')
+    print(f"{'estratégia':<13} {'treino (s)':>10} {'previsão (s)':>12} {'pico RSS (MB)':>14} {'Δ RSS (MB)':>11} "
+          f"{'MAE ghi':>8} {'RMSE ghi':>9} {'MAE dni':>8} {'RMSE dni':>9}")
+    print("-" * 102)
+    for estrategia in args.estrategias:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            r = executor.submit(executar_caso, estrategia, args.arvores, args.dataset).result()
+        print(f"{r['estrategia']:<13} {r['treino_s']:>10.2f} {r['previsao_s']:>12.3f} {r['pico_rss_mb']:>14.0f} "
+              f"{r['acrescimo_rss_mb']:>11.0f} {r['mae'][0]:>8.2f} {r['rmse'][0]:>9.2f} "
+              f"{r['mae'][1]:>8.2f} {r['rmse'][1]:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
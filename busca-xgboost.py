@@ -0,0 +1,56 @@
+from solar_ia.busca import buscar_hiperparametros, gravar_matrizes, melhores_parametros
+from solar_ia.dataset import CAMINHO_DATAFRAME, TARGETS, carregar_xy
+
+# --- 1. CONFIGURAÇÃO ---
+
+# Número total de tentativas da busca aleatória (o espaço de busca está em
+# solar_ia/busca.py). Uma busca interrompida continua de onde parou: as
+# tentativas já gravadas em CAMINHO_REGISTRO não são repetidas.
+N_TENTATIVAS = 40
+SEMENTE = 42
+CAMINHO_REGISTRO = 'training/busca_xgb.jsonl'
+
+# Processos em paralelo e threads de cada um (None = metade dos núcleos em
+# processos, e os núcleos divididos igualmente entre eles)
+MAX_PROCESSOS = None
+THREADS_POR_PROCESSO = None
+
+# Limite de rodadas de cada tentativa e paciência do early stopping
+MAX_RODADAS = 1000
+RODADAS_SEM_MELHORA = 50
+
+# Mesmo recorte do train-xgboost.py: treino só com as linhas de dia
+SOMENTE_DIA = True
+
+# Onde as matrizes de treino/validação são gravadas para serem lidas por memmap
+PASTA_MATRIZES = 'data/cache/busca_xgb'
+
+# --- 2. BUSCA ---
+
+if __name__ == '__main__':
+    print("Carregando os conjuntos de treino e validação...")
+    try:
+        X_train, y_train = carregar_xy(CAMINHO_DATAFRAME, 'treino', somente_dia=SOMENTE_DIA)
+        X_val, y_val = carregar_xy(CAMINHO_DATAFRAME, 'validacao', somente_dia=SOMENTE_DIA)
+    except FileNotFoundError:
+        print("ERRO: Dataset final não encontrado. Execute o script 'dataframe.py' primeiro.")
+        exit(1)
+
+    gravar_matrizes(PASTA_MATRIZES, X_train, y_train[TARGETS], X_val, y_val[TARGETS])
+    del X_train, y_train, X_val, y_val
+
+    registro = buscar_hiperparametros(
+        PASTA_MATRIZES, CAMINHO_REGISTRO, N_TENTATIVAS, semente=SEMENTE,
+        max_processos=MAX_PROCESSOS, threads_por_processo=THREADS_POR_PROCESSO,
+        max_rodadas=MAX_RODADAS, rodadas_sem_melhora=RODADAS_SEM_MELHORA,
+    )
+
+    completas = sorted((r for r in registro if r['situacao'] == 'completa'), key=lambda r: r['rmse_validacao'])
+    podadas = sum(r['situacao'] == 'podada' for r in registro)
+    print(f"\n{len(completas)} tentativa(s) completa(s), {podadas} podada(s). Melhores:")
+    for r in completas[:10]:
+        parametros = ', '.join(f"{nome}={valor:.4g}" for nome, valor in r['parametros'].items())
+        print(f"  - #{r['id']:>3} rmse={r['rmse_validacao']:.2f} rodadas={r['melhor_rodada']:>4} | {parametros}")
+
+    print(f"\nMelhores hiperparâmetros (use USAR_MELHOR_BUSCA no train-xgboost.py): "
+          f"{melhores_parametros(CAMINHO_REGISTRO)}")
@@ -0,0 +1,26 @@
+import os
+
+import joblib
+
+from solar_ia.exportacao import exportar_modelo
+from solar_ia.memoria import tamanho_em_disco_mb
+
+# --- 1. CONFIGURAÇÃO ---
+
+# Modelos treinados (joblib) e a pasta de cada versão exportada. O formato
+# exportado (nós das árvores em arrays .npy + modelo.json) é aberto por memmap
+# e previsto só com NumPy: carregar_exportado em solar_ia/exportacao.py.
+MODELOS = {
+    'training/random_forest_model.joblib': 'training/exportado/random_forest',
+    'training/xgb_model.joblib': 'training/exportado/xgb',
+}
+
+# --- 2. EXPORTAÇÃO ---
+
+for caminho_joblib, pasta in MODELOS.items():
+    if not os.path.exists(caminho_joblib):
+        print(f"AVISO: '{caminho_joblib}' não encontrado; pulando.")
+        continue
+    print(f"Exportando '{caminho_joblib}' para '{pasta}'...")
+    exportar_modelo(joblib.load(caminho_joblib), pasta)
+    print(f"  {tamanho_em_disco_mb(caminho_joblib):.1f} MB (joblib) -> {tamanho_em_disco_mb(pasta):.1f} MB (exportado)")
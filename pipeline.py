@@ -0,0 +1,36 @@
+from solar_ia.pipeline import ESTAGIOS, executar_pipeline, imprimir_plano, planejar
+
+# --- 1. CONFIGURAÇÃO ---
+#
+# Roda df-inmet.py -> df-nsrdb.py -> dataframe.py -> treinos -> plot-predict.py
+# na ordem certa, pulando os estágios cujas entradas, código e parâmetros não
+# mudaram desde a última execução (os estágios e o que cada um declara estão
+# em solar_ia/pipeline.py). A saída de cada script vai para data/pipeline/logs.
+
+# Só mostra o plano (o que vai rodar e por quê), sem executar nada
+SOMENTE_PLANO = False
+
+# Estágios a atualizar (ex.: ['train-random-forest']); os de que eles dependem
+# entram junto. None usa todos.
+ALVOS = None
+
+# Estágios que rodam mesmo sem nenhuma mudança (ex.: ['train-xgboost'])
+FORCAR = []
+
+# Estágios independentes rodando ao mesmo tempo (as duas leituras, os dois treinos)
+MAX_PARALELOS = 2
+
+# --- 2. PLANO E EXECUÇÃO ---
+
+if __name__ == '__main__':
+    plano = planejar(ESTAGIOS, alvos=ALVOS, forcar=FORCAR)
+    print("Plano do pipeline:\n")
+    imprimir_plano(plano)
+    if SOMENTE_PLANO:
+        exit()
+
+    print()
+    situacao = executar_pipeline(ESTAGIOS, alvos=ALVOS, forcar=FORCAR, max_paralelos=MAX_PARALELOS)
+    print("\nResumo: " + ", ".join(f"{nome}={valor}" for nome, valor in situacao.items()))
+    if any(valor in ('falhou', 'cancelado') for valor in situacao.values()):
+        exit(1)
@@ -1,18 +1,20 @@
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
-import joblib
 import numpy as np
 
+from solar_ia.cache_previsoes import CachePrevisoes
+from solar_ia.dataset import CAMINHO_DATAFRAME, carregar_xy, intervalo_divisao
+from solar_ia.matrizes import CAMINHO_CACHE_MATRIZES, CacheMatrizes
+from solar_ia.rastreio import etapa, iniciar_rastreio
+
 # --- 1. CONFIGURAÇÃO ---
 print("Iniciando o script de visualização de previsões...")
 
 # Caminhos para os modelos e dados
 RF_MODEL_PATH = 'training/random_forest_model.joblib'
-XGB_GHI_MODEL_PATH = 'training/xgb_model_ghi.joblib'
-XGB_DNI_MODEL_PATH = 'training/xgb_model_dni.joblib'
-
-X_VAL_PATH = 'data/X_val.parquet'
-Y_VAL_PATH = 'data/y_val.parquet'
+XGB_MODEL_PATH = 'training/xgb_model.joblib'
 
 # <<<-- Escolha um período para visualizar -->>>
 # Um período de 3 a 5 dias é ideal para ver os detalhes.
@@ -20,63 +22,101 @@ Y_VAL_PATH = 'data/y_val.parquet'
 START_DATE = '2023-05-06'
 END_DATE = '2023-05-07'
 
+# Estações a plotar (ex.: ['A304']); None usa todas.
+ESTACOES = None
+
+# Onde o gráfico também é salvo (é a saída desta etapa no pipeline.py)
+CAMINHO_GRAFICO = 'training/previsoes.png'
+
+# X/y da validação em .npy abertos por memmap (solar_ia/matrizes.py): trocar o
+# período só fatia as matrizes já gravadas. None lê o período direto do Parquet.
+PASTA_MATRIZES = CAMINHO_CACHE_MATRIZES
+
+# Rastreio das etapas (solar_ia/rastreio.py): uma pasta para gravar os spans
+# (JSONL e Chrome trace) e o nome de uma etapa para capturar com cProfile e
+# tracemalloc. None usa as variáveis SOLAR_IA_RASTREIO / SOLAR_IA_PERFIL.
+PASTA_RASTREIO = None
+ETAPA_PERFIL = None
+
+iniciar_rastreio('plot-predict', PASTA_RASTREIO, ETAPA_PERFIL)
+
 # --- 2. CARREGAR DADOS E MODELOS ---
 print("Carregando dados e modelos...")
 try:
-    X_val = pd.read_parquet(X_VAL_PATH)
-    y_val = pd.read_parquet(Y_VAL_PATH)
-    
-    rf_model = joblib.load(RF_MODEL_PATH)
-    xgb_model_ghi = joblib.load(XGB_GHI_MODEL_PATH)
-    xgb_model_dni = joblib.load(XGB_DNI_MODEL_PATH)
+    # Só as estações e os dias do período escolhido (END_DATE incluso)
+    fim_periodo = pd.Timestamp(END_DATE) + pd.Timedelta(days=1)
+    with etapa('carregamento') as span:
+        if PASTA_MATRIZES is None:
+            X_val, y_val = carregar_xy(CAMINHO_DATAFRAME, 'validacao', estacoes=ESTACOES,
+                                       inicio=START_DATE, fim=fim_periodo)
+        else:
+            X_val, y_val = CacheMatrizes(PASTA_MATRIZES).abrir(CAMINHO_DATAFRAME, 'validacao', estacoes=ESTACOES,
+                                                               inicio=START_DATE, fim=fim_periodo)
+        span.linhas_saida = len(X_val)
+
+    for caminho in (RF_MODEL_PATH, XGB_MODEL_PATH):
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(2, 'Modelo não encontrado', caminho)
     print("Carregamento concluído.")
 except FileNotFoundError as e:
     print(f"ERRO: Arquivo não encontrado: {e.filename}")
     print("Certifique-se de que os modelos foram treinados e salvos, e que os dados de validação existem.")
-    exit()
+    exit(1)
 
 # --- 3. GERAR PREVISÕES ---
-print("Gerando previsões com os modelos carregados...")
-# Previsões do RandomForest (multi-output)
-pred_rf_raw = rf_model.predict(X_val)
-pred_rf = pd.DataFrame(pred_rf_raw, index=y_val.index, columns=y_val.columns)
-
-# Previsões do XGBoost (single-output)
-pred_xgb_ghi = xgb_model_ghi.predict(X_val)
-pred_xgb_dni = xgb_model_dni.predict(X_val)
-pred_xgb = pd.DataFrame({'ghi': pred_xgb_ghi, 'dni': pred_xgb_dni}, index=y_val.index)
-
-# --- 4. FILTRAR PERÍODO E PLOTAR ---
-print(f"Filtrando dados para o período de {START_DATE} a {END_DATE}...")
-y_val_period = y_val.loc[START_DATE:END_DATE]
-pred_rf_period = pred_rf.loc[START_DATE:END_DATE]
-pred_xgb_period = pred_xgb.loc[START_DATE:END_DATE]
+# As previsões vêm do cache (solar_ia/cache_previsoes.py): cada partição
+# (estação, ano) é prevista uma vez por versão do modelo e reaproveitada ao
+# trocar START_DATE/END_DATE; os modelos só são carregados se faltar alguma.
+# Modelos treinados com SOMENTE_DIA (ModeloDiurno) devolvem 0 nas horas de noite.
+print(f"Gerando previsões com os modelos salvos ({len(X_val)} registros de {START_DATE} a {END_DATE})...")
+with etapa('previsao', linhas_entrada=len(X_val)) as span:
+    cache = CachePrevisoes()
+    inicio_val, fim_val = intervalo_divisao('validacao', START_DATE, fim_periodo)
+
+    # Previsões do RandomForest (multi-output)
+    pred_rf_raw = cache.prever(RF_MODEL_PATH, CAMINHO_DATAFRAME, estacoes=ESTACOES, inicio=inicio_val, fim=fim_val)
+    pred_rf = pd.DataFrame(pred_rf_raw[y_val.columns].to_numpy(), index=y_val.index, columns=y_val.columns)
+
+    # Previsões do XGBoost (um único modelo para GHI e DNI)
+    pred_xgb_raw = cache.prever(XGB_MODEL_PATH, CAMINHO_DATAFRAME, estacoes=ESTACOES, inicio=inicio_val, fim=fim_val)
+    pred_xgb = pd.DataFrame(pred_xgb_raw[y_val.columns].to_numpy(), index=y_val.index, columns=y_val.columns)
+    span.linhas_saida = len(pred_rf) + len(pred_xgb)
+print(f"Cache de previsões: {cache.acertos} partição(ões) reaproveitada(s), {cache.recalculadas} prevista(s).")
+
+# --- 4. PLOTAR ---
+# Os dados já foram lidos apenas para o período escolhido
+y_val_period = y_val
+pred_rf_period = pred_rf
+pred_xgb_period = pred_xgb
 
 print("Gerando gráficos...")
-# Configura o estilo do gráfico
-plt.style.use('seaborn-v0_8-whitegrid')
-fig, axs = plt.subplots(nrows=2, ncols=1, figsize=(15, 10), sharex=True)
-
-# --- Gráfico para GHI ---
-axs[0].plot(y_val_period.index, y_val_period['ghi'], label='Valor Real', color='black', linewidth=2)
-axs[0].plot(pred_rf_period.index, pred_rf_period['ghi'], label='RandomForest', color='blue', linestyle='--')
-axs[0].plot(pred_xgb_period.index, pred_xgb_period['ghi'], label='XGBoost', color='red', linestyle=':')
-axs[0].set_ylabel('GHI (W/m²)')
-axs[0].set_title('Comparação de Previsões para GHI')
-axs[0].legend()
-axs[0].grid(True)
-
-# --- Gráfico para DNI ---
-axs[1].plot(y_val_period.index, y_val_period['dni'], label='Valor Real', color='black', linewidth=2)
-axs[1].plot(pred_rf_period.index, pred_rf_period['dni'], label='RandomForest', color='blue', linestyle='--')
-axs[1].plot(pred_xgb_period.index, pred_xgb_period['dni'], label='XGBoost', color='red', linestyle=':')
-axs[1].set_xlabel('Data e Hora')
-axs[1].set_ylabel('DNI (W/m²)')
-axs[1].set_title('Comparação de Previsões para DNI')
-axs[1].legend()
-axs[1].grid(True)
-
-# Melhora a formatação das datas no eixo X
-fig.autofmt_xdate()
-plt.tight_layout()
+with etapa('graficos', linhas_entrada=len(y_val_period)):
+    # Configura o estilo do gráfico
+    plt.style.use('seaborn-v0_8-whitegrid')
+    fig, axs = plt.subplots(nrows=2, ncols=1, figsize=(15, 10), sharex=True)
+
+    # --- Gráfico para GHI ---
+    axs[0].plot(y_val_period.index, y_val_period['ghi'], label='Valor Real', color='black', linewidth=2)
+    axs[0].plot(pred_rf_period.index, pred_rf_period['ghi'], label='RandomForest', color='blue', linestyle='--')
+    axs[0].plot(pred_xgb_period.index, pred_xgb_period['ghi'], label='XGBoost', color='red', linestyle=':')
+    axs[0].set_ylabel('GHI (W/m²)')
+    axs[0].set_title('Comparação de Previsões para GHI')
+    axs[0].legend()
+    axs[0].grid(True)
+
+    # --- Gráfico para DNI ---
+    axs[1].plot(y_val_period.index, y_val_period['dni'], label='Valor Real', color='black', linewidth=2)
+    axs[1].plot(pred_rf_period.index, pred_rf_period['dni'], label='RandomForest', color='blue', linestyle='--')
+    axs[1].plot(pred_xgb_period.index, pred_xgb_period['dni'], label='XGBoost', color='red', linestyle=':')
+    axs[1].set_xlabel('Data e Hora')
+    axs[1].set_ylabel('DNI (W/m²)')
+    axs[1].set_title('Comparação de Previsões para DNI')
+    axs[1].legend()
+    axs[1].grid(True)
+
+    # Melhora a formatação das datas no eixo X
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    fig.savefig(CAMINHO_GRAFICO, dpi=120)
+print(f"Gráfico salvo em '{CAMINHO_GRAFICO}'")
 plt.show()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import os
+
+from solar_ia.dataset import CAMINHO_ESTACOES
+from solar_ia.estacoes import carregar_tabela_estacoes
+from solar_ia.exportacao import carregar_modelo
+from solar_ia.servidor import criar_servidor
+
+# --- 1. CONFIGURAÇÃO ---
+
+HOST = '127.0.0.1'
+PORTA = 8050
+
+# Modelos servidos em POST /prever/<nome>; os que não existirem são ignorados.
+# Uma pasta (exportar-modelos.py) é aberta com o previsor NumPy, sem unpickle.
+MODELOS = {
+    'rf': 'training/random_forest_model.joblib',
+    'xgb': 'training/xgb_model.joblib',
+}
+
+# Micro-lotes: pedidos simultâneos viram um único predict com até
+# MAX_LINHAS_LOTE linhas, esperando no máximo ESPERA_LOTE_MS por companhia
+MAX_LINHAS_LOTE = 4096
+ESPERA_LOTE_MS = 2.0
+
+# --- 2. CARREGAMENTO DOS MODELOS (UMA VEZ) ---
+
+if __name__ == '__main__':
+    modelos = {}
+    for nome, caminho in MODELOS.items():
+        if os.path.exists(caminho):
+            print(f"Carregando '{nome}' de '{caminho}'...")
+            modelos[nome] = carregar_modelo(caminho)
+        else:
+            print(f"AVISO: '{caminho}' não encontrado; modelo '{nome}' não será servido.")
+    if not modelos:
+        print("ERRO: Nenhum modelo encontrado. Execute 'train-random-forest.py' ou 'train-xgboost.py' primeiro.")
+        exit(1)
+
+    tabela_estacoes = carregar_tabela_estacoes(CAMINHO_ESTACOES) if os.path.exists(CAMINHO_ESTACOES) else None
+
+    # --- 3. SERVIDOR ---
+
+    servidor = criar_servidor(modelos, HOST, PORTA, tabela_estacoes=tabela_estacoes,
+                              max_linhas=MAX_LINHAS_LOTE, espera_ms=ESPERA_LOTE_MS)
+    print(f"Servindo {list(modelos)} em http://{HOST}:{PORTA}")
+    print("  POST /prever/<modelo> {\"linhas\": [{...}, ...]}  |  GET /metricas  |  GET /saude")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando o servidor.")
+        servidor.server_close()
@@ -0,0 +1,6 @@
+"""
+Módulos reutilizáveis do pipeline solar-ia.
+
+Os scripts da raiz (df-inmet.py, df-nsrdb.py, dataframe.py, ...) continuam
+sendo os pontos de entrada; este pacote concentra a lógica que eles compartilham.
+"""
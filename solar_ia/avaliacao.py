@@ -0,0 +1,219 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.busca import limitar_threads
+from solar_ia.dataset import (
+    CAMINHO_DATAFRAME, DIVISOES, TARGETS, carregar_dataset, carregar_xy, colunas_dataset, intervalo_divisao,
+)
+from solar_ia.features import nome_lag
+from solar_ia.matrizes import CacheMatrizes
+from solar_ia.modelos import ModeloDiurno
+from solar_ia.solar import ZENITE_NOITE
+
+# --- 1. REFERÊNCIAS E QUEBRAS ---
+
+# Previsões de referência para o skill (1 - RMSE do modelo / RMSE da referência):
+# persistência de 24 horas (o lag de 24h do próprio alvo, na grade estação × hora)
+# e o céu limpo de solar_ia/solar.py
+REFERENCIAS = {
+    'persistencia': lambda alvo: nome_lag(alvo, 24),
+    'ceu_limpo': lambda alvo: f'{alvo}_ceu_limpo',
+}
+
+# Quebras das métricas: nome -> função do quadro de avaliação para a chave de cada linha
+AGRUPAMENTOS = {
+    'estacao': lambda quadro: quadro['codigo_estacao'].astype(str).to_numpy(),
+    'mes': lambda quadro: quadro.index.month.values,
+    'hora': lambda quadro: quadro.index.hour.values,
+    'tipo_nuvem': lambda quadro: quadro['tipo_nuvem_nsrdb'].to_numpy(),
+}
+
+METRICAS = ['n', 'mae', 'rmse', 'mbe'] + [f'skill_{nome}' for nome in REFERENCIAS]
+
+
+def colunas_avaliacao(caminho=CAMINHO_DATAFRAME):
+    """Colunas que a avaliação lê do dataset final: alvos, zênite, tipo de nuvem e referências."""
+    necessarias = TARGETS + ['zenite_solar', 'tipo_nuvem_nsrdb']
+    necessarias += [referencia(alvo) for referencia in REFERENCIAS.values() for alvo in TARGETS]
+    disponiveis = set(colunas_dataset(caminho))
+    return [coluna for coluna in necessarias if coluna in disponiveis]
+
+
+def carregar_quadro_avaliacao(caminho=CAMINHO_DATAFRAME, divisao=None, estacoes=None, inicio=None, fim=None):
+    """
+    Alvos e colunas de contexto da avaliação, com as mesmas linhas e a mesma
+    ordem de carregar_xy para os mesmos filtros (as previsões se alinham por posição).
+    """
+    inicio, fim = intervalo_divisao(divisao, inicio, fim)
+    return carregar_dataset(caminho, estacoes=estacoes, inicio=inicio, fim=fim, colunas=colunas_avaliacao(caminho))
+
+
+# --- 2. MÉTRICAS EM UMA PASSADA ---
+#
+# Todas as métricas saem de somas: para cada linha calculam-se o erro, o erro
+# absoluto, o quadrado do erro e o quadrado do erro de cada referência (e as
+# mesmas somas só com as linhas de dia). Um único groupby soma tudo na chave
+# mais fina (estação, mês, hora, tipo de nuvem); cada quebra (e o geral) é só a
+# soma dessa tabela pequena, e as métricas saem das somas no fim.
+
+def _somas_por_linha(quadro, previsoes):
+    dia = (quadro['zenite_solar'].to_numpy() < ZENITE_NOITE).astype(np.float64)
+    colunas = {'n': np.ones(len(quadro)), 'n_dia': dia}
+    for i, alvo in enumerate(TARGETS):
+        observado = quadro[alvo].to_numpy(dtype=np.float64)
+        erro = previsoes[:, i] - observado
+        termos = {'erro': erro, 'abs': np.abs(erro), 'quad': erro * erro}
+        for nome, referencia in REFERENCIAS.items():
+            if referencia(alvo) in quadro.columns:
+                erro_referencia = quadro[referencia(alvo)].to_numpy(dtype=np.float64) - observado
+                termos[f'quad_{nome}'] = erro_referencia * erro_referencia
+        for termo, valores in termos.items():
+            colunas[f'{alvo}|{termo}'] = valores
+            colunas[f'{alvo}|{termo}_dia'] = valores * dia
+    return pd.DataFrame(colunas, index=quadro.index)
+
+
+def _metricas(somas):
+    """DataFrame de métricas (colunas (alvo, métrica)) a partir das somas agrupadas."""
+    resultado = {}
+    for sufixo, n in (('', somas['n']), ('_dia', somas['n_dia'])):
+        n_valido = n.where(n > 0)
+        for alvo in TARGETS:
+            resultado[(alvo, 'n' + sufixo)] = n
+            resultado[(alvo, 'mae' + sufixo)] = somas[f'{alvo}|abs{sufixo}'] / n_valido
+            resultado[(alvo, 'rmse' + sufixo)] = np.sqrt(somas[f'{alvo}|quad{sufixo}'] / n_valido)
+            resultado[(alvo, 'mbe' + sufixo)] = somas[f'{alvo}|erro{sufixo}'] / n_valido
+            for nome in REFERENCIAS:
+                coluna = f'{alvo}|quad_{nome}{sufixo}'
+                if coluna in somas:
+                    referencia = somas[coluna].where(somas[coluna] > 0)
+                    resultado[(alvo, f'skill_{nome}{sufixo}')] = 1 - np.sqrt(somas[f'{alvo}|quad{sufixo}'] / referencia)
+    metricas = pd.DataFrame(resultado)
+    return metricas[sorted(metricas.columns, key=lambda coluna: TARGETS.index(coluna[0]))]
+
+
+def avaliar(quadro, previsoes, agrupamentos=AGRUPAMENTOS):
+    """
+    Métricas (n, MAE, RMSE, MBE e skill sobre cada referência, em todas as
+    linhas e só de dia) das 'previsoes' (n x len(TARGETS), na ordem do
+    'quadro' de carregar_quadro_avaliacao). Devolve {'geral': ..., quebra: ...},
+    cada um um DataFrame com colunas (alvo, métrica); '_dia' no nome da
+    métrica indica as linhas com o Sol acima do horizonte.
+    """
+    previsoes = np.asarray(previsoes, dtype=np.float64)
+    if previsoes.ndim == 1:
+        previsoes = previsoes[:, None]
+    if len(previsoes) != len(quadro):
+        raise ValueError(f"{len(previsoes)} previsões para {len(quadro)} linhas do quadro de avaliação.")
+
+    somas = _somas_por_linha(quadro, previsoes)
+    chaves = {nome: chave(quadro) for nome, chave in agrupamentos.items()}
+    finas = somas.groupby([pd.Series(valores, name=nome, index=somas.index) for nome, valores in chaves.items()],
+                          sort=False).sum() if chaves else somas.sum().to_frame().T
+
+    resultado = {'geral': _metricas(finas.sum().to_frame('geral').T)}
+    for nome in agrupamentos:
+        resultado[nome] = _metricas(finas.groupby(level=nome).sum().sort_index())
+    return resultado
+
+
+def imprimir_avaliacao(resultado, titulo, quebras=()):
+    """Imprime o resumo geral por alvo e, para cada nome em 'quebras', a tabela de MAE/RMSE/MBE."""
+    geral = resultado['geral'].iloc[0]
+    print("\n" + "=" * 60)
+    print(f"      {titulo}")
+    print("=" * 60)
+    for alvo in TARGETS:
+        print(f"\nTarget: {alvo.upper()}")
+        print(f"  - Erro Médio Absoluto (MAE): {geral[(alvo, 'mae')]:.2f} W/m² "
+              f"(só de dia: {geral[(alvo, 'mae_dia')]:.2f})")
+        print(f"  - Raiz do Erro Quadrático Médio (RMSE): {geral[(alvo, 'rmse')]:.2f} W/m² "
+              f"(só de dia: {geral[(alvo, 'rmse_dia')]:.2f})")
+        print(f"  - Viés (MBE): {geral[(alvo, 'mbe')]:+.2f} W/m²")
+        for nome in REFERENCIAS:
+            if (alvo, f'skill_{nome}') in geral.index:
+                print(f"  - Skill sobre {nome}: {geral[(alvo, f'skill_{nome}')]:.3f} "
+                      f"(só de dia: {geral[(alvo, f'skill_{nome}_dia')]:.3f})")
+    for quebra in quebras:
+        tabela = resultado[quebra][[(alvo, metrica) for alvo in TARGETS for metrica in ('n', 'mae', 'rmse', 'mbe')]]
+        print(f"\nPor {quebra}:")
+        print(tabela.round(2).to_string())
+    print("=" * 60)
+
+
+# --- 3. BACKTEST COM ORIGEM MÓVEL ---
+
+def dobras_backtest(n_dobras=3, fim=DIVISOES['teste'][1]):
+    """
+    Dobras anuais de origem móvel que terminam em 'fim' (o fim da divisão de
+    teste): cada uma treina com tudo antes do ano e testa no ano. Com o padrão
+    e n_dobras=3: testes em 2022, 2023 (validação) e 2024 (teste).
+    """
+    ultimo_ano = pd.Timestamp(fim).year - 1
+    return [(f'{ano}-01-01', f'{ano + 1}-01-01') for ano in range(ultimo_ano - n_dobras + 1, ultimo_ano + 1)]
+
+
+def _carregar_xy_dobra(caminho, estacoes, inicio, fim, somente_dia, pasta_matrizes):
+    if pasta_matrizes is None:
+        return carregar_xy(caminho, None, estacoes, inicio=inicio, fim=fim, somente_dia=somente_dia)
+    return CacheMatrizes(pasta_matrizes).abrir(caminho, None, estacoes, inicio=inicio, fim=fim,
+                                               somente_dia=somente_dia)
+
+
+def executar_dobra(fabrica_modelo, inicio_teste, fim_teste, caminho=CAMINHO_DATAFRAME, estacoes=None,
+                   somente_dia=True, threads=None, pasta_matrizes=None):
+    """
+    Treina com as linhas antes de 'inicio_teste' e avalia em [inicio_teste, fim_teste).
+    Com 'pasta_matrizes', X/y são fatias das matrizes de solar_ia/matrizes.py.
+    """
+    if threads:
+        limitar_threads(threads)
+    X_treino, y_treino = _carregar_xy_dobra(caminho, estacoes, None, inicio_teste, somente_dia, pasta_matrizes)
+    modelo = fabrica_modelo()
+    if somente_dia:
+        modelo = ModeloDiurno(modelo)
+    modelo.fit(X_treino, y_treino[TARGETS])
+    del X_treino, y_treino
+
+    X_teste, _ = _carregar_xy_dobra(caminho, estacoes, inicio_teste, fim_teste, False, pasta_matrizes)
+    quadro = carregar_quadro_avaliacao(caminho, None, estacoes, inicio_teste, fim_teste)
+    return avaliar(quadro, modelo.predict(X_teste))
+
+
+def backtest(fabrica_modelo, dobras=None, caminho=CAMINHO_DATAFRAME, estacoes=None, somente_dia=True,
+             max_processos=None, threads_por_processo=None, pasta_matrizes=None):
+    """
+    Roda as 'dobras' ([(inicio_teste, fim_teste)], padrão dobras_backtest())
+    em paralelo, uma por processo. 'fabrica_modelo' é uma função sem
+    argumentos que devolve um modelo novo (precisa ser picklable: uma função
+    do módulo ou um functools.partial). Devolve {(inicio, fim): avaliação}.
+
+    Com 'pasta_matrizes', as matrizes do dataset inteiro (treino e teste) são
+    gravadas uma vez aqui e todas as dobras abrem fatias delas por memmap,
+    dividindo as mesmas páginas em vez de cada processo ler o Parquet.
+    """
+    dobras = dobras or dobras_backtest()
+    if pasta_matrizes is not None:
+        cache_matrizes = CacheMatrizes(pasta_matrizes)
+        for somente_dia_recorte in {somente_dia, False}:
+            cache_matrizes.preparar(caminho, None, estacoes, somente_dia_recorte)
+    max_processos = max_processos or max(1, min(len(dobras), (os.cpu_count() or 1) // 2))
+    threads_por_processo = threads_por_processo or max(1, (os.cpu_count() or 1) // max_processos)
+
+    with ProcessPoolExecutor(max_workers=max_processos) as executor:
+        futuros = {
+            dobra: executor.submit(executar_dobra, fabrica_modelo, *dobra, caminho=caminho, estacoes=estacoes,
+                                   somente_dia=somente_dia, threads=threads_por_processo,
+                                   pasta_matrizes=pasta_matrizes)
+            for dobra in dobras
+        }
+        return {dobra: futuro.result() for dobra, futuro in futuros.items()}
+
+
+def resumo_backtest(resultados):
+    """Métricas gerais de cada dobra, uma linha por dobra (índice = início do teste)."""
+    linhas = {inicio: avaliacao['geral'].iloc[0] for (inicio, _), avaliacao in resultados.items()}
+    return pd.DataFrame(linhas).T.rename_axis('inicio_teste')
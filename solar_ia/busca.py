@@ -0,0 +1,205 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# --- 1. ESPAÇO DE BUSCA ---
+
+# Cada hiperparâmetro do XGBoost: ('log', min, max), ('uniforme', min, max),
+# ('inteiro', min, max) ou ('escolha', [opções]).
+ESPACO_BUSCA_XGB = {
+    'learning_rate': ('log', 0.01, 0.3),
+    'max_depth': ('inteiro', 3, 10),
+    'min_child_weight': ('log', 1.0, 50.0),
+    'subsample': ('uniforme', 0.5, 1.0),
+    'colsample_bytree': ('uniforme', 0.5, 1.0),
+    'reg_lambda': ('log', 0.1, 20.0),
+    'max_bin': ('escolha', [64, 128, 256]),
+}
+
+# Poda pela mediana: a partir de RODADAS_MINIMAS, a cada INTERVALO_PODA rodadas
+# uma tentativa cujo melhor erro na validação está acima da mediana das
+# tentativas anteriores na mesma rodada é interrompida.
+RODADAS_MINIMAS = 50
+INTERVALO_PODA = 25
+MINIMO_REFERENCIAS = 3
+
+
+def sortear_parametros(semente, id_tentativa, espaco=ESPACO_BUSCA_XGB):
+    """Hiperparâmetros da tentativa 'id_tentativa'; os mesmos sempre que (semente, id) se repetem."""
+    rng = np.random.default_rng([semente, id_tentativa])
+    parametros = {}
+    for nome, (tipo, *limites) in espaco.items():
+        if tipo == 'log':
+            parametros[nome] = float(np.exp(rng.uniform(np.log(limites[0]), np.log(limites[1]))))
+        elif tipo == 'uniforme':
+            parametros[nome] = float(rng.uniform(limites[0], limites[1]))
+        elif tipo == 'inteiro':
+            parametros[nome] = int(rng.integers(limites[0], limites[1] + 1))
+        elif tipo == 'escolha':
+            parametros[nome] = limites[0][int(rng.integers(len(limites[0])))]
+        else:
+            raise ValueError(f"Tipo de hiperparâmetro desconhecido para '{nome}': '{tipo}'")
+    return parametros
+
+
+# --- 2. MATRIZES COMPARTILHADAS (MEMMAP) ---
+#
+# X/y de treino e validação são gravados uma vez como .npy float32 e cada
+# processo os abre com mmap_mode='r': as páginas ficam no cache do sistema
+# operacional e são compartilhadas, em vez de uma cópia dos dados por processo.
+
+NOMES_MATRIZES = ('X_train', 'y_train', 'X_val', 'y_val')
+
+
+def gravar_matrizes(pasta, X_train, y_train, X_val, y_val):
+    """Grava as quatro matrizes como .npy float32 contíguo em 'pasta' e devolve a pasta."""
+    os.makedirs(pasta, exist_ok=True)
+    for nome, matriz in zip(NOMES_MATRIZES, (X_train, y_train, X_val, y_val)):
+        np.save(os.path.join(pasta, f'{nome}.npy'), np.ascontiguousarray(matriz, dtype=np.float32))
+    return pasta
+
+
+def abrir_matrizes(pasta):
+    """Abre as matrizes de gravar_matrizes sem copiá-las (somente leitura)."""
+    return [np.load(os.path.join(pasta, f'{nome}.npy'), mmap_mode='r') for nome in NOMES_MATRIZES]
+
+
+# --- 3. UMA TENTATIVA ---
+
+def limitar_threads(threads):
+    # Cada processo usa só o seu orçamento de threads (nada de n_jobs=-1 em todos)
+    for variavel in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variavel] = str(threads)
+
+
+def _podar_pela_mediana(referencias, rodada, melhor):
+    """True se 'melhor' está acima da mediana das referências que chegaram a 'rodada'."""
+    valores = [curva[rodada] for curva in referencias if rodada in curva]
+    return len(valores) >= MINIMO_REFERENCIAS and melhor > float(np.median(valores))
+
+
+def executar_tentativa(pasta_matrizes, id_tentativa, parametros, threads, max_rodadas,
+                       rodadas_sem_melhora, referencias):
+    """
+    Treina um XGBoost para GHI e DNI (uma matriz quantizada, um alvo por árvore)
+    com early stopping e poda pela mediana. Devolve o registro da tentativa.
+    """
+    import xgboost as xgb
+
+    class _Poda(xgb.callback.TrainingCallback):
+        def __init__(self):
+            self.curva = {}
+            self.podada = False
+            self.melhor = float('inf')
+            self.melhor_rodada = 0
+
+        def after_iteration(self, model, epoch, evals_log):
+            rodada = epoch + 1
+            rmse = float(evals_log['validacao']['rmse'][-1])
+            if rmse < self.melhor:
+                self.melhor, self.melhor_rodada = rmse, rodada
+            if rodada < RODADAS_MINIMAS or rodada % INTERVALO_PODA:
+                return False
+            self.curva[str(rodada)] = self.melhor
+            self.podada = _podar_pela_mediana(referencias, str(rodada), self.melhor)
+            return self.podada
+
+    limitar_threads(threads)
+    X_train, y_train, X_val, y_val = abrir_matrizes(pasta_matrizes)
+    parametros_xgb = {
+        **parametros,
+        'objective': 'reg:squarederror',
+        'eval_metric': 'rmse',
+        'tree_method': 'hist',
+        'multi_strategy': 'one_output_per_tree',
+        'nthread': threads,
+        'seed': 42,
+    }
+
+    inicio = time.perf_counter()
+    dtrain = xgb.QuantileDMatrix(X_train, y_train, max_bin=parametros['max_bin'], nthread=threads)
+    dval = xgb.QuantileDMatrix(X_val, y_val, ref=dtrain, max_bin=parametros['max_bin'], nthread=threads)
+    poda = _Poda()
+    booster = xgb.train(
+        parametros_xgb, dtrain, num_boost_round=max_rodadas,
+        evals=[(dval, 'validacao')], verbose_eval=False,
+        callbacks=[poda, xgb.callback.EarlyStopping(rounds=rodadas_sem_melhora)],
+    )
+
+    return {
+        'id': id_tentativa,
+        'parametros': parametros,
+        'situacao': 'podada' if poda.podada else 'completa',
+        'rodadas': booster.num_boosted_rounds(),
+        'melhor_rodada': poda.melhor_rodada,
+        'rmse_validacao': poda.melhor,
+        'curva': poda.curva,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+# --- 4. REGISTRO (RETOMÁVEL) E BUSCA ---
+
+def ler_registro(caminho):
+    """Tentativas já registradas em 'caminho' (JSON Lines), na ordem em que terminaram."""
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding='utf-8') as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+def _registrar(caminho, registro):
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(json.dumps(registro) + '\n')
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+
+
+def melhores_parametros(caminho):
+    """Hiperparâmetros e número de rodadas da melhor tentativa completa do registro (ou None)."""
+    completas = [r for r in ler_registro(caminho) if r['situacao'] == 'completa']
+    if not completas:
+        return None
+    melhor = min(completas, key=lambda r: r['rmse_validacao'])
+    return {**melhor['parametros'], 'n_estimators': melhor['melhor_rodada']}
+
+
+def buscar_hiperparametros(pasta_matrizes, caminho_registro, n_tentativas, semente=42, max_processos=None,
+                           threads_por_processo=None, max_rodadas=1000, rodadas_sem_melhora=50):
+    """
+    Busca aleatória com poda: roda 'n_tentativas' em paralelo (cada processo com
+    'threads_por_processo' threads) e registra cada uma em 'caminho_registro' ao
+    terminar. Tentativas que já estão no registro (mesma semente) são puladas,
+    então uma busca interrompida continua de onde parou. Devolve o registro.
+    """
+    max_processos = max_processos or max(1, (os.cpu_count() or 1) // 2)
+    threads_por_processo = threads_por_processo or max(1, (os.cpu_count() or 1) // max_processos)
+
+    registro = ler_registro(caminho_registro)
+    feitas = {r['id'] for r in registro if r.get('semente') == semente}
+    pendentes = [i for i in range(n_tentativas) if i not in feitas]
+    print(f"{len(feitas)} tentativa(s) já no registro, {len(pendentes)} a rodar "
+          f"({max_processos} processo(s) x {threads_por_processo} thread(s)).")
+
+    with ProcessPoolExecutor(max_workers=max_processos) as executor:
+        em_andamento = set()
+        while pendentes or em_andamento:
+            while pendentes and len(em_andamento) < max_processos:
+                id_tentativa = pendentes.pop(0)
+                referencias = [r['curva'] for r in registro]
+                em_andamento.add(executor.submit(
+                    executar_tentativa, pasta_matrizes, id_tentativa, sortear_parametros(semente, id_tentativa),
+                    threads_por_processo, max_rodadas, rodadas_sem_melhora, referencias,
+                ))
+            prontas, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontas:
+                resultado = {**futuro.result(), 'semente': semente}
+                registro.append(resultado)
+                _registrar(caminho_registro, resultado)
+                print(f"  - tentativa {resultado['id']:>3}: {resultado['situacao']:<8} "
+                      f"rmse={resultado['rmse_validacao']:.2f} em {resultado['rodadas']} rodadas "
+                      f"({resultado['segundos']:.1f}s)")
+    return registro
@@ -0,0 +1,178 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.dataset import (
+    CAMINHO_DATAFRAME, CAMINHO_ESTACOES, COLUNAS_NAO_FEATURES, TARGETS, adicionar_coordenadas, arquivos_particoes,
+    carregar_dataset, colunas_dataset,
+)
+from solar_ia.estacoes import carregar_tabela_estacoes
+from solar_ia.exportacao import carregar_modelo
+from solar_ia.modelos import nomes_features
+
+# --- 1. LAYOUT DO CACHE ---
+#
+# As previsões de cada modelo são gravadas por partição do dataset final, no
+# mesmo estilo Hive:
+#   <pasta>/<hash do modelo>/codigo_estacao=A304/year=2023/<hash das entradas>.parquet
+#
+# O hash do modelo é o do arquivo (ou da pasta exportada); o das entradas junta
+# os arquivos da partição e a tabela de estações (de onde vêm as coordenadas).
+# Retreinar o modelo ou remontar uma partição muda a chave, e só as partições
+# afetadas são previstas de novo. Acima de LIMITE_CACHE_PREVISOES_MB, os
+# arquivos usados há mais tempo são apagados (LRU pela data de modificação,
+# renovada a cada leitura).
+CAMINHO_CACHE_PREVISOES = 'data/cache/previsoes'
+LIMITE_CACHE_PREVISOES_MB = 1024
+
+# Muda quando o formato das previsões gravadas muda, para invalidar o cache
+VERSAO_CACHE = 1
+
+TAMANHO_HASH = 16
+
+
+@lru_cache(maxsize=4096)
+def _hash_arquivo(caminho, tamanho, modificado_ns):
+    # 'tamanho' e 'modificado_ns' só entram na chave do lru_cache: um arquivo
+    # alterado é lido de novo, um intacto não
+    resumo = hashlib.blake2b(digest_size=TAMANHO_HASH)
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def hash_conteudo(*caminhos):
+    """Hash do conteúdo de arquivos e pastas (todos os arquivos dentro, em ordem)."""
+    resumo = hashlib.blake2b(digest_size=TAMANHO_HASH)
+    resumo.update(str(VERSAO_CACHE).encode())
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos = sorted(os.path.join(raiz, nome) for raiz, _, nomes in os.walk(caminho) for nome in nomes)
+        else:
+            arquivos = [caminho]
+        for arquivo in arquivos:
+            estado = os.stat(arquivo)
+            resumo.update(os.path.relpath(arquivo, caminho).encode())
+            resumo.update(_hash_arquivo(arquivo, estado.st_size, estado.st_mtime_ns).encode())
+    return resumo.hexdigest()
+
+
+# --- 2. CACHE ---
+
+class CachePrevisoes:
+    """
+    Previsões de modelos salvos (joblib ou exportados) sobre o dataset final,
+    calculadas por partição (estação, ano) e guardadas em Parquet. O modelo só
+    é carregado se alguma partição pedida não estiver no cache.
+    """
+
+    def __init__(self, pasta=CAMINHO_CACHE_PREVISOES, limite_mb=LIMITE_CACHE_PREVISOES_MB):
+        self.pasta = pasta
+        self.limite_mb = limite_mb
+        self.acertos = 0
+        self.recalculadas = 0
+
+    def _caminho(self, hash_modelo, codigo_estacao, ano, hash_entradas):
+        return os.path.join(self.pasta, hash_modelo, f'codigo_estacao={codigo_estacao}', f'year={ano}',
+                            f'{hash_entradas}.parquet')
+
+    def _prever_particao(self, modelo, caminho_dataset, tabela_estacoes, codigo_estacao, ano, colunas):
+        df = carregar_dataset(caminho_dataset, estacoes=[codigo_estacao], inicio=f'{ano}-01-01',
+                              fim=f'{ano + 1}-01-01', colunas=colunas)
+        df = adicionar_coordenadas(df, tabela_estacoes)
+        previsoes = modelo.predict(df[nomes_features(modelo)])
+        saida = pd.DataFrame(previsoes, index=df.index, columns=TARGETS).astype('float32')
+        saida.insert(0, 'codigo_estacao', codigo_estacao)
+        return saida
+
+    def _gravar(self, saida, caminho):
+        pasta_particao = os.path.dirname(caminho)
+        os.makedirs(pasta_particao, exist_ok=True)
+        # Versões antigas da mesma partição (entradas que mudaram) não servem mais
+        for nome in os.listdir(pasta_particao):
+            os.remove(os.path.join(pasta_particao, nome))
+        temporario = caminho + '.tmp'
+        saida.to_parquet(temporario)
+        os.replace(temporario, caminho)
+
+    def prever(self, caminho_modelo, caminho_dataset=CAMINHO_DATAFRAME, estacoes=None, inicio=None, fim=None,
+               caminho_estacoes=CAMINHO_ESTACOES, modelo=None):
+        """
+        Previsões (TARGETS) do modelo em 'caminho_modelo' para as linhas do
+        dataset em [inicio, fim), nas mesmas linhas e na mesma ordem de
+        carregar_dataset / carregar_xy com esses filtros. Partições ausentes
+        no cache são previstas (com 'modelo', se já carregado) e gravadas.
+        """
+        hash_modelo = hash_conteudo(caminho_modelo)
+        colunas = None
+        tabela_estacoes = None
+
+        partes = []
+        for (codigo_estacao, ano), arquivos in arquivos_particoes(caminho_dataset, estacoes, inicio, fim).items():
+            caminho = self._caminho(hash_modelo, codigo_estacao, ano, hash_conteudo(*arquivos, caminho_estacoes))
+            if os.path.exists(caminho):
+                os.utime(caminho)
+                partes.append(pd.read_parquet(caminho))
+                self.acertos += 1
+                continue
+
+            if modelo is None:
+                modelo = carregar_modelo(caminho_modelo)
+            if colunas is None:
+                colunas = [col for col in colunas_dataset(caminho_dataset) if col not in COLUNAS_NAO_FEATURES]
+                tabela_estacoes = carregar_tabela_estacoes(caminho_estacoes)
+            saida = self._prever_particao(modelo, caminho_dataset, tabela_estacoes, codigo_estacao, ano, colunas)
+            self._gravar(saida, caminho)
+            partes.append(saida)
+            self.recalculadas += 1
+
+        if not partes:
+            return pd.DataFrame(columns=['codigo_estacao'] + TARGETS, index=pd.DatetimeIndex([], name='timestamp'))
+        df = pd.concat(partes)
+        mascara = np.ones(len(df), dtype=bool)
+        if inicio is not None:
+            mascara &= df.index >= pd.Timestamp(inicio)
+        if fim is not None:
+            mascara &= df.index < pd.Timestamp(fim)
+        df = df.loc[mascara].reset_index()
+        df['codigo_estacao'] = df['codigo_estacao'].astype(str).astype('category')
+        df.sort_values(['timestamp', 'codigo_estacao'], inplace=True, kind='stable')
+        self.limitar_tamanho()
+        return df.set_index('timestamp')
+
+    # Limite de tamanho (LRU)
+
+    def _arquivos(self):
+        if not os.path.isdir(self.pasta):
+            return []
+        return [os.path.join(raiz, nome) for raiz, _, nomes in os.walk(self.pasta) for nome in nomes]
+
+    def tamanho_mb(self):
+        return sum(os.path.getsize(caminho) for caminho in self._arquivos()) / 1e6
+
+    def limitar_tamanho(self):
+        """Apaga os arquivos usados há mais tempo até o cache caber em limite_mb. Devolve quantos apagou."""
+        arquivos = sorted((os.stat(caminho).st_mtime_ns, os.path.getsize(caminho), caminho)
+                          for caminho in self._arquivos())
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        limite = self.limite_mb * 1e6
+        apagados = 0
+        for _, tamanho, caminho in arquivos:
+            if total <= limite:
+                break
+            os.remove(caminho)
+            total -= tamanho
+            apagados += 1
+            self._remover_pastas_vazias(os.path.dirname(caminho))
+        return apagados
+
+    def _remover_pastas_vazias(self, pasta):
+        raiz = os.path.abspath(self.pasta)
+        pasta = os.path.abspath(pasta)
+        while pasta != raiz and pasta.startswith(raiz) and not os.listdir(pasta):
+            os.rmdir(pasta)
+            pasta = os.path.dirname(pasta)
@@ -0,0 +1,209 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from solar_ia.estacoes import carregar_tabela_estacoes
+from solar_ia.qualidade import COLUNA_QC
+from solar_ia.solar import ZENITE_NOITE
+from solar_ia.tipos import aplicar_politica_tipos
+
+# --- 1. LOCAIS E LAYOUT DOS DATASETS ---
+
+# Cada etapa grava um dataset Parquet particionado no estilo Hive:
+#   <caminho>/codigo_estacao=A304/year=2023/<arquivo>.parquet
+# Assim, quem lê só abre as pastas (e os row groups) da estação e do período pedidos.
+CAMINHO_INMET = 'data/df_inmet'
+CAMINHO_NSRDB = 'data/df_nsrdb'
+CAMINHO_DATAFRAME = 'data/dataframe'
+
+# Coordenadas e altitude de cada estação (uma linha por estação)
+CAMINHO_ESTACOES = 'data/estacoes.parquet'
+
+COLUNAS_PARTICAO = ['codigo_estacao', 'year']
+
+# Divisão cronológica usada por dataframe.py, pelos treinos e pelos gráficos.
+# Intervalos semiabertos [inicio, fim); None significa "sem limite".
+DIVISOES = {
+    'treino': (None, '2023-01-01'),
+    'validacao': ('2023-01-01', '2024-01-01'),
+    'teste': ('2024-01-01', '2025-01-01'),
+}
+
+# Nossos alvos são 'ghi' e 'dni'. Todas as outras colunas (menos estas e a
+# máscara do controle de qualidade) são features.
+TARGETS = ['ghi', 'dni']
+COLUNAS_NAO_FEATURES = TARGETS + ['codigo_estacao', 'dhi', COLUNA_QC]
+
+# Features por estação, vindas da tabela de estações e coladas às linhas só na
+# hora de montar X (elas não ficam gravadas em cada linha dos datasets).
+FEATURES_ESTACAO = ['latitude', 'longitude']
+
+
+# --- 2. ESCRITA ---
+
+def salvar_dataset(df, caminho):
+    """
+    Grava um DataFrame indexado por 'timestamp' (e com a coluna 'codigo_estacao')
+    como dataset particionado por estação e ano, aplicando antes a política de
+    tipos (solar_ia/tipos.py).
+
+    As partições (estação, ano) presentes em 'df' são substituídas; as demais
+    que já existirem em 'caminho' são mantidas.
+    """
+    df_saida = aplicar_politica_tipos(df).reset_index()
+    df_saida['codigo_estacao'] = df_saida['codigo_estacao'].astype(str)
+    df_saida['year'] = df_saida['timestamp'].dt.year.astype('int16')
+    tabela = pa.Table.from_pandas(df_saida, preserve_index=False)
+    pq.write_to_dataset(
+        tabela,
+        caminho,
+        partition_cols=COLUNAS_PARTICAO,
+        existing_data_behavior='delete_matching',
+    )
+
+
+def apagar_dataset(caminho):
+    """
+    Apaga o dataset em 'caminho', se existir. Quem regrava um dataset inteiro
+    (em uma ou em várias chamadas a salvar_dataset) chama antes esta função,
+    para que não sobrem partições de estações ou anos que saíram da entrada.
+    """
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho)
+
+
+# --- 3. LEITURA COM FILTROS EMPURRADOS PARA O PARQUET ---
+
+def _abrir(caminho):
+    if not os.path.isdir(caminho):
+        raise FileNotFoundError(2, 'Dataset não encontrado', caminho)
+    return ds.dataset(caminho, format='parquet', partitioning='hive')
+
+
+def _montar_filtro(estacoes=None, inicio=None, fim=None, somente_dia=False):
+    condicoes = []
+    if somente_dia:
+        condicoes.append(ds.field('zenite_solar') < ZENITE_NOITE)
+    if estacoes is not None:
+        condicoes.append(ds.field('codigo_estacao').isin(list(estacoes)))
+    if inicio is not None:
+        inicio = pd.Timestamp(inicio)
+        condicoes.append(ds.field('year') >= inicio.year)
+        condicoes.append(ds.field('timestamp') >= inicio.to_pydatetime())
+    if fim is not None:
+        fim = pd.Timestamp(fim)
+        condicoes.append(ds.field('year') <= (fim - pd.Timedelta(1, 'ns')).year)
+        condicoes.append(ds.field('timestamp') < fim.to_pydatetime())
+
+    if not condicoes:
+        return None
+    filtro = condicoes[0]
+    for condicao in condicoes[1:]:
+        filtro = filtro & condicao
+    return filtro
+
+
+def colunas_dataset(caminho):
+    """Nomes das colunas de dados do dataset (sem 'timestamp' e sem 'year')."""
+    return [nome for nome in _abrir(caminho).schema.names if nome not in ('timestamp', 'year')]
+
+
+def arquivos_particoes(caminho, estacoes=None, inicio=None, fim=None):
+    """
+    {(codigo_estacao, ano): [arquivos .parquet]} das partições do dataset que
+    podem ter linhas em [inicio, fim), lido só dos nomes das pastas.
+    """
+    particoes = {}
+    for fragmento in _abrir(caminho).get_fragments(filter=_montar_filtro(estacoes, inicio, fim)):
+        chaves = ds.get_partition_keys(fragmento.partition_expression)
+        chave = (str(chaves['codigo_estacao']), int(chaves['year']))
+        particoes.setdefault(chave, []).append(fragmento.path)
+    return {chave: sorted(arquivos) for chave, arquivos in sorted(particoes.items())}
+
+
+def particoes_dataset(caminho, estacoes=None):
+    """
+    Lista ordenada das partições (codigo_estacao, ano) do dataset, lida só dos
+    nomes das pastas (nenhum dado é carregado).
+    """
+    return list(arquivos_particoes(caminho, estacoes))
+
+
+def carregar_dataset(caminho, estacoes=None, inicio=None, fim=None, colunas=None, somente_dia=False):
+    """
+    Lê um dataset particionado aplicando os filtros direto no leitor Parquet.
+
+    - estacoes: lista de códigos (ex.: ['A304']); None lê todas.
+    - inicio/fim: intervalo semiaberto [inicio, fim) de datas.
+    - colunas: colunas a ler; None lê todas. 'codigo_estacao' sempre vem junto.
+    - somente_dia: descarta no leitor as linhas de noite (zenite_solar >= ZENITE_NOITE);
+      só vale para datasets com a coluna 'zenite_solar' (o final).
+
+    Devolve um DataFrame indexado por 'timestamp', ordenado por (timestamp, estação).
+    """
+    dataset = _abrir(caminho)
+    if colunas is None:
+        colunas = colunas_dataset(caminho)
+    colunas_lidas = ['timestamp'] + [col for col in colunas if col != 'timestamp']
+    if 'codigo_estacao' not in colunas_lidas:
+        colunas_lidas.append('codigo_estacao')
+
+    tabela = dataset.to_table(columns=colunas_lidas, filter=_montar_filtro(estacoes, inicio, fim, somente_dia))
+    df = tabela.to_pandas()
+    df['timestamp'] = df['timestamp'].astype('datetime64[ns]')
+    df['codigo_estacao'] = df['codigo_estacao'].astype(str).astype('category')
+    df.sort_values(['timestamp', 'codigo_estacao'], inplace=True, kind='stable')
+    df.set_index('timestamp', inplace=True)
+
+    colunas_saida = [col for col in colunas if col != 'timestamp']
+    if 'codigo_estacao' not in colunas_saida:
+        colunas_saida = ['codigo_estacao'] + colunas_saida
+    return df[colunas_saida]
+
+
+def adicionar_coordenadas(df, tabela_estacoes):
+    """
+    Insere no início de 'df' as FEATURES_ESTACAO (float32) de cada linha,
+    buscadas na tabela de estações pelo 'codigo_estacao'.
+    """
+    codigos = df['codigo_estacao'].astype(str)
+    faltando = set(codigos.unique()) - set(tabela_estacoes.index)
+    if faltando:
+        raise KeyError(f"Estações sem coordenadas na tabela de estações: {sorted(faltando)}")
+    for posicao, coluna in enumerate(FEATURES_ESTACAO):
+        valores = tabela_estacoes[coluna].reindex(codigos).to_numpy(dtype='float32')
+        df.insert(posicao, coluna, valores)
+    return df
+
+
+def intervalo_divisao(divisao, inicio=None, fim=None):
+    """Interseção do intervalo [inicio, fim) com o da divisão em DIVISOES (divisao=None: só o intervalo)."""
+    inicio_divisao, fim_divisao = DIVISOES[divisao] if divisao is not None else (None, None)
+    candidatos_inicio = [pd.Timestamp(d) for d in (inicio_divisao, inicio) if d is not None]
+    candidatos_fim = [pd.Timestamp(d) for d in (fim_divisao, fim) if d is not None]
+    return (max(candidatos_inicio) if candidatos_inicio else None,
+            min(candidatos_fim) if candidatos_fim else None)
+
+
+def carregar_xy(caminho, divisao, estacoes=None, inicio=None, fim=None, caminho_estacoes=CAMINHO_ESTACOES,
+                somente_dia=False, com_estacoes=False):
+    """
+    Carrega (X, y) de uma divisão ('treino', 'validacao' ou 'teste'; None para
+    qualquer período) do dataset final, opcionalmente restrita a estações, a
+    um sub-período [inicio, fim) e, com somente_dia=True, às linhas com o Sol
+    acima do horizonte.
+    As FEATURES_ESTACAO vêm da tabela de estações em 'caminho_estacoes'.
+    Com com_estacoes=True devolve também o 'codigo_estacao' de cada linha.
+    """
+    features = [col for col in colunas_dataset(caminho) if col not in COLUNAS_NAO_FEATURES]
+    inicio, fim = intervalo_divisao(divisao, inicio, fim)
+    df = carregar_dataset(caminho, estacoes=estacoes, inicio=inicio, fim=fim, colunas=features + TARGETS,
+                          somente_dia=somente_dia)
+    df = adicionar_coordenadas(df, carregar_tabela_estacoes(caminho_estacoes))
+    if com_estacoes:
+        return df[FEATURES_ESTACAO + features], df[TARGETS], df['codigo_estacao']
+    return df[FEATURES_ESTACAO + features], df[TARGETS]
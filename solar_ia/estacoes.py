@@ -0,0 +1,157 @@
+import csv
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+
+from solar_ia.inmet import ler_cabecalho_inmet
+from solar_ia.nsrdb import listar_arquivos_estacao
+
+# Campos do cabeçalho de duas linhas dos CSVs da NSRDB que nos interessam
+CAMPOS_CABECALHO_NSRDB = {
+    'Location ID': 'location_id',
+    'Latitude': 'latitude',
+    'Longitude': 'longitude',
+    'Elevation': 'altitude',
+    'Local Time Zone': 'fuso_horario',
+}
+
+
+def ler_cabecalho_nsrdb(caminho_arquivo):
+    """
+    Lê as duas primeiras linhas de um CSV da NSRDB (nomes e valores dos metadados)
+    e devolve location_id, latitude, longitude, altitude e fuso_horario (horas
+    em relação ao UTC dos timestamps do arquivo).
+    """
+    with open(caminho_arquivo, newline='', encoding='utf-8') as arquivo:
+        leitor = csv.reader(arquivo)
+        nomes = next(leitor)
+        valores = next(leitor)
+    metadados_brutos = dict(zip(nomes, valores))
+
+    faltando = set(CAMPOS_CABECALHO_NSRDB) - set(metadados_brutos)
+    if faltando:
+        raise ValueError(f"Cabeçalho incompleto em '{caminho_arquivo}': faltam {sorted(faltando)}")
+
+    metadados = {nosso: metadados_brutos[original] for original, nosso in CAMPOS_CABECALHO_NSRDB.items()}
+    for campo in ('latitude', 'longitude', 'altitude', 'fuso_horario'):
+        metadados[campo] = float(metadados[campo])
+    return metadados
+
+
+def descobrir_estacoes_nsrdb(pasta_dados, estacoes=None):
+    """
+    Percorre as subpastas de 'pasta_dados' (uma por estação, ex.: a304) e
+    devolve {codigo: metadados}, com as coordenadas lidas do cabeçalho do
+    primeiro CSV de cada pasta. 'estacoes' restringe a busca a alguns códigos.
+    """
+    if estacoes is not None:
+        estacoes = {codigo.lower() for codigo in estacoes}
+
+    encontradas = {}
+    for codigo_estacao in sorted(os.listdir(pasta_dados)):
+        caminho_pasta_estacao = os.path.join(pasta_dados, codigo_estacao)
+        if not os.path.isdir(caminho_pasta_estacao):
+            continue
+        if estacoes is not None and codigo_estacao.lower() not in estacoes:
+            continue
+
+        arquivos = listar_arquivos_estacao(caminho_pasta_estacao)
+        if not arquivos:
+            print(f"AVISO: A pasta '{caminho_pasta_estacao}' não tem arquivos CSV. Pulando estação.")
+            continue
+        encontradas[codigo_estacao] = ler_cabecalho_nsrdb(arquivos[0])
+    return encontradas
+
+
+def descobrir_estacoes_inmet(pasta_dados, estacoes=None):
+    """
+    Lê o cabeçalho de cada CSV em 'pasta_dados' e devolve {codigo: [caminhos]},
+    agrupando os arquivos de uma mesma estação (ex.: períodos diferentes).
+    """
+    if estacoes is not None:
+        estacoes = {codigo.upper() for codigo in estacoes}
+
+    encontradas = {}
+    for nome_arquivo in sorted(os.listdir(pasta_dados)):
+        if not nome_arquivo.lower().endswith('.csv'):
+            continue
+        caminho_arquivo = os.path.join(pasta_dados, nome_arquivo)
+        codigo_estacao = ler_cabecalho_inmet(caminho_arquivo)['codigo_estacao'].upper()
+        if estacoes is not None and codigo_estacao not in estacoes:
+            continue
+        encontradas.setdefault(codigo_estacao, []).append(caminho_arquivo)
+    return encontradas
+
+
+# --- TABELA DE ESTAÇÕES ---
+#
+# Uma linha por estação, indexada pelo código em maiúsculas (ex.: 'A304').
+# O INMET preenche latitude/longitude/altitude e a NSRDB as mesmas colunas
+# com o sufixo '_nsrdb', mais o fuso_horario dos timestamps (que seguem a
+# hora local da NSRDB). É daqui que saem as coordenadas de cada estação:
+# elas não se repetem nas linhas dos datasets.
+
+def tabela_estacoes_inmet(arquivos_por_estacao):
+    """Tabela de estações a partir do cabeçalho do primeiro arquivo do INMET de cada estação."""
+    linhas = {}
+    for codigo_estacao, caminhos in arquivos_por_estacao.items():
+        metadados = ler_cabecalho_inmet(caminhos[0])
+        linhas[codigo_estacao.upper()] = {campo: metadados[campo] for campo in ('latitude', 'longitude', 'altitude')}
+    return pd.DataFrame.from_dict(linhas, orient='index').rename_axis('codigo_estacao')
+
+
+def tabela_estacoes_nsrdb(metadados_estacoes):
+    """Tabela de estações a partir dos metadados de descobrir_estacoes_nsrdb."""
+    linhas = {
+        codigo_estacao.upper(): {
+            **{f'{campo}_nsrdb': metadados[campo] for campo in ('latitude', 'longitude', 'altitude')},
+            'fuso_horario': metadados['fuso_horario'],
+        }
+        for codigo_estacao, metadados in metadados_estacoes.items()
+    }
+    return pd.DataFrame.from_dict(linhas, orient='index').rename_axis('codigo_estacao')
+
+
+def carregar_tabela_estacoes(caminho):
+    """Lê a tabela de estações gravada por atualizar_tabela_estacoes."""
+    return pd.read_parquet(caminho)
+
+
+@contextmanager
+def _travar(caminho):
+    """Trava exclusiva entre processos no arquivo '<caminho>.lock' (onde houver fcntl)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(caminho + '.lock', 'w') as trava:
+        fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def atualizar_tabela_estacoes(tabela_nova, caminho):
+    """
+    Mescla 'tabela_nova' na tabela de estações em 'caminho': as colunas e
+    estações presentes em 'tabela_nova' são sobrescritas, as demais mantidas.
+    A leitura e a gravação ficam sob uma trava: df-inmet.py e df-nsrdb.py
+    podem rodar ao mesmo tempo (pipeline.py) e cada um mescla as suas colunas.
+    """
+    with _travar(caminho):
+        if os.path.exists(caminho):
+            tabela = carregar_tabela_estacoes(caminho)
+            tabela = tabela_nova.combine_first(tabela)
+        else:
+            tabela = tabela_nova
+        # Linhas e colunas ordenadas: a mesma tabela dá o mesmo arquivo, não
+        # importa qual script a atualizou por último (os caches usam o hash dele)
+        tabela = tabela.sort_index().sort_index(axis=1)
+        tabela.to_parquet(caminho)
+    return tabela
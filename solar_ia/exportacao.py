@@ -0,0 +1,276 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.modelos import ModeloDiurno, XGBDoisModelos, nomes_features
+
+# --- 1. FORMATO EXPORTADO ---
+#
+# Uma pasta com um .npy por campo dos nós (todas as árvores concatenadas) e um
+# modelo.json com o resto:
+#
+#   feature, limiar, filho, faltante_esquerda  -> uma entrada por nó
+#   valor (n_nos, n_saidas)                    -> contribuição de cada folha
+#   raizes                                     -> nó raiz de cada árvore
+#
+# Os nós de cada árvore são renumerados para que os dois filhos fiquem lado a
+# lado: 'filho' é o da esquerda e o da direita é filho + 1. Folhas apontam para
+# si mesmas com limiar +inf (sempre "esquerda"), então todas as árvores descem
+# juntas por 'profundidade' passos sem testar quem já chegou. A previsão é
+# base + fator * soma das folhas (RandomForest: fator = 1 / n_árvores).
+# Os .npy são abertos com mmap_mode='r': carregar não copia os nós.
+
+VERSAO_FORMATO = 1
+CAMPOS_NOS = ('feature', 'limiar', 'filho', 'faltante_esquerda', 'valor', 'raizes')
+
+# Linhas por bloco de previsão (cada bloco ocupa linhas x árvores posições de nó)
+POSICOES_POR_BLOCO = 4_000_000
+
+# Objetivos do XGBoost com saída = margem (sem função de ligação)
+OBJETIVOS_IDENTIDADE = ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror')
+
+
+def _ordem_irmaos(esquerda, direita):
+    """Nova ordem dos nós de uma árvore: raiz primeiro e, em largura, os dois filhos de cada nó juntos."""
+    ordem = [0]
+    for no in ordem:
+        if esquerda[no] >= 0:
+            ordem += [esquerda[no], direita[no]]
+    return np.array(ordem)
+
+
+def _juntar_arvores(arvores, n_saidas):
+    """Concatena [(feature, limiar, esquerda, direita, faltante_esquerda, valor)] de cada árvore."""
+    campos = {nome: [] for nome in CAMPOS_NOS[:-1]}
+    raizes = []
+    inicio = 0
+    for feature, limiar, esquerda, direita, faltante, valor in arvores:
+        ordem = _ordem_irmaos(esquerda, direita)
+        nova_posicao = np.empty(len(esquerda), dtype=np.int64)
+        nova_posicao[ordem] = np.arange(len(ordem)) + inicio
+
+        folha = esquerda[ordem] < 0
+        filho = np.where(folha, nova_posicao[ordem], nova_posicao[np.where(folha, 0, esquerda[ordem])])
+        campos['feature'].append(np.where(folha, 0, feature[ordem]).astype(np.int32))
+        campos['limiar'].append(np.where(folha, np.inf, limiar[ordem]).astype(np.float64))
+        campos['filho'].append(filho.astype(np.int32))
+        campos['faltante_esquerda'].append(np.where(folha, True, faltante[ordem]).astype(bool))
+        valor = valor.reshape(len(esquerda), n_saidas)[ordem]
+        campos['valor'].append(np.where(folha[:, None], valor, 0.0).astype(np.float32))
+        raizes.append(inicio)
+        inicio += len(ordem)
+
+    nos = {nome: np.concatenate(valores) for nome, valores in campos.items()}
+    nos['raizes'] = np.array(raizes, dtype=np.int32)
+    return nos
+
+
+def _profundidade(nos):
+    """Maior número de passos da raiz até uma folha."""
+    atuais = nos['raizes'].astype(np.int64)
+    passos = 0
+    while True:
+        internos = atuais[np.isfinite(nos['limiar'][atuais])]
+        if len(internos) == 0:
+            return passos
+        atuais = np.concatenate([nos['filho'][internos], nos['filho'][internos] + 1])
+        passos += 1
+
+
+# --- 2. CONVERSORES ---
+
+def _arvores_floresta(floresta):
+    arvores = []
+    for estimador in floresta.estimators_:
+        arvore = estimador.tree_
+        faltante = getattr(arvore, 'missing_go_to_left', np.zeros(arvore.node_count, dtype=bool))
+        arvores.append((arvore.feature, arvore.threshold, arvore.children_left, arvore.children_right,
+                        np.asarray(faltante), arvore.value[:, :, 0]))
+    n_saidas = floresta.n_outputs_
+    return arvores, n_saidas, np.zeros(n_saidas), 1.0 / len(arvores), 'menor_igual'
+
+
+def _numeros_xgb(texto):
+    return [float(valor) for valor in texto.strip('[]').split(',')]
+
+
+def _arvores_booster(booster, n_saidas_modelo=None, saida=None):
+    """Árvores de um Booster do XGBoost (árvores de uma saída ou multi-saída)."""
+    modelo_json = json.loads(booster.save_raw(raw_format='json'))
+    aprendiz = modelo_json['learner']
+    objetivo = aprendiz['objective']['name']
+    if objetivo not in OBJETIVOS_IDENTIDADE:
+        raise ValueError(f"Objetivo '{objetivo}' não suportado na exportação (só saídas sem função de ligação).")
+
+    n_alvos = int(aprendiz['learner_model_param'].get('num_target', 1))
+    n_saidas = n_saidas_modelo or n_alvos
+    base = np.zeros(n_saidas)
+    pontos_base = _numeros_xgb(aprendiz['learner_model_param']['base_score'])
+    if saida is None:
+        base[:] = pontos_base if len(pontos_base) == n_saidas else pontos_base[0]
+    else:
+        base[saida] = pontos_base[0]
+
+    modelo_arvores = aprendiz['gradient_booster']['model']
+    arvores = []
+    for arvore, alvo in zip(modelo_arvores['trees'], modelo_arvores['tree_info']):
+        esquerda = np.array(arvore['left_children'], dtype=np.int64)
+        direita = np.array(arvore['right_children'], dtype=np.int64)
+        folha = esquerda < 0
+        valor = np.zeros((len(esquerda), n_saidas))
+        tamanho_folha = int(arvore['tree_param'].get('size_leaf_vector', 1))
+        if tamanho_folha > 1:
+            # Árvore multi-saída: a folha guarda em 'direita' o índice do seu vetor em leaf_weights
+            pesos = np.array(arvore['leaf_weights']).reshape(-1, tamanho_folha)
+            valor[folha] = pesos[direita[folha]]
+            direita = np.where(folha, -1, direita)
+        else:
+            valor[folha, alvo if saida is None else saida] = np.array(arvore['split_conditions'])[folha]
+        # O XGBoost compara em float32: x < limiar
+        limiar = np.array(arvore['split_conditions'], dtype=np.float32)
+        arvores.append((np.array(arvore['split_indices']), limiar, esquerda, direita,
+                        np.array(arvore['default_left'], dtype=bool), valor))
+    return arvores, n_saidas, base
+
+
+def _booster_usado(modelo_xgb):
+    """Booster com só as rodadas que o predict usa (até a melhor, com early stopping)."""
+    booster = modelo_xgb.get_booster()
+    try:
+        melhor = modelo_xgb.best_iteration
+    except AttributeError:
+        return booster
+    return booster[:melhor + 1]
+
+
+def _converter(modelo):
+    """(árvores, n_saidas, base, fator, comparação) de um RandomForest, XGBRegressor ou XGBDoisModelos."""
+    if isinstance(modelo, XGBDoisModelos):
+        arvores, base = [], np.zeros(len(modelo.modelos))
+        for saida, submodelo in enumerate(modelo.modelos):
+            arvores_saida, _, base_saida = _arvores_booster(_booster_usado(submodelo), len(modelo.modelos), saida)
+            arvores += arvores_saida
+            base += base_saida
+        return arvores, len(modelo.modelos), base, 1.0, 'menor'
+    if hasattr(modelo, 'get_booster'):
+        arvores, n_saidas, base = _arvores_booster(_booster_usado(modelo))
+        return arvores, n_saidas, base, 1.0, 'menor'
+    if hasattr(modelo, 'estimators_') and hasattr(modelo.estimators_[0], 'tree_'):
+        return _arvores_floresta(modelo)
+    raise TypeError(f"Modelo não suportado na exportação: {type(modelo).__name__}")
+
+
+def exportar_modelo(modelo, pasta):
+    """
+    Grava 'modelo' (RandomForest, XGBoost ou XGBDoisModelos, envolvido ou não em
+    ModeloDiurno) no formato de nós em arrays. Devolve a pasta.
+    """
+    diurno = None
+    if isinstance(modelo, ModeloDiurno):
+        diurno = {'coluna_zenite': modelo.coluna_zenite, 'zenite_noite': modelo.zenite_noite}
+        colunas = nomes_features(modelo.modelo)
+        modelo = modelo.modelo
+    else:
+        colunas = nomes_features(modelo)
+
+    arvores, n_saidas, base, fator, comparacao = _converter(modelo)
+    nos = _juntar_arvores(arvores, n_saidas)
+
+    os.makedirs(pasta, exist_ok=True)
+    for nome, valores in nos.items():
+        np.save(os.path.join(pasta, f'{nome}.npy'), np.ascontiguousarray(valores))
+    metadados = {
+        'versao': VERSAO_FORMATO,
+        'origem': type(modelo).__name__,
+        'colunas': colunas,
+        'n_saidas': n_saidas,
+        'n_arvores': len(nos['raizes']),
+        'profundidade': _profundidade(nos),
+        'base': [float(valor) for valor in base],
+        'fator': fator,
+        'comparacao': comparacao,
+        'diurno': diurno,
+    }
+    with open(os.path.join(pasta, 'modelo.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(metadados, arquivo, indent=2)
+    return pasta
+
+
+# --- 3. PREVISOR NUMPY ---
+
+class ArvoresNumpy:
+    """
+    Previsor de um modelo exportado por exportar_modelo, só com NumPy. Tem
+    predict(X) como os modelos originais (n x n_saidas) e feature_names_in_,
+    então pode substituí-los no servidor e nos scripts.
+    """
+
+    def __init__(self, pasta, mmap=True):
+        with open(os.path.join(pasta, 'modelo.json'), encoding='utf-8') as arquivo:
+            self.metadados = json.load(arquivo)
+        if self.metadados['versao'] != VERSAO_FORMATO:
+            raise ValueError(f"Versão do formato exportado não suportada: {self.metadados['versao']}")
+        modo = 'r' if mmap else None
+        self.nos = {nome: np.load(os.path.join(pasta, f'{nome}.npy'), mmap_mode=modo) for nome in CAMPOS_NOS}
+        self.feature_names_in_ = np.array(self.metadados['colunas'], dtype=object)
+        self.base = np.array(self.metadados['base'])
+
+    def _matriz(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.metadados['colunas']].to_numpy(dtype=np.float32)
+        return np.asarray(X, dtype=np.float32)
+
+    def _somar_folhas(self, X):
+        nos = self.nos
+        raizes = np.asarray(nos['raizes'])
+        com_faltantes = np.isnan(X).any()
+        # X achatado: o valor da feature f na linha i está em i * n_colunas + f
+        X_plano = np.ascontiguousarray(X).ravel()
+        deslocamentos = (np.arange(len(X)) * X.shape[1])[:, None]
+
+        atuais = np.broadcast_to(raizes, (len(X), len(raizes))).copy()
+        for _ in range(self.metadados['profundidade']):
+            x = np.take(X_plano, deslocamentos + np.take(nos['feature'], atuais))
+            limiar = np.take(nos['limiar'], atuais)
+            vai_direita = x > limiar if self.metadados['comparacao'] == 'menor_igual' else x >= limiar
+            if com_faltantes:
+                faltante = np.isnan(x)
+                vai_direita[faltante] = ~nos['faltante_esquerda'][atuais[faltante]]
+            atuais = np.take(nos['filho'], atuais) + vai_direita
+        return np.take(nos['valor'], atuais, axis=0).sum(axis=1, dtype=np.float64)
+
+    def _prever_matriz(self, X):
+        saida = np.empty((len(X), self.metadados['n_saidas']))
+        linhas_por_bloco = max(1, POSICOES_POR_BLOCO // max(1, self.metadados['n_arvores']))
+        for inicio in range(0, len(X), linhas_por_bloco):
+            bloco = X[inicio:inicio + linhas_por_bloco]
+            saida[inicio:inicio + len(bloco)] = self.base + self.metadados['fator'] * self._somar_folhas(bloco)
+        return saida
+
+    def predict(self, X):
+        diurno = self.metadados['diurno']
+        matriz = self._matriz(X)
+        if diurno is None:
+            previsoes = self._prever_matriz(matriz)
+        else:
+            indice_zenite = self.metadados['colunas'].index(diurno['coluna_zenite'])
+            dia = matriz[:, indice_zenite] < diurno['zenite_noite']
+            previsoes = np.zeros((len(matriz), self.metadados['n_saidas']))
+            if dia.any():
+                previsoes[dia] = self._prever_matriz(matriz[dia])
+        return previsoes[:, 0] if self.metadados['n_saidas'] == 1 else previsoes
+
+
+def carregar_exportado(pasta, mmap=True):
+    """Abre um modelo exportado (os nós por memmap, sem cópia, com mmap=True)."""
+    return ArvoresNumpy(pasta, mmap=mmap)
+
+
+def carregar_modelo(caminho):
+    """Modelo salvo com joblib (arquivo) ou exportado por exportar_modelo (pasta)."""
+    if os.path.isdir(caminho):
+        return carregar_exportado(caminho)
+    import joblib
+    return joblib.load(caminho)
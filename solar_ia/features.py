@@ -0,0 +1,89 @@
+import numpy as np
+
+from solar_ia.grade import GradeHoraria
+
+# --- 1. ESPECIFICAÇÃO DAS FEATURES TEMPORAIS ---
+
+# Para cada coluna: as defasagens (em horas, na própria estação), as janelas
+# móveis (em horas) e as estatísticas calculadas em cada janela. As janelas
+# olham só para o passado (terminam na hora anterior).
+ESPECIFICACAO_FEATURES = {
+    'temp_ar': {'lags': [1, 24], 'janelas': [3], 'estatisticas': ['media', 'std']},
+    'umidade_rel': {'lags': [3], 'janelas': [3], 'estatisticas': ['media', 'std']},
+    'pressao_atm_estacao': {'lags': [4], 'janelas': [3], 'estatisticas': ['media', 'std']},
+    'dhi': {'lags': [1, 24], 'janelas': [3], 'estatisticas': ['media', 'std']},
+    'dni': {'lags': [1, 24], 'janelas': [3], 'estatisticas': ['media', 'std']},
+    'ghi': {'lags': [1, 24], 'janelas': [3], 'estatisticas': ['media', 'std']},
+}
+
+ESTATISTICAS_SUPORTADAS = ('media', 'std')
+
+# Features cíclicas de calendário (hora do dia e dia do ano), na ordem em que entram
+COLUNAS_CALENDARIO = ['hora_sin', 'hora_cos', 'dia_ano_sin', 'dia_ano_cos']
+
+
+def nome_lag(coluna, lag):
+    return f'{coluna}_lag{lag}h'
+
+
+def nome_janela(coluna, estatistica, janela):
+    return f'{coluna}_{estatistica}_movel_{janela}h'
+
+
+def colunas_geradas(especificacao=ESPECIFICACAO_FEATURES):
+    """Nomes das colunas geradas, na ordem em que são adicionadas: todos os lags, depois as janelas."""
+    nomes = [nome_lag(coluna, lag) for coluna, spec in especificacao.items() for lag in spec.get('lags', [])]
+    for coluna, spec in especificacao.items():
+        for janela in spec.get('janelas', []):
+            nomes += [nome_janela(coluna, estatistica, janela) for estatistica in spec.get('estatisticas', [])]
+    return nomes
+
+
+def features_calendario(horas_do_dia, dias_do_ano):
+    """COLUNAS_CALENDARIO a partir da hora do dia e do dia do ano (arrays ou escalares)."""
+    return {
+        'hora_sin': np.sin(2 * np.pi * horas_do_dia / 24.0),
+        'hora_cos': np.cos(2 * np.pi * horas_do_dia / 24.0),
+        'dia_ano_sin': np.sin(2 * np.pi * dias_do_ano / 365.25),
+        'dia_ano_cos': np.cos(2 * np.pi * dias_do_ano / 365.25),
+    }
+
+
+# --- 2. CÁLCULO NA GRADE HORÁRIA ---
+
+def adicionar_features_temporais(df, especificacao=ESPECIFICACAO_FEATURES, coluna_estacao='codigo_estacao'):
+    """
+    Adiciona a 'df' as features de lag e de janela móvel descritas em
+    'especificacao', calculadas por estação na grade estação × hora
+    (solar_ia/grade.py), com os mesmos nomes e a mesma ordem de colunas.
+
+    Lags e janelas contam horas, não registros: o lag de 24h é o valor da
+    mesma estação 24 horas antes, e a janela de 3h cobre as 3 horas
+    anteriores. Se alguma dessas horas não tem registro (lacuna do INMET,
+    linha descartada no controle de qualidade), o resultado é NaN. Sem
+    lacunas, equivale a groupby(estação)[col].shift(lag) e a
+    groupby(estação)[col].transform(lambda x: x.shift(1).rolling(janela).mean()/.std()).
+    """
+    for coluna, spec in especificacao.items():
+        invalidas = set(spec.get('estatisticas', [])) - set(ESTATISTICAS_SUPORTADAS)
+        if invalidas:
+            raise ValueError(f"Estatística(s) não suportada(s) para '{coluna}': {sorted(invalidas)}")
+
+    grade = GradeHoraria.de_quadro(df, list(especificacao), coluna_estacao)
+    linhas, horas = grade.linhas_quadro, grade.horas_quadro
+
+    novas_colunas = {}
+    for coluna, spec in especificacao.items():
+        for lag in spec.get('lags', []):
+            novas_colunas[nome_lag(coluna, lag)] = grade.defasado(coluna, lag, linhas, horas)
+
+    for coluna, spec in especificacao.items():
+        for janela in spec.get('janelas', []):
+            estatisticas = spec.get('estatisticas', [])
+            resultados = grade.janela_movel(coluna, janela, estatisticas)
+            for estatistica in estatisticas:
+                novas_colunas[nome_janela(coluna, estatistica, janela)] = resultados[estatistica][linhas, horas]
+
+    for nome, valores in novas_colunas.items():
+        df[nome] = valores
+    return df
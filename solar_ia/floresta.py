@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.modelos import ModeloDiurno
+
+# --- 1. PRESETS DE MEMÓRIA ---
+#
+# Cada preset limita o tamanho das árvores (profundidade e folhas mínimas) e
+# quantas linhas cada árvore vê no bootstrap (max_samples). Árvores menores
+# ocupam menos RAM no treino, menos disco e carregam/preveem mais rápido.
+PRESETS_RF = {
+    'completo': {'max_depth': None, 'min_samples_leaf': 1, 'max_samples': None},
+    'compacto': {'max_depth': 20, 'min_samples_leaf': 5, 'max_samples': 0.5},
+    'leve': {'max_depth': 14, 'min_samples_leaf': 20, 'max_samples': 0.25},
+}
+
+# Compressão do joblib.dump dos modelos (0 = sem compressão, 9 = máxima)
+COMPRESSAO_MODELO = 3
+
+
+def matriz_float32(X):
+    """
+    X como DataFrame float32 apoiado num único array C-contíguo: o scikit-learn
+    treina as árvores em float32 e, assim, usa esse array sem fazer outra cópia
+    (e o modelo guarda os nomes das colunas).
+    """
+    valores = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    return pd.DataFrame(valores, index=X.index, columns=X.columns, copy=False)
+
+
+# --- 2. TREINO INCREMENTAL ---
+
+def treinar_floresta(X_train, y_train, X_val, y_val, preset='compacto', max_arvores=100, lote=20,
+                     paciencia=2, somente_dia=False, n_jobs=-1, random_state=42, verbose=True):
+    """
+    Treina um RandomForestRegressor com o preset pedido, adicionando 'lote'
+    árvores por vez (warm_start) até 'max_arvores'. Depois de cada lote mede o
+    MAE na validação; se ele não melhora por 'paciencia' lotes seguidos, o
+    treino para e a floresta é cortada no melhor número de árvores.
+
+    Com somente_dia=True a floresta é envolvida em ModeloDiurno (noite = 0).
+    As linhas de noite saem uma vez, antes dos lotes: cada lote treina e
+    avalia a floresta direto, sem o ModeloDiurno copiar X a cada fit/predict.
+    Devolve (modelo, histórico [(árvores, MAE)]).
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    floresta = RandomForestRegressor(n_estimators=0, warm_start=True, n_jobs=n_jobs,
+                                     random_state=random_state, **PRESETS_RF[preset])
+
+    y_val = np.asarray(y_val)
+    dia_val = np.ones(len(X_val), dtype=bool)
+    if somente_dia:
+        diurno = ModeloDiurno(floresta)
+        dia = diurno.mascara_dia(X_train)
+        if not dia.all():
+            X_train, y_train = X_train[dia], y_train[dia]
+        dia_val = diurno.mascara_dia(X_val)
+        if not dia_val.all():
+            X_val = X_val[dia_val]
+    X_train = matriz_float32(X_train)
+    X_val = matriz_float32(X_val)
+    # Noite prevista como 0, como no ModeloDiurno
+    previsoes = np.zeros(y_val.shape)
+
+    historico = []
+    melhor_mae, melhor_n, sem_melhora = np.inf, 0, 0
+    while floresta.n_estimators < max_arvores and sem_melhora < paciencia:
+        floresta.n_estimators = min(floresta.n_estimators + lote, max_arvores)
+        inicio = time.perf_counter()
+        floresta.fit(X_train, y_train)
+        duracao = time.perf_counter() - inicio
+
+        previsoes[dia_val] = floresta.predict(X_val)
+        mae = float(np.abs(previsoes - y_val).mean())
+        historico.append((floresta.n_estimators, mae))
+        if verbose:
+            print(f"  - {floresta.n_estimators:>4} árvores: MAE validação {mae:.2f} W/m² (+{duracao:.1f}s)")
+        if mae < melhor_mae:
+            melhor_mae, melhor_n, sem_melhora = mae, floresta.n_estimators, 0
+        else:
+            sem_melhora += 1
+
+    if melhor_n < floresta.n_estimators:
+        if verbose:
+            print(f"  Sem melhora em {paciencia} lote(s): mantendo as {melhor_n} primeiras árvores.")
+        floresta.estimators_ = floresta.estimators_[:melhor_n]
+        floresta.n_estimators = melhor_n
+    if somente_dia:
+        # A floresta já está treinada: o ModeloDiurno só a envolve (n_saidas_ vem dela)
+        return ModeloDiurno(floresta), historico
+    return floresta, historico
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+# --- 1. GRADE ESTAÇÃO × HORA ---
+#
+# Cada coluna de um quadro (estação, timestamp) vira um array 2-D denso: uma
+# linha por estação e uma coluna por hora desde 'inicio', com NaN nas horas
+# sem registro. A hora t-k de uma estação fica sempre k posições antes da hora
+# t, então um lag é um deslocamento fixo e continua certo com lacunas: a hora
+# que falta vira NaN, em vez do registro vizinho (como fazia o shift
+# posicional). Um período é uma fatia de colunas da grade e não copia nada:
+# é assim que o aquecimento do estado online (solar_ia/online.py) lê só as
+# últimas horas de cada estação.
+
+HORA = pd.Timedelta(hours=1)
+
+
+def _horas_desde(timestamps, inicio):
+    """Número de horas de 'inicio' até cada timestamp (que precisam cair em horas cheias a partir dele)."""
+    deltas = (pd.DatetimeIndex(timestamps) - inicio).as_unit('ns').asi8
+    horas, resto = np.divmod(deltas, HORA.value)
+    if resto.any():
+        raise ValueError("A grade horária exige timestamps em horas cheias a partir do primeiro registro.")
+    return horas
+
+
+def posicoes_estacoes(codigos, estacoes):
+    """
+    Posição de cada código de estação em 'estacoes' (-1 para os ausentes). Os
+    códigos são fatorados uma vez (códigos categóricos nem isso) e só os
+    distintos são convertidos e procurados, em vez de cada linha.
+    """
+    if isinstance(codigos, (list, tuple)):
+        codigos = np.asarray(codigos)
+    inteiros, distintos = pd.factorize(codigos)
+    mapa = pd.Index(estacoes).get_indexer(np.asarray(distintos).astype(str))
+    # Código nulo (-1 no factorize) cai no -1 acrescentado no fim
+    return np.append(mapa, -1)[inteiros].astype(np.int64)
+
+
+class GradeHoraria:
+    """
+    Colunas de um quadro indexado por timestamp (com 'codigo_estacao') numa
+    grade estação × hora (ver acima). 'linhas_quadro' e 'horas_quadro' dão a
+    posição de cada linha do quadro de origem, para devolver resultados a ele;
+    'ocupada' marca as (estação, hora) com registro.
+    """
+
+    def __init__(self, estacoes, inicio, n_horas):
+        self.estacoes = [str(codigo) for codigo in estacoes]
+        self.inicio = pd.Timestamp(inicio)
+        self.n_horas = int(n_horas)
+        self.ocupada = np.zeros((len(self.estacoes), self.n_horas), dtype=bool)
+        self.valores = {}
+        self.linhas_quadro = None
+        self.horas_quadro = None
+
+    @classmethod
+    def de_quadro(cls, df, colunas, coluna_estacao='codigo_estacao'):
+        """Grade com 'colunas' de 'df', cobrindo da primeira à última hora do quadro."""
+        codigos = df[coluna_estacao]
+        estacoes = sorted({str(codigo) for codigo in pd.unique(codigos)})
+        if len(df):
+            inicio = df.index.min()
+            n_horas = _horas_desde([df.index.max()], inicio)[0] + 1
+        else:
+            inicio, n_horas = pd.Timestamp(0), 0
+        grade = cls(estacoes, inicio, n_horas)
+
+        linhas, horas = grade.posicoes(codigos, df.index)
+        grade.ocupada[linhas, horas] = True
+        if np.count_nonzero(grade.ocupada) != len(df):
+            raise ValueError("O quadro tem mais de um registro para a mesma (estação, hora).")
+        grade.linhas_quadro, grade.horas_quadro = linhas, horas
+        for coluna in colunas:
+            grade.adicionar(coluna, df[coluna].to_numpy(), linhas, horas)
+        return grade
+
+    def posicoes(self, codigos, timestamps):
+        """(linha da estação, hora) de cada registro; as horas podem cair fora da grade."""
+        linhas = posicoes_estacoes(codigos, self.estacoes)
+        if (linhas < 0).any():
+            raise KeyError(f"Estação fora da grade: {sorted(set(np.asarray(codigos)[linhas < 0].astype(str)))}")
+        return linhas, self.indices_horas(timestamps)
+
+    def indices_horas(self, timestamps):
+        """Hora da grade de cada timestamp (negativa ou além de n_horas se cair fora dela)."""
+        return _horas_desde(timestamps, self.inicio)
+
+    def adicionar(self, coluna, valores, linhas, horas):
+        """Coloca 'valores' nas posições (linhas, horas); as demais horas ficam NaN."""
+        valores = np.asarray(valores)
+        tipo = valores.dtype if np.issubdtype(valores.dtype, np.floating) else np.float64
+        matriz = np.full((len(self.estacoes), self.n_horas), np.nan, dtype=tipo)
+        matriz[linhas, horas] = valores
+        self.valores[coluna] = matriz
+
+    def horas(self, inicio=None, fim=None):
+        """Fatia de colunas da grade para [inicio, fim) e os timestamps dela."""
+        primeira = 0 if inicio is None else int(np.clip(np.ceil((pd.Timestamp(inicio) - self.inicio) / HORA),
+                                                        0, self.n_horas))
+        ultima = self.n_horas if fim is None else int(np.clip(np.ceil((pd.Timestamp(fim) - self.inicio) / HORA),
+                                                              primeira, self.n_horas))
+        return slice(primeira, ultima), pd.date_range(self.inicio + primeira * HORA, periods=ultima - primeira,
+                                                      freq=HORA, name='timestamp')
+
+    # Consultas
+
+    def extremos_ocupados(self):
+        """Primeira e última hora com registro de cada estação (-1 se ela não tem nenhum)."""
+        tem_registro = self.ocupada.any(axis=1)
+        primeiras = np.where(tem_registro, self.ocupada.argmax(axis=1), -1)
+        ultimas = np.where(tem_registro, self.n_horas - 1 - self.ocupada[:, ::-1].argmax(axis=1), -1)
+        return primeiras, ultimas
+
+    def defasado(self, coluna, horas_atras, linhas, horas):
+        """Valor de 'coluna' 'horas_atras' horas antes de cada (linha, hora), ou NaN (fora da grade ou sem registro)."""
+        alvo = horas - horas_atras
+        dentro = (alvo >= 0) & (alvo < self.n_horas)
+        matriz = self.valores[coluna]
+        saida = np.full(len(linhas), np.nan, dtype=matriz.dtype)
+        saida[dentro] = matriz[linhas[dentro], alvo[dentro]]
+        return saida
+
+    def janela_movel(self, coluna, janela, estatisticas):
+        """
+        Média e desvio padrão (ddof=1) de 'coluna' nas 'janela' horas anteriores
+        a cada hora da grade ({estatística: matriz float64}). Uma hora sem
+        registro na janela deixa o resultado NaN. A janela é vista como 'janela'
+        fatias deslocadas (sem cópia) da grade, somadas uma vez para a média e
+        outra para os desvios.
+        """
+        matriz = self.valores[coluna]
+        resultados = {estatistica: np.full(matriz.shape, np.nan) for estatistica in estatisticas}
+        if self.n_horas <= janela:
+            return resultados
+
+        # A janela da hora t (t >= janela) cobre as horas [t - janela, t)
+        fatias = [matriz[:, k:self.n_horas - janela + k] for k in range(janela)]
+        media = fatias[0].astype(np.float64)
+        for fatia in fatias[1:]:
+            media += fatia
+        media /= janela
+        if 'media' in resultados:
+            resultados['media'][:, janela:] = media
+
+        if 'std' in resultados:
+            soma_quadrados = np.zeros_like(media)
+            for fatia in fatias:
+                desvio = fatia - media
+                soma_quadrados += desvio * desvio
+            resultados['std'][:, janela:] = np.sqrt(soma_quadrados / (janela - 1))
+        return resultados
+
+    def fatia(self, coluna, inicio=None, fim=None):
+        """'coluna' em [inicio, fim) como DataFrame hora × estação, apoiado na grade (sem cópia)."""
+        colunas, indice = self.horas(inicio, fim)
+        return pd.DataFrame(self.valores[coluna][:, colunas].T, index=indice, columns=self.estacoes, copy=False)
@@ -0,0 +1,163 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+# --- 1. ESQUEMA DOS ARQUIVOS DO INMET ---
+
+# Linhas de metadados no topo de cada arquivo (Nome, Codigo Estacao, Latitude...),
+# incluindo a linha em branco que as separa da tabela.
+LINHAS_CABECALHO = 10
+
+NOMES_COLUNAS_INMET = [
+    'data', 'hora', 'precipitacao', 'pressao_atm_estacao',
+    'pressao_atm_max', 'pressao_atm_min', 'radiacao_global',
+    'temp_ar', 'temp_max', 'temp_min',
+    'umidade_max', 'umidade_min', 'umidade_rel',
+    'vento_dir', 'vento_rajada', 'vento_vel',
+    'descartar'
+]
+
+# As coordenadas não entram aqui: ficam na tabela de estações (solar_ia/estacoes.py)
+COLUNAS_FINAIS_INMET = [
+    'codigo_estacao',
+    'temp_ar',
+    'umidade_rel',
+    'pressao_atm_estacao',
+    'vento_vel',
+    'vento_dir',
+    'precipitacao'
+]
+
+# Colunas de medição que realmente usamos. Lemos apenas estas (mais data e hora),
+# já no tipo final, sem deixar o leitor inferir nada.
+COLUNAS_MEDICAO_INMET = [col for col in COLUNAS_FINAIS_INMET if col != 'codigo_estacao']
+
+TIPOS_COLUNAS_INMET = {
+    'data': pa.string(),
+    'hora': pa.int16(),
+    **{col: pa.float32() for col in COLUNAS_MEDICAO_INMET},
+}
+
+# Chaves do cabeçalho que nos interessam e o nome que elas recebem no nosso código
+CAMPOS_CABECALHO = {
+    'Codigo Estacao': 'codigo_estacao',
+    'Latitude': 'latitude',
+    'Longitude': 'longitude',
+    'Altitude': 'altitude',
+}
+
+
+# --- 2. LEITURA ---
+
+def ler_cabecalho_inmet(caminho_arquivo):
+    """
+    Lê o bloco de metadados de um arquivo do INMET e devolve um dicionário com
+    codigo_estacao, latitude, longitude e altitude.
+    """
+    metadados = {}
+    with open(caminho_arquivo, encoding='latin-1') as arquivo:
+        for _ in range(LINHAS_CABECALHO):
+            chave, _, valor = arquivo.readline().partition(':')
+            chave = chave.strip()
+            if chave in CAMPOS_CABECALHO:
+                metadados[CAMPOS_CABECALHO[chave]] = valor.strip()
+
+    faltando = set(CAMPOS_CABECALHO.values()) - set(metadados)
+    if faltando:
+        raise ValueError(f"Cabeçalho incompleto em '{caminho_arquivo}': faltam {sorted(faltando)}")
+
+    for campo in ('latitude', 'longitude', 'altitude'):
+        metadados[campo] = float(metadados[campo].replace(',', '.'))
+    return metadados
+
+
+def _timestamps_inmet(tabela):
+    """
+    Monta o timestamp de forma vetorizada: a data vira segundos desde a época
+    e a hora ('HHMM', lida como inteiro) soma (HHMM // 100) * 3600 segundos.
+    Datas inválidas viram NaT, como no errors='coerce' do script antigo.
+    """
+    datas = pc.strptime(tabela['data'], format='%Y-%m-%d', unit='s', error_is_null=True)
+    segundos = datas.cast(pa.int64()).to_numpy(zero_copy_only=False)
+    horas = tabela['hora'].to_numpy(zero_copy_only=False)
+
+    invalidos = datas.is_null().to_numpy(zero_copy_only=False) | np.isnan(horas)
+    segundos = np.where(invalidos, 0, segundos).astype(np.int64)
+    segundos += (np.nan_to_num(horas).astype(np.int64) // 100) * 3600
+
+    timestamps = segundos.astype('datetime64[s]').astype('datetime64[ns]')
+    timestamps[invalidos] = np.datetime64('NaT')
+    return pd.DatetimeIndex(timestamps, name='timestamp')
+
+
+def ler_arquivo_inmet(caminho_arquivo):
+    """
+    Lê um arquivo de estação do INMET e devolve (DataFrame, estatísticas).
+
+    O DataFrame é indexado por 'timestamp' e tem as COLUNAS_FINAIS_INMET, com as
+    medições em float32 e o código da estação tirado do próprio cabeçalho do arquivo.
+    """
+    inicio = time.perf_counter()
+    metadados = ler_cabecalho_inmet(caminho_arquivo)
+
+    tabela = pacsv.read_csv(
+        caminho_arquivo,
+        read_options=pacsv.ReadOptions(
+            skip_rows=LINHAS_CABECALHO + 1,  # metadados + linha com os nomes originais
+            column_names=NOMES_COLUNAS_INMET,
+            encoding='latin-1',
+        ),
+        parse_options=pacsv.ParseOptions(delimiter=';'),
+        convert_options=pacsv.ConvertOptions(
+            column_types=TIPOS_COLUNAS_INMET,
+            include_columns=list(TIPOS_COLUNAS_INMET),
+            null_values=['null', ''],
+            strings_can_be_null=True,
+        ),
+    )
+
+    df_estacao = pd.DataFrame(
+        {col: tabela[col].to_numpy(zero_copy_only=False) for col in COLUNAS_MEDICAO_INMET},
+        index=_timestamps_inmet(tabela),
+    )
+    df_estacao.insert(0, 'codigo_estacao', metadados['codigo_estacao'])
+
+    duracao = time.perf_counter() - inicio
+    estatisticas = {
+        'arquivo': os.path.basename(caminho_arquivo),
+        'codigo_estacao': metadados['codigo_estacao'],
+        'linhas': len(df_estacao),
+        'segundos': duracao,
+        'linhas_por_segundo': len(df_estacao) / duracao if duracao > 0 else float('inf'),
+    }
+    return df_estacao[COLUNAS_FINAIS_INMET], estatisticas
+
+
+def ler_estacoes_inmet(caminhos_arquivos, max_processos=None):
+    """
+    Lê vários arquivos do INMET em paralelo (um processo por arquivo) e devolve
+    o DataFrame mestre, ordenado por timestamp.
+
+    Imprime, para cada arquivo, o número de linhas e a vazão em linhas/s.
+    """
+    caminhos_arquivos = list(caminhos_arquivos)
+    if not caminhos_arquivos:
+        raise ValueError("Nenhum arquivo do INMET para processar.")
+
+    lista_de_dataframes = []
+    with ProcessPoolExecutor(max_workers=max_processos) as executor:
+        for df_estacao, estatisticas in executor.map(ler_arquivo_inmet, caminhos_arquivos):
+            print(f"  - {estatisticas['codigo_estacao']} ({estatisticas['arquivo']}): "
+                  f"{estatisticas['linhas']} linhas em {estatisticas['segundos']:.2f}s "
+                  f"({estatisticas['linhas_por_segundo']:,.0f} linhas/s)")
+            lista_de_dataframes.append(df_estacao)
+
+    df_master_inmet = pd.concat(lista_de_dataframes)
+    df_master_inmet.sort_index(inplace=True, kind='stable')
+    return df_master_inmet
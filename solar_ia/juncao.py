@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from solar_ia.tipos import COLUNAS_MASCARA
+
+CHAVE_JUNCAO = ['codigo_estacao', 'timestamp']
+
+
+def colapsar_duplicados(df, nome='DataFrame'):
+    """
+    Colapsa as linhas repetidas de uma mesma (estação, timestamp) na média das
+    colunas numéricas (ignorando NaN, como o groupby().mean()), mantendo o
+    primeiro valor das demais colunas. Máscaras de bits (COLUNAS_MASCARA) são
+    combinadas com OU bit a bit.
+
+    Uma única ordenação por (timestamp, estação) deixa as repetições vizinhas;
+    as médias saem de np.add.reduceat sobre os inícios de cada grupo. Colunas
+    inteiras viram float64, como no groupby().mean() de antes. Devolve o quadro
+    ordenado por (timestamp, estação) e imprime quantas linhas foram colapsadas.
+    """
+    n = len(df)
+    bytes_por_linha = df.memory_usage(deep=True).sum() / n if n else 0.0
+
+    codigos, _ = pd.factorize(df['codigo_estacao'], sort=True)
+    timestamps = df.index.to_numpy().view(np.int64)
+    ordem = np.lexsort((codigos, timestamps))
+    codigos, timestamps = codigos[ordem], timestamps[ordem]
+
+    inicio_grupo = np.ones(n, dtype=bool)
+    inicio_grupo[1:] = (timestamps[1:] != timestamps[:-1]) | (codigos[1:] != codigos[:-1])
+    inicios = np.flatnonzero(inicio_grupo)
+
+    df_ordenado = df.iloc[ordem]
+    colunas = {}
+    for coluna in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[coluna].dtype):
+            # Colunas não numéricas (ex.: o código da estação) ficam com o primeiro valor
+            colunas[coluna] = df_ordenado[coluna].array[inicios]
+            continue
+
+        valores = df_ordenado[coluna].to_numpy()
+        if coluna in COLUNAS_MASCARA:
+            colunas[coluna] = np.bitwise_or.reduceat(valores, inicios) if len(inicios) < n else valores
+            continue
+
+        tipo_saida = valores.dtype if np.issubdtype(valores.dtype, np.floating) else np.float64
+        if len(inicios) == n:
+            colunas[coluna] = valores.astype(tipo_saida, copy=False)
+            continue
+
+        valores = valores.astype(np.float64)
+        validos = ~np.isnan(valores)
+        soma = np.add.reduceat(np.where(validos, valores, 0.0), inicios)
+        contagem = np.add.reduceat(validos.astype(np.int64), inicios)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            colunas[coluna] = (soma / contagem).astype(tipo_saida)
+
+    df_colapsado = pd.DataFrame(colunas, index=df_ordenado.index[inicios])
+
+    colapsadas = n - len(inicios)
+    print(f"{nome}: {colapsadas} linha(s) duplicada(s) (estação, timestamp) colapsada(s) "
+          f"(~{colapsadas * bytes_por_linha / 1e6:.1f} MB a menos)")
+    return df_colapsado
+
+
+def juntar_inmet_nsrdb(df_inmet, df_nsrdb):
+    """
+    Junta INMET e NSRDB pela chave (estação, timestamp).
+
+    As repetições verdadeiras de cada fonte são colapsadas antes da junção;
+    assim cada linha do INMET encontra no máximo uma linha da NSRDB, nenhuma
+    duplicata é criada e o custo cresce linearmente com o número de estações
+    (a junção antiga, só pelo timestamp, cruzava todas as estações entre si).
+    Colunas repetidas recebem os sufixos '_inmet' e '_nsrdb', como antes.
+    """
+    df_inmet = colapsar_duplicados(df_inmet, 'INMET')
+    df_nsrdb = colapsar_duplicados(df_nsrdb, 'NSRDB')
+
+    df_final = df_inmet.reset_index().merge(
+        df_nsrdb.reset_index(),
+        on=CHAVE_JUNCAO,
+        how='left',
+        suffixes=('_inmet', '_nsrdb'),
+        validate='one_to_one',
+    )
+    return df_final.set_index('timestamp')
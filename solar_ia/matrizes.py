@@ -0,0 +1,156 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.cache_previsoes import hash_conteudo
+from solar_ia.dataset import CAMINHO_DATAFRAME, CAMINHO_ESTACOES, arquivos_particoes, carregar_xy, intervalo_divisao
+
+# --- 1. LAYOUT DO CACHE ---
+#
+# X e y de cada recorte do dataset final (divisão, estações, só dia ou não)
+# são gravados uma vez como .npy float32 C-contíguo, com os arquivos auxiliares:
+#   <pasta>/<recorte>/<hash das entradas>/X.npy, y.npy          (linhas x colunas)
+#                                         timestamp.npy         (datetime64[ns])
+#                                         codigo_estacao.npy    (int16, códigos de 'estacoes')
+#                                         meta.json             (colunas de X e y, estações)
+#
+# Quem abre usa mmap_mode='r': X e y viram DataFrames apoiados direto no
+# arquivo, sem decodificar Parquet nem copiar, e processos em paralelo
+# (backtest, treinos) dividem as mesmas páginas no cache do sistema.
+# As linhas estão na ordem de carregar_xy, (timestamp, estação), então um
+# sub-período [inicio, fim) é uma fatia contínua e também não copia nada.
+#
+# O hash das entradas junta os arquivos das partições do recorte e a tabela de
+# estações, como em solar_ia/cache_previsoes.py: remontar o dataset gera outra
+# pasta, e a versão antiga do recorte é apagada.
+CAMINHO_CACHE_MATRIZES = 'data/cache/matrizes'
+
+# Muda quando o formato gravado muda, para invalidar o cache
+VERSAO_MATRIZES = 1
+
+ARQUIVO_META = 'meta.json'
+
+
+def nome_recorte(divisao, estacoes=None, somente_dia=False):
+    """Nome da pasta do recorte (ex.: 'treino_dia', 'validacao', 'tudo_A304-A305')."""
+    nome = divisao or 'tudo'
+    if somente_dia:
+        nome += '_dia'
+    if estacoes is not None:
+        nome += '_' + '-'.join(sorted(str(codigo) for codigo in estacoes))
+    return nome
+
+
+def gravar_matrizes_xy(pasta, X, y, codigos_estacao):
+    """
+    Grava X, y (float32 C-contíguo), o índice de timestamps e os códigos das
+    estações de cada linha em 'pasta', no layout acima. Grava numa pasta
+    temporária e renomeia no fim: quem abre nunca vê uma gravação pela metade.
+    """
+    codigos = pd.Categorical(np.asarray(codigos_estacao, dtype=str))
+    temporaria = f'{pasta}.{uuid.uuid4().hex}.tmp'
+    os.makedirs(temporaria)
+    np.save(os.path.join(temporaria, 'X.npy'), np.ascontiguousarray(X.to_numpy(dtype=np.float32)))
+    np.save(os.path.join(temporaria, 'y.npy'), np.ascontiguousarray(y.to_numpy(dtype=np.float32)))
+    np.save(os.path.join(temporaria, 'timestamp.npy'), X.index.to_numpy(dtype='datetime64[ns]'))
+    np.save(os.path.join(temporaria, 'codigo_estacao.npy'), codigos.codes.astype(np.int16))
+    meta = {
+        'versao': VERSAO_MATRIZES,
+        'linhas': len(X),
+        'colunas_x': [str(coluna) for coluna in X.columns],
+        'colunas_y': [str(coluna) for coluna in y.columns],
+        'estacoes': [str(codigo) for codigo in codigos.categories],
+    }
+    with open(os.path.join(temporaria, ARQUIVO_META), 'w') as arquivo:
+        json.dump(meta, arquivo, ensure_ascii=False)
+    try:
+        os.rename(temporaria, pasta)
+    except OSError:
+        # Outro processo gravou o mesmo recorte primeiro: fica a versão dele
+        shutil.rmtree(temporaria)
+    return pasta
+
+
+def abrir_matrizes_xy(pasta, inicio=None, fim=None, com_estacoes=False):
+    """
+    Abre as matrizes gravadas em 'pasta' sem copiá-las (somente leitura) e
+    devolve (X, y) como em carregar_xy, restritos a [inicio, fim) por fatia.
+    Com com_estacoes=True devolve também o 'codigo_estacao' (categórico) de cada linha.
+    """
+    with open(os.path.join(pasta, ARQUIVO_META)) as arquivo:
+        meta = json.load(arquivo)
+    timestamps = np.load(os.path.join(pasta, 'timestamp.npy'), mmap_mode='r')
+    primeira = 0 if inicio is None else np.searchsorted(timestamps, np.datetime64(pd.Timestamp(inicio), 'ns'))
+    ultima = len(timestamps) if fim is None else np.searchsorted(timestamps, np.datetime64(pd.Timestamp(fim), 'ns'))
+    fatia = slice(primeira, ultima)
+
+    indice = pd.DatetimeIndex(np.asarray(timestamps[fatia]), name='timestamp')
+    X = pd.DataFrame(np.load(os.path.join(pasta, 'X.npy'), mmap_mode='r')[fatia], index=indice,
+                     columns=meta['colunas_x'], copy=False)
+    y = pd.DataFrame(np.load(os.path.join(pasta, 'y.npy'), mmap_mode='r')[fatia], index=indice,
+                     columns=meta['colunas_y'], copy=False)
+    if not com_estacoes:
+        return X, y
+    codigos = np.load(os.path.join(pasta, 'codigo_estacao.npy'), mmap_mode='r')[fatia]
+    estacoes = pd.Series(pd.Categorical.from_codes(np.asarray(codigos), meta['estacoes']), index=indice,
+                         name='codigo_estacao')
+    return X, y, estacoes
+
+
+# --- 2. CACHE ---
+
+class CacheMatrizes:
+    """
+    X/y do dataset final por recorte, gravados uma vez em .npy e abertos por
+    memmap. Recortes ausentes (ou com entradas que mudaram) são lidos com
+    carregar_xy e gravados; os demais nem tocam no Parquet.
+    """
+
+    def __init__(self, pasta=CAMINHO_CACHE_MATRIZES):
+        self.pasta = pasta
+        self.acertos = 0
+        self.gravados = 0
+
+    def preparar(self, caminho_dataset=CAMINHO_DATAFRAME, divisao=None, estacoes=None, somente_dia=False,
+                 caminho_estacoes=CAMINHO_ESTACOES):
+        """Garante o recorte no cache (gravando-o se preciso) e devolve a pasta dele."""
+        inicio, fim = intervalo_divisao(divisao)
+        arquivos = [arquivo for lista in arquivos_particoes(caminho_dataset, estacoes, inicio, fim).values()
+                    for arquivo in lista]
+        if not arquivos:
+            raise FileNotFoundError(2, 'Nenhuma partição do dataset no recorte pedido', caminho_dataset)
+        pasta_recorte = os.path.join(self.pasta, nome_recorte(divisao, estacoes, somente_dia))
+        hash_entradas = hash_conteudo(*arquivos, caminho_estacoes)
+        pasta = os.path.join(pasta_recorte, f'{hash_entradas}-v{VERSAO_MATRIZES}')
+        if os.path.exists(os.path.join(pasta, ARQUIVO_META)):
+            self.acertos += 1
+            return pasta
+
+        X, y, codigos = carregar_xy(caminho_dataset, divisao, estacoes=estacoes, caminho_estacoes=caminho_estacoes,
+                                    somente_dia=somente_dia, com_estacoes=True)
+        os.makedirs(pasta_recorte, exist_ok=True)
+        # Versões antigas do recorte (dataset remontado) não servem mais. Quem
+        # ainda as tem abertas continua lendo: o memmap segura o arquivo apagado.
+        # A versão atual fica, caso outro processo a tenha gravado enquanto isso.
+        for nome in os.listdir(pasta_recorte):
+            if nome != os.path.basename(pasta) and not nome.endswith('.tmp'):
+                shutil.rmtree(os.path.join(pasta_recorte, nome), ignore_errors=True)
+        gravar_matrizes_xy(pasta, X, y, codigos)
+        self.gravados += 1
+        return pasta
+
+    def abrir(self, caminho_dataset=CAMINHO_DATAFRAME, divisao=None, estacoes=None, inicio=None, fim=None,
+              somente_dia=False, caminho_estacoes=CAMINHO_ESTACOES, com_estacoes=False):
+        """
+        Mesmo resultado de carregar_xy com esses argumentos, mas com X e y em
+        float32 apoiados no memmap do recorte (divisão, estações, somente_dia);
+        inicio/fim só fatiam o recorte.
+        """
+        pasta = self.preparar(caminho_dataset, divisao, estacoes, somente_dia, caminho_estacoes)
+        inicio, fim = intervalo_divisao(divisao, inicio, fim)
+        return abrir_matrizes_xy(pasta, inicio, fim, com_estacoes)
+
@@ -0,0 +1,60 @@
+import os
+import resource
+import sys
+
+
+def pico_rss_mb():
+    """Pico de memória residente (RSS) do processo atual, em MB."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No Linux ru_maxrss vem em KiB; no macOS, em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def rss_atual_mb():
+    """
+    Memória residente (RSS) atual do processo, em MB. Lida de /proc no Linux;
+    nos demais sistemas cai no pico. (Num processo criado por spawn, o pico
+    herda o do processo pai, então compare cargas pelo RSS atual.)
+    """
+    try:
+        with open('/proc/self/statm') as arquivo:
+            paginas = int(arquivo.read().split()[1])
+    except OSError:
+        return pico_rss_mb()
+    return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def rss_anonimo_mb():
+    """
+    Parte anônima do RSS atual (memória própria do processo), em MB. Páginas
+    de arquivos abertos por memmap ficam de fora: elas vêm do cache do sistema
+    e são divididas entre os processos. Fora do Linux cai no RSS atual.
+    """
+    try:
+        with open('/proc/self/status') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('RssAnon:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return rss_atual_mb()
+
+
+def tamanho_em_disco_bytes(caminho):
+    """Tamanho de um arquivo ou, para pastas (datasets particionados), a soma de todos os arquivos, em bytes."""
+    if os.path.isfile(caminho):
+        return os.path.getsize(caminho)
+    total = 0
+    for raiz, _, arquivos in os.walk(caminho):
+        total += sum(os.path.getsize(os.path.join(raiz, nome)) for nome in arquivos)
+    return total
+
+
+def tamanho_em_disco_mb(caminho):
+    """Tamanho de um arquivo ou pasta (ver tamanho_em_disco_bytes), em MB."""
+    return tamanho_em_disco_bytes(caminho) / 1e6
+
+
+def memoria_df_mb(df):
+    """Memória ocupada por um DataFrame (incluindo strings), em MB."""
+    return df.memory_usage(deep=True).sum() / 1e6
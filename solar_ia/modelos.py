@@ -0,0 +1,117 @@
+import numpy as np
+
+from solar_ia.solar import ZENITE_NOITE
+
+# Coluna de X usada para decidir se é dia (feature de solar_ia/solar.py)
+COLUNA_ZENITE = 'zenite_solar'
+
+
+class ModeloDiurno:
+    """
+    Envolve um regressor (RandomForest, XGBoost...) para que as linhas de noite
+    (zênite >= ZENITE_NOITE) nem passem por ele: no treino elas são
+    descartadas e na previsão recebem 0 direto, e só as linhas de dia vão, num
+    único lote, para o predict do modelo.
+
+    Tem fit/predict como os modelos do scikit-learn, então pode ser salvo com
+    joblib e usado no lugar do modelo original.
+    """
+
+    def __init__(self, modelo, coluna_zenite=COLUNA_ZENITE, zenite_noite=ZENITE_NOITE):
+        self.modelo = modelo
+        self.coluna_zenite = coluna_zenite
+        self.zenite_noite = zenite_noite
+        self.n_saidas_ = getattr(modelo, 'n_outputs_', None)
+
+    def mascara_dia(self, X):
+        """True nas linhas de X com o Sol acima do horizonte."""
+        return X[self.coluna_zenite].to_numpy() < self.zenite_noite
+
+    def fit(self, X, y, **kwargs):
+        """Treina só com as linhas de dia. Um 'eval_set' (XGBoost) é filtrado da mesma forma."""
+        dia = self.mascara_dia(X)
+        if 'eval_set' in kwargs:
+            eval_set = []
+            for X_eval, y_eval in kwargs['eval_set']:
+                dia_eval = self.mascara_dia(X_eval)
+                eval_set.append((X_eval[dia_eval], y_eval[dia_eval]))
+            kwargs['eval_set'] = eval_set
+        self.modelo.fit(X[dia], y[dia], **kwargs)
+        self.n_saidas_ = 1 if np.ndim(y) == 1 else np.shape(y)[1]
+        return self
+
+    def predict(self, X):
+        dia = self.mascara_dia(X)
+        previsoes_dia = self.modelo.predict(X[dia]) if dia.any() else None
+
+        n_saidas = self.n_saidas_
+        if previsoes_dia is not None:
+            n_saidas = 1 if previsoes_dia.ndim == 1 else previsoes_dia.shape[1]
+        previsoes = np.zeros((len(X),) if n_saidas in (None, 1) else (len(X), n_saidas))
+        if previsoes_dia is not None:
+            previsoes[dia] = previsoes_dia
+        return previsoes
+
+    def __getattr__(self, nome):
+        # Atributos do modelo envolvido (feature_importances_, best_iteration...)
+        if nome == 'modelo':
+            raise AttributeError(nome)
+        return getattr(self.modelo, nome)
+
+
+def nomes_features(modelo):
+    """Colunas de X, na ordem em que o modelo foi treinado."""
+    if hasattr(modelo, 'feature_names_in_'):
+        return [str(coluna) for coluna in modelo.feature_names_in_]
+    submodelos = getattr(modelo, 'modelos', None)
+    if submodelos:
+        return [str(coluna) for coluna in submodelos[0].feature_names_in_]
+    raise ValueError("Não foi possível descobrir as features do modelo (treine-o com um DataFrame).")
+
+
+# --- XGBOOST PARA GHI E DNI ---
+#
+# Estratégias de treino dos dois alvos:
+#   - 'dois_modelos': um XGBRegressor por alvo (cada um quantiza X de novo);
+#   - 'uma_matriz': um único XGBRegressor com y de duas colunas. X é quantizado
+#     uma vez (um QuantileDMatrix para o treino e outro, com as mesmas faixas,
+#     para a validação) e cada rodada cresce uma árvore por alvo;
+#   - 'multi_saida': idem, mas com árvores multi-saída (uma árvore por rodada,
+#     com um vetor [ghi, dni] em cada folha).
+ESTRATEGIAS_XGB = {
+    'dois_modelos': None,
+    'uma_matriz': 'one_output_per_tree',
+    'multi_saida': 'multi_output_tree',
+}
+
+
+class XGBDoisModelos:
+    """Um XGBRegressor por coluna de y, com a interface multi-saída dos demais modelos."""
+
+    def __init__(self, **parametros):
+        self.parametros = parametros
+        self.modelos = None
+
+    def fit(self, X, y, eval_set=None, **kwargs):
+        import xgboost as xgb
+        self.modelos = []
+        for coluna in y.columns:
+            modelo = xgb.XGBRegressor(**self.parametros)
+            eval_coluna = None if eval_set is None else [(X_eval, y_eval[coluna]) for X_eval, y_eval in eval_set]
+            modelo.fit(X, y[coluna], eval_set=eval_coluna, **kwargs)
+            self.modelos.append(modelo)
+        return self
+
+    def predict(self, X):
+        return np.column_stack([modelo.predict(X) for modelo in self.modelos])
+
+
+def criar_modelo_xgb(estrategia='uma_matriz', **parametros):
+    """XGBoost para prever GHI e DNI juntos (predict devolve n x 2) com uma das ESTRATEGIAS_XGB."""
+    if estrategia not in ESTRATEGIAS_XGB:
+        raise ValueError(f"Estratégia desconhecida: '{estrategia}'. Use uma de {list(ESTRATEGIAS_XGB)}.")
+    if estrategia == 'dois_modelos':
+        return XGBDoisModelos(**parametros)
+
+    import xgboost as xgb
+    return xgb.XGBRegressor(tree_method='hist', multi_strategy=ESTRATEGIAS_XGB[estrategia], **parametros)
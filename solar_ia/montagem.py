@@ -0,0 +1,278 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from solar_ia.dataset import (
+    CAMINHO_DATAFRAME, CAMINHO_INMET, CAMINHO_NSRDB, COLUNAS_NAO_FEATURES, DIVISOES, TARGETS,
+    adicionar_coordenadas, apagar_dataset, carregar_dataset, particoes_dataset, salvar_dataset,
+)
+from solar_ia.features import ESPECIFICACAO_FEATURES, adicionar_features_temporais, features_calendario
+from solar_ia.juncao import colapsar_duplicados, juntar_inmet_nsrdb
+from solar_ia.memoria import pico_rss_mb
+from solar_ia.qualidade import COLUNA_QC, COLUNAS_IRRADIACAO, controlar_qualidade, resumo_qualidade
+from solar_ia.rastreio import etapa
+from solar_ia.solar import adicionar_geometria_solar
+from solar_ia.tipos import aplicar_politica_tipos
+from solar_ia.vizinhos import IndiceVizinhos, adicionar_features_vizinhos, alcance_vizinhos
+
+# --- 1. PARÂMETROS DA MONTAGEM ---
+
+# Colunas do INMET preenchidas com a coluna correspondente da NSRDB
+COLUNAS_PARA_IMPUTAR = {
+    'temp_ar': 'temp_ar_nsrdb',
+    'umidade_rel': 'umidade_rel_nsrdb',
+    'vento_vel': 'vento_vel_nsrdb',
+    'pressao_atm_estacao': 'pressao_nsrdb',
+}
+
+# Arquivos (X, y) de cada divisão de DIVISOES
+ARQUIVOS_XY = {
+    'treino': ('data/X_train.parquet', 'data/y_train.parquet'),
+    'validacao': ('data/X_val.parquet', 'data/y_val.parquet'),
+    'teste': ('data/X_test.parquet', 'data/y_test.parquet'),
+}
+
+
+# --- 2. ETAPAS ---
+
+def interpolar_por_estacao(df, colunas, **kwargs):
+    """Interpola 'colunas' no tempo dentro de cada estação, sem misturar valores de estações vizinhas."""
+    df[colunas] = (df.groupby('codigo_estacao', observed=True)[colunas]
+                     .transform(lambda serie: serie.interpolate(method='time', **kwargs)))
+    return df
+
+
+def corrigir_anomalias_nsrdb(df_nsrdb, tabela_estacoes):
+    """
+    Controle de qualidade da irradiação da NSRDB (solar_ia/qualidade.py):
+    limites físicos, fechamento, sensor travado e GHI baixo com o Sol alto,
+    numa passada vetorizada; as linhas reprovadas são invalidadas, as lacunas
+    curtas interpoladas dentro de cada estação e o resultado fica na máscara COLUNA_QC.
+    """
+    df_nsrdb = controlar_qualidade(df_nsrdb, tabela_estacoes)
+    contagem = resumo_qualidade(df_nsrdb[COLUNA_QC])
+    print("Controle de qualidade da irradiação (linhas por teste): "
+          + ", ".join(f"{nome}={quantidade}" for nome, quantidade in contagem.items()))
+    return df_nsrdb
+
+
+def imputar_com_nsrdb(df_final):
+    """Preenche os nulos das colunas do INMET com a NSRDB e remove as colunas de suporte da NSRDB."""
+    for col_inmet, col_nsrdb in COLUNAS_PARA_IMPUTAR.items():
+        nulos_antes = df_final[col_inmet].isnull().sum()
+        df_final[col_inmet] = df_final[col_inmet].fillna(df_final[col_nsrdb])
+        nulos_depois = df_final[col_inmet].isnull().sum()
+        print(f"  - Coluna '{col_inmet}': {nulos_antes - nulos_depois} valores preenchidos. ({nulos_depois} nulos restantes)")
+
+    return df_final.drop(columns=list(COLUNAS_PARA_IMPUTAR.values()), errors='ignore')
+
+
+def montar_dataframe(df_inmet, df_nsrdb, tabela_estacoes, especificacao=ESPECIFICACAO_FEATURES,
+                     especificacao_vizinhos=None, indice_vizinhos=None):
+    """
+    Da leitura dos datasets do INMET e da NSRDB até o quadro final: correção de
+    anomalias, junção por (estação, timestamp), imputação, interpolação,
+    features de calendário e de geometria solar, lags/janelas e política de tipos.
+
+    Com 'especificacao_vizinhos' (solar_ia/vizinhos.py) entram também os lags
+    das estações vizinhas, lidos da NSRDB já corrigida. O 'indice_vizinhos'
+    padrão cobre as estações de 'df_nsrdb'; df_nsrdb pode trazer estações
+    que só servem de vizinhas (sem linhas do INMET), e elas não entram no quadro.
+    """
+    with etapa('anomalias', linhas_entrada=len(df_nsrdb)) as span:
+        df_nsrdb = corrigir_anomalias_nsrdb(df_nsrdb, tabela_estacoes)
+        span.linhas_saida = len(df_nsrdb)
+
+    # Repetições de (estação, timestamp) em cada fonte são colapsadas antes da junção
+    with etapa('juncao', linhas_entrada=len(df_inmet) + len(df_nsrdb)) as span:
+        if especificacao_vizinhos is not None:
+            # A NSRDB colapsada fica para as features de vizinhos (um registro por estação e hora)
+            df_nsrdb = colapsar_duplicados(df_nsrdb, 'NSRDB')
+        df_final = aplicar_politica_tipos(juntar_inmet_nsrdb(df_inmet, df_nsrdb))
+        span.linhas_saida = len(df_final)
+
+    with etapa('imputacao', linhas_entrada=len(df_final)) as span:
+        df_final = imputar_com_nsrdb(df_final)
+
+        # Buracos minúsculos que sobraram nas medições são interpolados. A
+        # irradiação já teve as lacunas curtas preenchidas no controle de
+        # qualidade; as longas ficam NaN e a linha sai do dataset.
+        colunas_numericas = [col for col in df_final.select_dtypes('number').columns
+                             if col not in COLUNAS_IRRADIACAO + [COLUNA_QC]]
+        df_final = interpolar_por_estacao(df_final, colunas_numericas, limit_direction='both')
+        df_final.dropna(inplace=True)
+        span.linhas_saida = len(df_final)
+
+    with etapa('features', linhas_entrada=len(df_final)) as span:
+        for coluna, valores in features_calendario(df_final.index.hour, df_final.index.dayofyear).items():
+            df_final[coluna] = valores
+        df_final = adicionar_geometria_solar(df_final, tabela_estacoes)
+
+        df_final = adicionar_features_temporais(df_final, especificacao)
+        if especificacao_vizinhos is not None:
+            if indice_vizinhos is None:
+                indice_vizinhos = IndiceVizinhos(tabela_estacoes, pd.unique(df_nsrdb['codigo_estacao']),
+                                                 especificacao_vizinhos['k'])
+            df_final = adicionar_features_vizinhos(df_final, df_nsrdb, indice_vizinhos, especificacao_vizinhos)
+        df_final.dropna(inplace=True)
+        df_final = aplicar_politica_tipos(df_final)
+        span.linhas_saida = len(df_final)
+    return df_final
+
+
+def separar_xy(df_final, tabela_estacoes):
+    """
+    Cola as coordenadas das estações e devolve {divisao: (X, y)} segundo os
+    intervalos de DIVISOES. As features são todas as colunas fora de
+    COLUNAS_NAO_FEATURES, com as coordenadas primeiro.
+    """
+    df_final = adicionar_coordenadas(df_final, tabela_estacoes)
+    features = [col for col in df_final.columns if col not in COLUNAS_NAO_FEATURES]
+
+    divisoes = {}
+    for divisao, (inicio, fim) in DIVISOES.items():
+        mascara = np.ones(len(df_final), dtype=bool)
+        if inicio is not None:
+            mascara &= df_final.index >= pd.Timestamp(inicio)
+        if fim is not None:
+            mascara &= df_final.index < pd.Timestamp(fim)
+        df_divisao = df_final.loc[mascara]
+        divisoes[divisao] = (df_divisao[features], df_divisao[TARGETS])
+    return divisoes
+
+
+# --- 3. MODO STREAMING ---
+#
+# Em vez de montar o quadro de todas as estações de uma vez, processa um bloco
+# por vez (uma estação, ou uma estação-ano) e grava o resultado logo em
+# seguida: no dataset final (partições da estação/ano do bloco) e como novos
+# row groups nos arquivos X/y. O pico de memória passa a ser o de um bloco.
+#
+# Blocos por ano leem também as últimas horas do ano anterior (aquecimento),
+# para que os lags e as janelas móveis do começo do ano saiam completos;
+# essas horas são descartadas antes de gravar. Falhas do INMET que cruzam a
+# virada do ano são interpoladas só com o lado de dentro do bloco, então o
+# resultado idêntico ao modo completo é o dos blocos por estação.
+#
+# Com features de vizinhos, cada bloco lê da NSRDB também as estações
+# vizinhas da sua (o índice é montado uma vez, com todas as estações do
+# dataset da NSRDB, como no modo completo).
+
+def aquecimento_features(especificacao=ESPECIFICACAO_FEATURES, especificacao_vizinhos=None):
+    """Histórico que um bloco precisa ler antes do seu início: o maior lag ou janela da especificação, em horas."""
+    alcances = [max(spec.get('lags', []) + spec.get('janelas', []), default=0) for spec in especificacao.values()]
+    if especificacao_vizinhos is not None:
+        alcances.append(alcance_vizinhos(especificacao_vizinhos))
+    return pd.Timedelta(hours=max(alcances, default=0))
+
+
+def blocos_streaming(caminho_inmet=CAMINHO_INMET, por_ano=False, estacoes=None):
+    """
+    Gera (codigo_estacao, inicio, fim) de cada bloco, a partir das partições do
+    dataset do INMET. Com por_ano=False cada estação é um bloco e inicio/fim são None.
+    """
+    particoes = particoes_dataset(caminho_inmet, estacoes)
+    if por_ano:
+        for codigo_estacao, ano in particoes:
+            yield codigo_estacao, pd.Timestamp(year=ano, month=1, day=1), pd.Timestamp(year=ano + 1, month=1, day=1)
+    else:
+        for codigo_estacao in sorted({codigo for codigo, _ in particoes}):
+            yield codigo_estacao, None, None
+
+
+class GravadorParquet:
+    """
+    Grava um arquivo Parquet aos pedaços: cada DataFrame recebido vira um novo
+    row group, sem manter os anteriores em memória. Um arquivo antigo em
+    'caminho' é apagado na criação do gravador.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.linhas = 0
+        self._escritor = None
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+    def escrever(self, df):
+        if df.empty:
+            return
+        tabela = pa.Table.from_pandas(df)
+        if self._escritor is None:
+            self._escritor = pq.ParquetWriter(self.caminho, tabela.schema)
+        else:
+            tabela = tabela.cast(self._escritor.schema)
+        self._escritor.write_table(tabela)
+        self.linhas += len(df)
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+        else:
+            print(f"AVISO: nenhuma linha para '{self.caminho}'; o arquivo não foi gerado.")
+
+
+def montar_em_streaming(tabela_estacoes, por_ano=False, estacoes=None, especificacao=ESPECIFICACAO_FEATURES,
+                        caminho_inmet=CAMINHO_INMET, caminho_nsrdb=CAMINHO_NSRDB,
+                        caminho_saida=CAMINHO_DATAFRAME, arquivos_xy=ARQUIVOS_XY, especificacao_vizinhos=None):
+    """
+    Monta o dataset final e os arquivos X/y bloco a bloco (ver acima) e devolve
+    (linhas gravadas no dataset final, {divisao: linhas}).
+    """
+    aquecimento = aquecimento_features(especificacao, especificacao_vizinhos)
+    indice_vizinhos = None
+    if especificacao_vizinhos is not None:
+        estacoes_nsrdb = sorted({codigo for codigo, _ in particoes_dataset(caminho_nsrdb)})
+        indice_vizinhos = IndiceVizinhos(tabela_estacoes, estacoes_nsrdb, especificacao_vizinhos['k'])
+    fim_com_alvo = pd.Timestamp(DIVISOES['teste'][1])
+    gravadores = {divisao: (GravadorParquet(caminho_x), GravadorParquet(caminho_y))
+                  for divisao, (caminho_x, caminho_y) in arquivos_xy.items()}
+    # Cada bloco só substitui as próprias partições: o dataset antigo sai
+    # inteiro antes, como os arquivos X/y nos gravadores
+    apagar_dataset(caminho_saida)
+
+    linhas_dataset = 0
+    try:
+        for codigo_estacao, inicio, fim in blocos_streaming(caminho_inmet, por_ano, estacoes):
+            rotulo = codigo_estacao if inicio is None else f"{codigo_estacao}/{inicio.year}"
+            with etapa('bloco', bloco=rotulo) as span:
+                print(f"\n--- Bloco {rotulo} ---")
+
+                inicio_leitura = inicio - aquecimento if inicio is not None else None
+                df_inmet = carregar_dataset(caminho_inmet, estacoes=[codigo_estacao], inicio=inicio_leitura, fim=fim)
+                estacoes_nsrdb = [codigo_estacao]
+                if indice_vizinhos is not None:
+                    estacoes_nsrdb += indice_vizinhos.vizinhos_de(codigo_estacao)
+                df_nsrdb = carregar_dataset(caminho_nsrdb, estacoes=estacoes_nsrdb, inicio=inicio_leitura, fim=fim)
+                if df_inmet.empty or df_nsrdb.empty:
+                    print(f"AVISO: bloco {rotulo} sem dados do INMET ou da NSRDB. Pulando.")
+                    continue
+
+                span.linhas_entrada = len(df_inmet) + len(df_nsrdb)
+                df_bloco = montar_dataframe(df_inmet, df_nsrdb, tabela_estacoes, especificacao,
+                                            especificacao_vizinhos, indice_vizinhos)
+                del df_inmet, df_nsrdb
+                if inicio is not None:
+                    df_bloco = df_bloco.loc[df_bloco.index >= inicio]
+                if df_bloco.empty:
+                    continue
+
+                salvar_dataset(df_bloco, caminho_saida)
+                linhas_dataset += len(df_bloco)
+                span.linhas_saida = len(df_bloco)
+
+                df_bloco = df_bloco.loc[df_bloco.index < fim_com_alvo]
+                for divisao, (X, y) in separar_xy(df_bloco, tabela_estacoes).items():
+                    gravador_x, gravador_y = gravadores[divisao]
+                    gravador_x.escrever(X)
+                    gravador_y.escrever(y)
+                print(f"Bloco {rotulo}: {len(df_bloco)} linhas gravadas | pico de RSS até aqui: {pico_rss_mb():.0f} MB")
+    finally:
+        for gravador_x, gravador_y in gravadores.values():
+            gravador_x.fechar()
+            gravador_y.fechar()
+
+    return linhas_dataset, {divisao: gravador_x.linhas for divisao, (gravador_x, _) in gravadores.items()}
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# --- 1. ESQUEMA DOS ARQUIVOS DA NSRDB ---
+
+# Mapeamento das colunas originais da NSRDB para os nossos nomes
+MAPEAMENTO_COLUNAS_NSRDB = {
+    'GHI': 'ghi',
+    'DNI': 'dni',
+    'DHI': 'dhi',
+    'Temperature': 'temp_ar_nsrdb',
+    'Relative Humidity': 'umidade_rel_nsrdb',
+    'Wind Speed': 'vento_vel_nsrdb',
+    'Cloud Type': 'tipo_nuvem_nsrdb', # Nomeado para clareza
+    'Pressure': 'pressao_nsrdb'
+}
+
+COLUNAS_TEMPO_NSRDB = ['Year', 'Month', 'Day', 'Hour', 'Minute']
+
+# Tipos usados já na leitura (política de tipos em solar_ia/tipos.py)
+TIPOS_COLUNAS_NSRDB = {
+    **{col: 'int16' for col in COLUNAS_TEMPO_NSRDB},
+    **{col: 'float32' for col in MAPEAMENTO_COLUNAS_NSRDB},
+    'Cloud Type': 'int8',
+}
+
+# Lista final de colunas que queremos no nosso DataFrame. As coordenadas
+# ficam na tabela de estações (solar_ia/estacoes.py), não em cada linha.
+COLUNAS_FINAIS_NSRDB = [
+    'codigo_estacao',
+    'ghi',
+    'dni',
+    'dhi',
+    'temp_ar_nsrdb',
+    'umidade_rel_nsrdb',
+    'vento_vel_nsrdb',
+    'tipo_nuvem_nsrdb',
+    'pressao_nsrdb'
+]
+
+# Versão do formato das partições em cache. Mude este valor sempre que a
+# leitura de um arquivo anual mudar (colunas, tipos...) para invalidar o cache.
+VERSAO_CACHE_NSRDB = 2
+NOME_MANIFESTO = 'manifesto.json'
+
+
+# --- 2. LEITURA DE UM ARQUIVO ANUAL ---
+
+def ler_arquivo_nsrdb(caminho_arquivo):
+    """
+    Lê um CSV anual da NSRDB e devolve um DataFrame indexado por 'timestamp'
+    com as colunas já renomeadas e tipadas (medições em float32, tipo de nuvem em int8).
+    """
+    df_ano = pd.read_csv(
+        caminho_arquivo,
+        skiprows=2,
+        usecols=COLUNAS_TEMPO_NSRDB + list(MAPEAMENTO_COLUNAS_NSRDB),
+        dtype=TIPOS_COLUNAS_NSRDB,
+    )
+    df_ano.index = pd.DatetimeIndex(pd.to_datetime(df_ano[COLUNAS_TEMPO_NSRDB]), name='timestamp')
+    df_ano = df_ano.rename(columns=MAPEAMENTO_COLUNAS_NSRDB)
+    return df_ano[list(MAPEAMENTO_COLUNAS_NSRDB.values())]
+
+
+def listar_arquivos_estacao(caminho_pasta_estacao):
+    """Lista, em ordem, os CSVs anuais dentro da pasta de uma estação."""
+    return [os.path.join(caminho_pasta_estacao, nome_arquivo)
+            for nome_arquivo in sorted(os.listdir(caminho_pasta_estacao))
+            if nome_arquivo.endswith('.csv')]
+
+
+def montar_estacao_nsrdb(lista_dfs_anuais, codigo_estacao):
+    """Concatena os anos de uma estação e adiciona o código (em maiúsculas, como no INMET)."""
+    df_nsrdb = pd.concat(lista_dfs_anuais)
+    df_nsrdb['codigo_estacao'] = codigo_estacao.upper()
+    return df_nsrdb.reindex(columns=COLUNAS_FINAIS_NSRDB)
+
+
+# --- 3. CACHE INCREMENTAL ---
+
+def hash_arquivo(caminho_arquivo, tamanho_bloco=1 << 20):
+    """SHA-256 do conteúdo de um arquivo, lido em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class CacheNSRDB:
+    """
+    Cache de partições Parquet, uma por arquivo anual da NSRDB.
+
+    O manifesto guarda, para cada CSV, tamanho, mtime e hash do conteúdo. Um
+    arquivo com tamanho e mtime inalterados é considerado igual sem reler nada;
+    se só o mtime mudou, o hash decide se é preciso converter de novo.
+    """
+
+    def __init__(self, pasta_cache):
+        self.pasta_cache = pasta_cache
+        self.caminho_manifesto = os.path.join(pasta_cache, NOME_MANIFESTO)
+        self.manifesto = self._carregar_manifesto()
+        self.convertidos = 0
+        self.reaproveitados = 0
+
+    def _carregar_manifesto(self):
+        try:
+            with open(self.caminho_manifesto, encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if manifesto.get('versao') != VERSAO_CACHE_NSRDB:
+            return {}
+        return manifesto.get('arquivos', {})
+
+    def salvar_manifesto(self):
+        os.makedirs(self.pasta_cache, exist_ok=True)
+        temporario = self.caminho_manifesto + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'versao': VERSAO_CACHE_NSRDB, 'arquivos': self.manifesto}, arquivo, indent=2, sort_keys=True)
+        os.replace(temporario, self.caminho_manifesto)
+
+    def _caminho_particao(self, codigo_estacao, caminho_csv):
+        nome = os.path.splitext(os.path.basename(caminho_csv))[0] + '.parquet'
+        return os.path.join(self.pasta_cache, codigo_estacao, nome)
+
+    def _entrada_valida(self, entrada, caminho_csv, info):
+        if entrada is None or not os.path.exists(entrada['particao']):
+            return False
+        if entrada['tamanho'] == info.st_size and entrada['mtime_ns'] == info.st_mtime_ns:
+            return True
+        if entrada['tamanho'] != info.st_size:
+            return False
+        # Mesmo tamanho, mtime diferente (ex.: arquivo copiado de novo): o hash decide
+        if hash_arquivo(caminho_csv) == entrada['sha256']:
+            entrada['mtime_ns'] = info.st_mtime_ns
+            return True
+        return False
+
+    def particao(self, codigo_estacao, caminho_csv):
+        """
+        Devolve o caminho da partição Parquet de um CSV anual, convertendo o CSV
+        apenas se ele for novo ou tiver mudado desde a última execução.
+        """
+        chave = os.path.abspath(caminho_csv)
+        info = os.stat(caminho_csv)
+        entrada = self.manifesto.get(chave)
+
+        if self._entrada_valida(entrada, caminho_csv, info):
+            self.reaproveitados += 1
+            return entrada['particao']
+
+        print(f"Convertendo arquivo: {os.path.basename(caminho_csv)}...")
+        caminho_particao = self._caminho_particao(codigo_estacao, caminho_csv)
+        os.makedirs(os.path.dirname(caminho_particao), exist_ok=True)
+        ler_arquivo_nsrdb(caminho_csv).to_parquet(caminho_particao)
+
+        self.manifesto[chave] = {
+            'estacao': codigo_estacao,
+            'tamanho': info.st_size,
+            'mtime_ns': info.st_mtime_ns,
+            'sha256': hash_arquivo(caminho_csv),
+            'particao': caminho_particao,
+        }
+        self.convertidos += 1
+        return caminho_particao
+
+    def remover_ausentes(self, estacoes, caminhos_csv_atuais):
+        """Apaga do cache as partições das 'estacoes' cujos CSVs não existem mais."""
+        atuais = {os.path.abspath(caminho) for caminho in caminhos_csv_atuais}
+        obsoletas = [chave for chave, entrada in self.manifesto.items()
+                     if entrada['estacao'] in estacoes and chave not in atuais]
+        for chave in obsoletas:
+            entrada = self.manifesto.pop(chave)
+            if os.path.exists(entrada['particao']):
+                os.remove(entrada['particao'])
+
+
+def ler_estacoes_nsrdb(pasta_dados, estacoes, pasta_cache=None):
+    """
+    Lê as 'estacoes' (nomes das subpastas, ex.: 'a304') da NSRDB e devolve o
+    DataFrame mestre ordenado.
+
+    Com 'pasta_cache', cada CSV anual é convertido uma única vez para Parquet
+    e o DataFrame mestre é montado só a partir das partições em cache.
+    """
+    cache = CacheNSRDB(pasta_cache) if pasta_cache else None
+    caminhos_vistos = []
+    lista_de_dataframes_nsrdb = []
+
+    for codigo_estacao in estacoes:
+        caminho_pasta_estacao = os.path.join(pasta_dados, codigo_estacao)
+        print(f"--- Processando Estação: {codigo_estacao.upper()} ---")
+
+        if not os.path.isdir(caminho_pasta_estacao):
+            print(f"AVISO: A pasta '{caminho_pasta_estacao}' não foi encontrada. Pulando estação.")
+            continue
+
+        lista_dfs_anuais = []
+        for caminho_ano in listar_arquivos_estacao(caminho_pasta_estacao):
+            caminhos_vistos.append(caminho_ano)
+            try:
+                if cache is None:
+                    print(f"Lendo arquivo: {os.path.basename(caminho_ano)}...")
+                    lista_dfs_anuais.append(ler_arquivo_nsrdb(caminho_ano))
+                else:
+                    lista_dfs_anuais.append(pd.read_parquet(cache.particao(codigo_estacao, caminho_ano)))
+            except Exception as e:
+                print(f"ERRO ao ler o arquivo {os.path.basename(caminho_ano)}: {e}")
+
+        if lista_dfs_anuais:
+            lista_de_dataframes_nsrdb.append(montar_estacao_nsrdb(lista_dfs_anuais, codigo_estacao))
+
+    if cache is not None:
+        cache.remover_ausentes(set(estacoes), caminhos_vistos)
+        cache.salvar_manifesto()
+        print(f"\nCache NSRDB: {cache.convertidos} arquivo(s) convertido(s), "
+              f"{cache.reaproveitados} reaproveitado(s).")
+
+    df_master_nsrdb = pd.concat(lista_de_dataframes_nsrdb)
+    df_master_nsrdb.sort_index(inplace=True, kind='stable')
+    return df_master_nsrdb
@@ -0,0 +1,243 @@
+import numpy as np
+import pandas as pd
+
+from solar_ia.dataset import COLUNAS_NAO_FEATURES, FEATURES_ESTACAO
+from solar_ia.features import (
+    COLUNAS_CALENDARIO, ESPECIFICACAO_FEATURES, colunas_geradas, features_calendario, nome_janela, nome_lag,
+)
+from solar_ia.grade import HORA, GradeHoraria
+from solar_ia.solar import COLUNAS_SOLARES, coordenadas_estacao, geometria_estacao_ano, geometria_solar
+
+# --- 1. CONTRATO DAS OBSERVAÇÕES ---
+
+# Colunas de uma observação horária já limpa (INMET imputado com a NSRDB), na
+# ordem do dataset final antes das features. Os alvos e 'dhi' entram só como
+# histórico (lags e janelas), não como feature da própria hora.
+COLUNAS_OBSERVACAO = [
+    'temp_ar', 'umidade_rel', 'pressao_atm_estacao', 'vento_vel', 'vento_dir', 'precipitacao',
+    'ghi', 'dni', 'dhi', 'tipo_nuvem_nsrdb',
+]
+
+# Com os valores deslocados por uma referência, soma e soma dos quadrados das
+# janelas acumulam pouco erro; mesmo assim elas são refeitas a partir do buffer
+# a cada RESSINCRONIZAR_JANELAS registros da estação.
+RESSINCRONIZAR_JANELAS = 1000
+
+
+def colunas_features(especificacao=ESPECIFICACAO_FEATURES):
+    """Colunas de X na ordem do pipeline em lote (separar_xy / carregar_xy)."""
+    base = [col for col in COLUNAS_OBSERVACAO if col not in COLUNAS_NAO_FEATURES]
+    return FEATURES_ESTACAO + base + COLUNAS_CALENDARIO + COLUNAS_SOLARES + colunas_geradas(especificacao)
+
+
+# --- 2. ESTADO DE UMA ESTAÇÃO ---
+
+class _EstadoEstacao:
+    """
+    Buffer circular com os últimos 'capacidade' registros das colunas da
+    especificação e, para cada janela móvel, a soma, a soma dos quadrados
+    (deslocadas pela referência) e quantos NaN ela contém.
+    """
+
+    def __init__(self, colunas, janelas, capacidade):
+        self.capacidade = capacidade
+        self.buffer = np.full((capacidade, len(colunas)), np.nan)
+        self.posicao = 0
+        self.registros = 0
+        self.ultimo_timestamp = None
+        # janelas: [(índice da coluna, tamanho)]; estatísticas: [soma, soma dos quadrados, NaN, referência]
+        self.janelas = janelas
+        self.estatisticas = np.zeros((len(janelas), 4))
+
+    def valor(self, atras, indice):
+        """Valor de 'atras' registros antes do próximo (1 = o último inserido), ou NaN."""
+        if atras > self.registros:
+            return np.nan
+        return self.buffer[(self.posicao - atras) % self.capacidade, indice]
+
+    def media_std(self, k):
+        indice, tamanho = self.janelas[k]
+        soma, soma_quadrados, nans, referencia = self.estatisticas[k]
+        if self.registros < tamanho or nans:
+            return np.nan, np.nan
+        media = soma / tamanho
+        variancia = max(soma_quadrados - soma * media, 0.0) / (tamanho - 1)
+        return media + referencia, np.sqrt(variancia)
+
+    def _ressincronizar(self):
+        for k, (indice, tamanho) in enumerate(self.janelas):
+            valores = np.array([self.valor(atras, indice) for atras in range(1, min(tamanho, self.registros) + 1)])
+            validos = valores[~np.isnan(valores)]
+            referencia = validos[0] if len(validos) else 0.0
+            self.estatisticas[k] = [np.sum(validos - referencia), np.sum((validos - referencia) ** 2),
+                                    len(valores) - len(validos), referencia]
+
+    def inserir(self, valores):
+        for k, (indice, tamanho) in enumerate(self.janelas):
+            estatisticas = self.estatisticas[k]
+            if self.registros == 0 and not np.isnan(valores[indice]):
+                estatisticas[3] = valores[indice]
+            referencia = estatisticas[3]
+            for valor, sinal in ((valores[indice], 1.0), (self.valor(tamanho, indice), -1.0)):
+                if sinal < 0 and tamanho > self.registros:
+                    continue
+                if np.isnan(valor):
+                    estatisticas[2] += sinal
+                else:
+                    desvio = valor - referencia
+                    estatisticas[0] += sinal * desvio
+                    estatisticas[1] += sinal * desvio * desvio
+
+        self.buffer[self.posicao] = valores
+        self.posicao = (self.posicao + 1) % self.capacidade
+        self.registros += 1
+        if self.registros % RESSINCRONIZAR_JANELAS == 0:
+            self._ressincronizar()
+
+
+# --- 3. FEATURE STORE ONLINE ---
+
+class EstadoFeaturesOnline:
+    """
+    Features de uma hora a partir do fluxo de observações de cada estação, sem
+    reprocessar o histórico: cada estação guarda só os últimos registros
+    necessários para os lags e as janelas (o maior alcance da especificação),
+    e cada nova observação custa O(1).
+
+    Lags e janelas contam horas da própria estação, como
+    adicionar_features_temporais: as horas puladas entre duas observações
+    entram no buffer como NaN, e as janelas terminam na hora anterior.
+    """
+
+    def __init__(self, tabela_estacoes, especificacao=ESPECIFICACAO_FEATURES):
+        self.tabela_estacoes = tabela_estacoes
+        self.especificacao = especificacao
+        self.colunas = colunas_features(especificacao)
+        self._colunas_historico = list(especificacao)
+        self._colunas_base = [col for col in COLUNAS_OBSERVACAO if col not in COLUNAS_NAO_FEATURES]
+
+        self._lags = []
+        self._janelas = []
+        self._saidas_janelas = []
+        for indice, (coluna, spec) in enumerate(especificacao.items()):
+            self._lags += [(indice, lag) for lag in spec.get('lags', [])]
+            for janela in spec.get('janelas', []):
+                self._janelas.append((indice, janela))
+                self._saidas_janelas.append([estatistica for estatistica in spec.get('estatisticas', [])])
+        self.capacidade = max([lag for _, lag in self._lags] + [janela for _, janela in self._janelas], default=1)
+
+        self._posicoes = {nome: i for i, nome in enumerate(self.colunas)}
+        self._indices_lags = [self._posicoes[nome_lag(coluna, lag)] for coluna, spec in especificacao.items()
+                              for lag in spec.get('lags', [])]
+        self._estacoes = {}
+        self._coordenadas = {}
+
+    def _estado(self, codigo_estacao):
+        if codigo_estacao not in self._estacoes:
+            latitude, longitude, fuso = coordenadas_estacao(self.tabela_estacoes, codigo_estacao)
+            linha = self.tabela_estacoes.loc[codigo_estacao]
+            features_estacao = np.array([linha[col] for col in FEATURES_ESTACAO], dtype=np.float32)
+            self._coordenadas[codigo_estacao] = (latitude, longitude, fuso, features_estacao)
+            self._estacoes[codigo_estacao] = _EstadoEstacao(self._colunas_historico, self._janelas, self.capacidade)
+        return self._estacoes[codigo_estacao]
+
+    def _geometria(self, codigo_estacao, timestamp):
+        latitude, longitude, fuso, _ = self._coordenadas[codigo_estacao]
+        segundos = ((timestamp.dayofyear - 1) * 24 + timestamp.hour) * 3600 + timestamp.minute * 60 + timestamp.second
+        if segundos % 3600 == 0:
+            return geometria_estacao_ano(latitude, longitude, fuso, timestamp.year)[segundos // 3600]
+        direta = geometria_solar([timestamp], latitude, longitude, fuso)
+        return np.array([direta[coluna][0] for coluna in COLUNAS_SOLARES])
+
+    def atualizar(self, codigo_estacao, timestamp, observacao):
+        """
+        Registra a 'observacao' ({coluna: valor} com as COLUNAS_OBSERVACAO) da
+        estação na hora 'timestamp' e devolve o vetor de features dessa hora
+        (float32, na ordem de 'colunas'), ou None enquanto o histórico da
+        estação não cobre todos os lags e janelas.
+        """
+        codigo_estacao = str(codigo_estacao).upper()
+        timestamp = pd.Timestamp(timestamp)
+        estado = self._estado(codigo_estacao)
+        if estado.ultimo_timestamp is not None:
+            if timestamp <= estado.ultimo_timestamp:
+                raise ValueError(f"Observação fora de ordem para '{codigo_estacao}': "
+                                 f"{timestamp} não é posterior a {estado.ultimo_timestamp}.")
+            horas, resto = divmod(timestamp - estado.ultimo_timestamp, HORA)
+            if resto:
+                raise ValueError(f"Observação fora da grade horária para '{codigo_estacao}': "
+                                 f"{timestamp} não está a horas cheias de {estado.ultimo_timestamp}.")
+            # Horas sem observação: NaN no buffer (além da capacidade, o buffer já é todo NaN)
+            lacuna = np.full(len(self._colunas_historico), np.nan)
+            for _ in range(min(horas - 1, self.capacidade)):
+                estado.inserir(lacuna)
+
+        vetor = np.empty(len(self.colunas))
+        _, _, _, features_estacao = self._coordenadas[codigo_estacao]
+        n = len(FEATURES_ESTACAO)
+        vetor[:n] = features_estacao
+        for coluna in self._colunas_base:
+            vetor[n] = observacao[coluna]
+            n += 1
+        for valor in features_calendario(timestamp.hour, timestamp.dayofyear).values():
+            vetor[n] = valor
+            n += 1
+        vetor[n:n + len(COLUNAS_SOLARES)] = self._geometria(codigo_estacao, timestamp)
+
+        for posicao, (indice, lag) in zip(self._indices_lags, self._lags):
+            vetor[posicao] = estado.valor(lag, indice)
+        for k, ((indice, janela), estatisticas) in enumerate(zip(self._janelas, self._saidas_janelas)):
+            media, desvio = estado.media_std(k)
+            coluna = self._colunas_historico[indice]
+            for estatistica in estatisticas:
+                vetor[self._posicoes[nome_janela(coluna, estatistica, janela)]] = media if estatistica == 'media' else desvio
+
+        estado.inserir(np.array([observacao[coluna] for coluna in self._colunas_historico], dtype=np.float64))
+        estado.ultimo_timestamp = timestamp
+
+        vetor = vetor.astype(np.float32)
+        return None if np.isnan(vetor).any() else vetor
+
+    def aquecer(self, df):
+        """
+        Prepara o estado das estações com o histórico de 'df' (indexado por
+        timestamp, com 'codigo_estacao'), que precisa ser posterior ao que cada
+        estação já recebeu. O resultado é o de passar as observações por
+        atualizar(), mas sem percorrê-las: o histórico vai para uma grade
+        estação × hora (solar_ia/grade.py) e só as últimas 'capacidade' horas
+        de cada estação, lidas por fatia, entram no buffer.
+        """
+        if df.empty:
+            return self
+        grade = GradeHoraria.de_quadro(df, self._colunas_historico)
+        primeiras, ultimas = grade.extremos_ocupados()
+        for linha, codigo_estacao in enumerate(grade.estacoes):
+            codigo_estacao = codigo_estacao.upper()
+            estado = self._estado(codigo_estacao)
+            primeira_registro = grade.inicio + int(primeiras[linha]) * HORA
+            # Horas a inserir: as últimas 'capacidade', sem começar antes do primeiro registro
+            primeira = max(int(ultimas[linha]) - self.capacidade + 1, int(primeiras[linha]))
+            inicio = grade.inicio + primeira * HORA
+            fim = grade.inicio + (int(ultimas[linha]) + 1) * HORA
+
+            if estado.ultimo_timestamp is not None:
+                if primeira_registro <= estado.ultimo_timestamp:
+                    raise ValueError(f"Histórico fora de ordem para '{codigo_estacao}': {primeira_registro} "
+                                     f"não é posterior a {estado.ultimo_timestamp}.")
+                horas, resto = divmod(inicio - estado.ultimo_timestamp, HORA)
+                if resto:
+                    raise ValueError(f"Histórico fora da grade horária para '{codigo_estacao}'.")
+                lacuna = np.full(len(self._colunas_historico), np.nan)
+                for _ in range(min(horas - 1, self.capacidade)):
+                    estado.inserir(lacuna)
+
+            valores = np.column_stack([grade.fatia(coluna, inicio, fim)[grade.estacoes[linha]].to_numpy(np.float64)
+                                       for coluna in self._colunas_historico])
+            for valores_hora in valores:
+                estado.inserir(valores_hora)
+            estado.ultimo_timestamp = fim - HORA
+        return self
+
+    def quadro(self, vetores):
+        """Empilha vetores de atualizar() num DataFrame com as colunas de X."""
+        return pd.DataFrame(np.vstack(vetores), columns=self.colunas)
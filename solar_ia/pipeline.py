@@ -0,0 +1,418 @@
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from solar_ia.dataset import (
+    CAMINHO_DATAFRAME, CAMINHO_ESTACOES, CAMINHO_INMET, CAMINHO_NSRDB, DIVISOES, TARGETS,
+)
+from solar_ia.features import ESPECIFICACAO_FEATURES
+from solar_ia.floresta import PRESETS_RF
+from solar_ia.montagem import ARQUIVOS_XY
+from solar_ia.vizinhos import ESPECIFICACAO_VIZINHOS
+
+# --- 1. ESTÁGIOS ---
+#
+# Cada estágio é um dos scripts da raiz, com o que ele lê (entradas), o que
+# grava (saídas), os estágios de que depende, o código de solar_ia/ que ele
+# usa (os módulos que o script importa, direta ou indiretamente, achados
+# pelos imports no código-fonte) e os parâmetros que mudam o resultado: constantes da configuração do
+# próprio script (lidas do código-fonte, sem executá-lo) e valores da
+# biblioteca, como ESPECIFICACAO_FEATURES e DIVISOES.
+#
+# Tudo isso é reduzido a hashes de conteúdo. Um estágio só roda de novo se
+# algum hash mudou desde a última execução bem-sucedida (gravada em
+# CAMINHO_ESTADO_PIPELINE) ou se uma saída sumiu ou foi alterada por fora.
+# Como as saídas de um estágio são as entradas do seguinte, um estágio que
+# roda e grava exatamente o mesmo conteúdo não faz os seguintes rodarem.
+#
+# Uma saída pode ser de mais de um estágio: df-inmet.py e df-nsrdb.py gravam
+# cada um as suas colunas da tabela de estações (CAMINHO_ESTACOES), mescladas
+# sob uma trava (solar_ia/estacoes.py), e podem rodar ao mesmo tempo. Quando
+# um deles termina, o hash novo da tabela vale também para o registro do outro.
+CAMINHO_ESTADO_PIPELINE = 'data/pipeline/estado.json'
+PASTA_LOGS_PIPELINE = 'data/pipeline/logs'
+
+TAMANHO_HASH = 16
+
+# Pacote cujos módulos entram no hash do código dos estágios
+PACOTE = 'solar_ia'
+
+
+class Estagio:
+    """Um script do pipeline e o que ele lê, grava e usa (ver acima)."""
+
+    def __init__(self, nome, script, entradas=(), saidas=(), depende=(), constantes=(), parametros=None):
+        self.nome = nome
+        self.script = script
+        self.entradas = list(entradas)
+        self.saidas = list(saidas)
+        self.depende = list(depende)
+        self.constantes = list(constantes)
+        self.parametros = dict(parametros or {})
+
+    @property
+    def codigo(self):
+        """O script e os módulos de solar_ia/ que ele importa (lidos a cada consulta: o código pode mudar)."""
+        return [self.script] + modulos_importados(self.script)
+
+    def parametros_atuais(self):
+        """Parâmetros da biblioteca mais as constantes de configuração do script."""
+        return {**self.parametros, **constantes_script(self.script, self.constantes)}
+
+
+ESTAGIOS = [
+    Estagio(
+        'df-inmet', 'df-inmet.py',
+        entradas=['data/inmet'], saidas=[CAMINHO_INMET, CAMINHO_ESTACOES],
+        constantes=['PASTA_DOS_DADOS', 'ESTACOES'],
+    ),
+    Estagio(
+        'df-nsrdb', 'df-nsrdb.py',
+        entradas=['data/nsrdb'], saidas=[CAMINHO_NSRDB, CAMINHO_ESTACOES],
+        constantes=['PASTA_DADOS_NSRDB', 'ESTACOES', 'MODO_INCREMENTAL'],
+    ),
+    Estagio(
+        'dataframe', 'dataframe.py',
+        entradas=[CAMINHO_INMET, CAMINHO_NSRDB, CAMINHO_ESTACOES],
+        saidas=[CAMINHO_DATAFRAME] + [caminho for arquivos in ARQUIVOS_XY.values() for caminho in arquivos],
+        depende=['df-inmet', 'df-nsrdb'],
+        constantes=['MODO_STREAMING', 'BLOCOS_POR_ANO', 'ESTACOES', 'FEATURES_VIZINHOS'],
+        parametros={'especificacao_features': ESPECIFICACAO_FEATURES, 'especificacao_vizinhos': ESPECIFICACAO_VIZINHOS,
+                    'divisoes': DIVISOES},
+    ),
+    Estagio(
+        'train-random-forest', 'train-random-forest.py',
+        entradas=[CAMINHO_DATAFRAME, CAMINHO_ESTACOES], saidas=['training/random_forest_model.joblib'],
+        depende=['dataframe'],
+        constantes=['SOMENTE_DIA', 'PRESET_RF', 'MAX_ARVORES', 'LOTE_ARVORES', 'PACIENCIA_LOTES'],
+        parametros={'divisoes': DIVISOES, 'alvos': TARGETS, 'presets_rf': PRESETS_RF},
+    ),
+    Estagio(
+        'train-xgboost', 'train-xgboost.py',
+        entradas=[CAMINHO_DATAFRAME, CAMINHO_ESTACOES, 'training/busca_xgb.jsonl'],
+        saidas=['training/xgb_model.joblib'],
+        depende=['dataframe'],
+        constantes=['SOMENTE_DIA', 'ESTRATEGIA_XGB', 'PARAMETROS_XGB', 'USAR_MELHOR_BUSCA'],
+        parametros={'divisoes': DIVISOES, 'alvos': TARGETS},
+    ),
+    Estagio(
+        'plot-predict', 'plot-predict.py',
+        entradas=[CAMINHO_DATAFRAME, CAMINHO_ESTACOES, 'training/random_forest_model.joblib',
+                  'training/xgb_model.joblib'],
+        saidas=['training/previsoes.png'],
+        depende=['train-random-forest', 'train-xgboost'],
+        constantes=['START_DATE', 'END_DATE', 'ESTACOES'],
+    ),
+]
+
+
+def _imports_solar_ia(caminho):
+    """Nomes dos módulos de solar_ia importados em 'caminho' (em qualquer lugar do arquivo)."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read(), filename=caminho)
+    modulos = set()
+    for no in ast.walk(arvore):
+        if isinstance(no, ast.ImportFrom) and no.module and no.level == 0:
+            partes = no.module.split('.')
+            if partes[0] != PACOTE:
+                continue
+            if len(partes) > 1:
+                modulos.add(partes[1])
+            else:
+                # from solar_ia import modulo
+                modulos.update(alias.name for alias in no.names)
+        elif isinstance(no, ast.Import):
+            for alias in no.names:
+                partes = alias.name.split('.')
+                if partes[0] == PACOTE and len(partes) > 1:
+                    modulos.add(partes[1])
+    return modulos
+
+
+def modulos_importados(script):
+    """
+    Caminhos dos módulos de solar_ia/ de que 'script' depende: o fecho dos
+    imports do script e, recursivamente, dos módulos importados, em ordem.
+    """
+    pasta_pacote = os.path.join(os.path.dirname(script), PACOTE)
+    encontrados = set()
+    pendentes = [script]
+    while pendentes:
+        for modulo in _imports_solar_ia(pendentes.pop()):
+            caminho = os.path.join(pasta_pacote, f'{modulo}.py')
+            if modulo not in encontrados and os.path.exists(caminho):
+                encontrados.add(modulo)
+                pendentes.append(caminho)
+    return [os.path.join(pasta_pacote, f'{modulo}.py') for modulo in sorted(encontrados)]
+
+
+def constantes_script(caminho, nomes):
+    """
+    Valores das constantes 'nomes' atribuídas no nível de módulo do script,
+    lidos do código-fonte. Literais viram valores; expressões (ex.: outra
+    constante) entram como texto. Vale a última atribuição de cada nome.
+    """
+    with open(caminho, encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read(), filename=caminho)
+    valores = {}
+    for no in arvore.body:
+        if isinstance(no, ast.Assign) and len(no.targets) == 1 and isinstance(no.targets[0], ast.Name):
+            nome = no.targets[0].id
+            if nome in nomes:
+                try:
+                    valores[nome] = ast.literal_eval(no.value)
+                except ValueError:
+                    valores[nome] = ast.unparse(no.value)
+    return valores
+
+
+# --- 2. HASHES DE CONTEÚDO ---
+
+def hash_valor(valor):
+    """Hash de um valor serializável em JSON (as chaves dos dicts entram ordenadas)."""
+    texto = json.dumps(valor, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(texto.encode(), digest_size=TAMANHO_HASH).hexdigest()
+
+
+class HashArquivos:
+    """
+    Hash do conteúdo de arquivos e pastas (todos os arquivos dentro, em ordem).
+    O hash de cada arquivo fica guardado com o tamanho e a data de modificação:
+    um arquivo intacto não é lido de novo, nem entre execuções ('memo' vai
+    para o estado do pipeline).
+    """
+
+    def __init__(self, memo=None):
+        self.memo = memo if memo is not None else {}
+
+    def _arquivo(self, caminho):
+        estado = os.stat(caminho)
+        chave = [estado.st_size, estado.st_mtime_ns]
+        guardado = self.memo.get(caminho)
+        if guardado and guardado[:2] == chave:
+            return guardado[2]
+        resumo = hashlib.blake2b(digest_size=TAMANHO_HASH)
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+                resumo.update(bloco)
+        self.memo[caminho] = chave + [resumo.hexdigest()]
+        return resumo.hexdigest()
+
+    def __call__(self, caminho):
+        """
+        Hash de 'caminho', ou None se ele não existe. Numa pasta entram a
+        subpasta e o conteúdo de cada arquivo, mas não o nome dele: o
+        salvar_dataset dá nomes novos aos arquivos das partições a cada gravação.
+        """
+        if os.path.isfile(caminho):
+            return self._arquivo(caminho)
+        if not os.path.isdir(caminho):
+            return None
+        itens = sorted((os.path.relpath(raiz, caminho), self._arquivo(os.path.join(raiz, nome)))
+                       for raiz, _, nomes in os.walk(caminho) for nome in nomes)
+        return hash_valor(itens)
+
+
+def impressao(estagio, hashes):
+    """Hashes de tudo que decide se o estágio roda: entradas, código e parâmetros."""
+    return {
+        'entradas': {caminho: hashes(caminho) for caminho in estagio.entradas},
+        'codigo': {caminho: hashes(caminho) for caminho in estagio.codigo},
+        'parametros': {nome: hash_valor(valor) for nome, valor in estagio.parametros_atuais().items()},
+    }
+
+
+# --- 3. PLANO ---
+
+ROTULOS_MUDANCA = {'entradas': 'entrada alterada', 'codigo': 'código alterado', 'parametros': 'parâmetro alterado'}
+
+
+def motivos_execucao(estagio, registro, atual, hashes, dependencias_rodando=()):
+    """
+    Por que o estágio precisa rodar (lista vazia: pode ser pulado), comparando
+    a impressão 'atual' com o 'registro' da última execução bem-sucedida.
+    """
+    if registro is None:
+        return ['nunca executado']
+    motivos = [f"depende de '{nome}', que vai rodar" for nome in estagio.depende if nome in dependencias_rodando]
+    for caminho in estagio.saidas:
+        hash_saida = hashes(caminho)
+        if hash_saida is None:
+            motivos.append(f'saída ausente: {caminho}')
+        elif hash_saida != registro['saidas'].get(caminho):
+            motivos.append(f'saída alterada fora do pipeline: {caminho}')
+    for grupo, rotulo in ROTULOS_MUDANCA.items():
+        anteriores = registro.get(grupo, {})
+        for chave, valor in atual[grupo].items():
+            if chave not in anteriores or anteriores[chave] != valor:
+                motivos.append(f'{rotulo}: {chave}')
+    return motivos
+
+
+def selecionar(estagios, alvos=None):
+    """Os estágios em 'alvos' e todos de que eles dependem, na ordem declarada (None: todos)."""
+    if alvos is None:
+        return list(estagios)
+    por_nome = {estagio.nome: estagio for estagio in estagios}
+    desconhecidos = set(alvos) - set(por_nome)
+    if desconhecidos:
+        raise KeyError(f"Estágios desconhecidos: {sorted(desconhecidos)}. Use um de {list(por_nome)}.")
+    escolhidos = set()
+    pendentes = list(alvos)
+    while pendentes:
+        nome = pendentes.pop()
+        if nome not in escolhidos:
+            escolhidos.add(nome)
+            pendentes.extend(por_nome[nome].depende)
+    return [estagio for estagio in estagios if estagio.nome in escolhidos]
+
+
+def ler_estado(caminho=CAMINHO_ESTADO_PIPELINE):
+    if not os.path.exists(caminho):
+        return {'estagios': {}, 'arquivos': {}}
+    with open(caminho) as arquivo:
+        return json.load(arquivo)
+
+
+def _gravar_estado(estado, caminho):
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w') as arquivo:
+        json.dump(estado, arquivo, ensure_ascii=False, indent=1)
+    os.replace(temporario, caminho)
+
+
+def planejar(estagios=ESTAGIOS, alvos=None, forcar=(), caminho_estado=CAMINHO_ESTADO_PIPELINE):
+    """
+    [(estágio, motivos)] na ordem de execução; motivos vazios = o estágio será
+    pulado. Um estágio cuja dependência vai rodar também é marcado para rodar
+    (na execução ele ainda é pulado se a dependência gravar o mesmo conteúdo).
+    """
+    estado = ler_estado(caminho_estado)
+    hashes = HashArquivos(estado['arquivos'])
+    plano = []
+    rodando = set()
+    for estagio in selecionar(estagios, alvos):
+        motivos = motivos_execucao(estagio, estado['estagios'].get(estagio.nome), impressao(estagio, hashes),
+                                   hashes, rodando)
+        if estagio.nome in forcar:
+            motivos = ['forçado'] + motivos
+        if motivos:
+            rodando.add(estagio.nome)
+        plano.append((estagio, motivos))
+    return plano
+
+
+def imprimir_plano(plano):
+    print(f"{'estágio':<22} {'ação':<6} motivo")
+    print("-" * 70)
+    for estagio, motivos in plano:
+        if not motivos:
+            print(f"{estagio.nome:<22} {'pular':<6} entradas, código, parâmetros e saídas inalterados")
+            continue
+        print(f"{estagio.nome:<22} {'rodar':<6} {motivos[0]}")
+        for motivo in motivos[1:]:
+            print(f"{'':<29} {motivo}")
+
+
+# --- 4. EXECUÇÃO ---
+
+def _rodar_script(estagio, pasta_logs):
+    """Roda o script num processo novo, com a saída no log do estágio. Devolve (código de saída, duração)."""
+    os.makedirs(pasta_logs, exist_ok=True)
+    # Sem janela: plt.show() não bloqueia (plot-predict.py grava o gráfico em arquivo)
+    ambiente = {**os.environ, 'MPLBACKEND': 'Agg'}
+    inicio = time.perf_counter()
+    with open(os.path.join(pasta_logs, f'{estagio.nome}.log'), 'w') as log:
+        processo = subprocess.run([sys.executable, estagio.script], stdout=log, stderr=subprocess.STDOUT,
+                                  env=ambiente)
+    return processo.returncode, time.perf_counter() - inicio
+
+
+def executar_pipeline(estagios=ESTAGIOS, alvos=None, forcar=(), max_paralelos=2,
+                      caminho_estado=CAMINHO_ESTADO_PIPELINE, pasta_logs=PASTA_LOGS_PIPELINE):
+    """
+    Roda os estágios selecionados em ordem de dependência, até 'max_paralelos'
+    ao mesmo tempo (estágios independentes, como as duas leituras ou os dois
+    treinos, rodam juntos). A decisão de pular é tomada quando as dependências
+    terminam, com os hashes reais das saídas delas. Um estágio que falha
+    cancela os que dependem dele. Devolve {estágio: situação}.
+    """
+    estado = ler_estado(caminho_estado)
+    hashes = HashArquivos(estado['arquivos'])
+    selecionados = selecionar(estagios, alvos)
+    nomes = {estagio.nome for estagio in selecionados}
+    situacao = {}
+    em_execucao = {}
+    impressoes = {}
+
+    def pronto(estagio):
+        return all(situacao.get(nome) in ('pulado', 'executado') for nome in estagio.depende if nome in nomes)
+
+    def bloqueado(estagio):
+        return any(situacao.get(nome) in ('falhou', 'cancelado') for nome in estagio.depende if nome in nomes)
+
+    with ThreadPoolExecutor(max_workers=max_paralelos) as executor:
+        while len(situacao) < len(selecionados):
+            for estagio in selecionados:
+                if estagio.nome in situacao or estagio.nome in em_execucao.values():
+                    continue
+                if bloqueado(estagio):
+                    situacao[estagio.nome] = 'cancelado'
+                    print(f"[{estagio.nome}] cancelado: uma dependência falhou")
+                    continue
+                if not pronto(estagio) or len(em_execucao) >= max_paralelos:
+                    continue
+                atual = impressao(estagio, hashes)
+                motivos = motivos_execucao(estagio, estado['estagios'].get(estagio.nome), atual, hashes)
+                if estagio.nome in forcar:
+                    motivos = ['forçado'] + motivos
+                if not motivos:
+                    situacao[estagio.nome] = 'pulado'
+                    print(f"[{estagio.nome}] pulado: nada mudou")
+                    continue
+                print(f"[{estagio.nome}] rodando ({'; '.join(motivos)})")
+                impressoes[estagio.nome] = atual
+                em_execucao[executor.submit(_rodar_script, estagio, pasta_logs)] = estagio.nome
+
+            if not em_execucao:
+                continue
+            concluidos, _ = wait(list(em_execucao), return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                nome = em_execucao.pop(futuro)
+                estagio = next(estagio for estagio in selecionados if estagio.nome == nome)
+                codigo_saida, duracao = futuro.result()
+                faltando = [caminho for caminho in estagio.saidas if not os.path.exists(caminho)]
+                if codigo_saida != 0 or faltando:
+                    situacao[nome] = 'falhou'
+                    detalhe = f'código de saída {codigo_saida}' if codigo_saida else f'saídas ausentes: {faltando}'
+                    print(f"[{nome}] FALHOU em {duracao:.1f}s ({detalhe}); veja {pasta_logs}/{nome}.log")
+                    continue
+                situacao[nome] = 'executado'
+                saidas = {caminho: hashes(caminho) for caminho in estagio.saidas}
+                estado['estagios'][nome] = {
+                    **impressoes[nome],
+                    'saidas': saidas,
+                    'concluido_em': datetime.now().isoformat(timespec='seconds'),
+                    'duracao_s': round(duracao, 2),
+                }
+                # Saídas compartilhadas: para os outros estágios que gravam o
+                # mesmo arquivo, esta gravação não é uma alteração por fora
+                for outro, registro in estado['estagios'].items():
+                    if outro == nome:
+                        continue
+                    for caminho in set(saidas) & set(registro.get('saidas', {})):
+                        registro['saidas'][caminho] = saidas[caminho]
+                _gravar_estado(estado, caminho_estado)
+                print(f"[{nome}] concluído em {duracao:.1f}s")
+
+    _gravar_estado(estado, caminho_estado)
+    return situacao
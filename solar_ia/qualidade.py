@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from solar_ia.solar import calcular_geometria_solar
+
+# --- 1. TESTES E BITS DA MÁSCARA ---
+#
+# Cada teste de qualidade acende um bit da coluna COLUNA_QC (uint8), em vez de
+# uma coluna float por teste. Limites físicos e de fechamento seguem as
+# recomendações da BSRN (Long e Dutton, 2002), com a irradiância
+# extraterrestre e o zênite de solar_ia/solar.py para a estação e a hora.
+
+COLUNA_QC = 'qc_irradiancia'
+COLUNAS_IRRADIACAO = ['ghi', 'dni', 'dhi']
+
+FLAGS_QC = {
+    'ghi_fisico': 1 << 0,     # GHI fora de [-4, 1.5·S0·cos(z)^1.2 + 100]
+    'dni_fisico': 1 << 1,     # DNI fora de [-4, S0]
+    'dhi_fisico': 1 << 2,     # DHI fora de [-4, 0.95·S0·cos(z)^1.2 + 50]
+    'fechamento': 1 << 3,     # GHI longe de DNI·cos(z) + DHI
+    'travado': 1 << 4,        # mesmo valor de dia por HORAS_TRAVADO horas seguidas
+    'ghi_baixo_dia': 1 << 5,  # GHI abaixo de LIMITE_GHI_ANOMALO com o Sol alto
+    'preenchido': 1 << 6,     # irradiação reconstruída por interpolação
+    'lacuna': 1 << 7,         # lacuna maior que LIMITE_LACUNA_HORAS (fica NaN)
+}
+
+# Testes cujo resultado invalida ghi/dni/dhi da linha (os demais bits só informam)
+FLAGS_INVALIDAM = (FLAGS_QC['ghi_fisico'] | FLAGS_QC['dni_fisico'] | FLAGS_QC['dhi_fisico']
+                   | FLAGS_QC['fechamento'] | FLAGS_QC['travado'] | FLAGS_QC['ghi_baixo_dia'])
+
+# Fechamento: razão GHI / (DNI·cos z + DHI) tolerada até ZENITE_FECHAMENTO
+# e, acima dele, até ZENITE_FECHAMENTO_MAXIMO; só quando a soma passa de SOMA_MINIMA
+ZENITE_FECHAMENTO = 75.0
+ZENITE_FECHAMENTO_MAXIMO = 93.0
+TOLERANCIA_FECHAMENTO = 0.08
+TOLERANCIA_FECHAMENTO_HORIZONTE = 0.15
+SOMA_MINIMA_FECHAMENTO = 50.0
+
+# Sensor travado: o mesmo valor positivo em tantas horas seguidas da estação
+HORAS_TRAVADO = 4
+
+# GHI anômalo: abaixo do limite com o Sol bem acima do horizonte
+ZENITE_MAXIMO_ANOMALIAS = 80.0
+LIMITE_GHI_ANOMALO = 10
+
+# Lacunas de até tantas horas (entre dois valores válidos da estação) são
+# interpoladas no tempo; as maiores ficam NaN e a linha sai do dataset
+LIMITE_LACUNA_HORAS = 3
+
+
+# --- 2. MÁSCARAS VETORIZADAS ---
+
+def _ordem_estacao_tempo(codigos, timestamps):
+    """Ordem das linhas por (estação, timestamp) e a máscara 'mesma estação da linha anterior' nessa ordem."""
+    grupos, _ = pd.factorize(codigos)
+    ordem = np.lexsort((timestamps, grupos))
+    grupos_ordenados = grupos[ordem]
+    mesma_estacao = np.zeros(len(ordem), dtype=bool)
+    mesma_estacao[1:] = grupos_ordenados[1:] == grupos_ordenados[:-1]
+    return ordem, mesma_estacao
+
+
+def _limites_fisicos(ghi, dni, dhi, cos_zenite, extraterrestre):
+    mu = np.clip(cos_zenite, 0.0, None) ** 1.2
+    flags = np.zeros(len(ghi), dtype=np.uint8)
+    flags[(ghi < -4) | (ghi > 1.5 * extraterrestre * mu + 100)] |= FLAGS_QC['ghi_fisico']
+    flags[(dni < -4) | (dni > extraterrestre)] |= FLAGS_QC['dni_fisico']
+    flags[(dhi < -4) | (dhi > 0.95 * extraterrestre * mu + 50)] |= FLAGS_QC['dhi_fisico']
+    return flags
+
+
+def _fechamento(ghi, dni, dhi, zenite, cos_zenite):
+    soma = dni * cos_zenite + dhi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        desvio = np.abs(ghi / soma - 1.0)
+    tolerancia = np.where(zenite < ZENITE_FECHAMENTO, TOLERANCIA_FECHAMENTO, TOLERANCIA_FECHAMENTO_HORIZONTE)
+    testavel = (soma > SOMA_MINIMA_FECHAMENTO) & (zenite < ZENITE_FECHAMENTO_MAXIMO)
+    return testavel & (desvio > tolerancia)
+
+
+def _travado(valores_ordenados, mesma_estacao):
+    """Linhas (na ordem por estação e tempo) dentro de uma sequência de HORAS_TRAVADO valores positivos iguais."""
+    repetido = np.zeros(len(valores_ordenados), dtype=bool)
+    repetido[1:] = valores_ordenados[1:] == valores_ordenados[:-1]
+    repetido &= mesma_estacao
+    sequencia = np.cumsum(~repetido)
+    tamanho = np.bincount(sequencia)
+    return (tamanho[sequencia] >= HORAS_TRAVADO) & (valores_ordenados > 0)
+
+
+def _preencher_lacunas(valores_ordenados, tempos_ordenados, mesma_estacao, limite_ns):
+    """
+    Interpola no tempo cada NaN entre o valor válido anterior e o seguinte da
+    mesma estação, se a distância entre eles não passa de 'limite_ns'.
+    Devolve (valores, máscara dos preenchidos); a entrada não é alterada.
+    """
+    n = len(valores_ordenados)
+    posicoes = np.arange(n)
+    valido = ~np.isnan(valores_ordenados)
+    inicio_estacao = np.maximum.accumulate(np.where(mesma_estacao, 0, posicoes))
+    anterior = np.maximum.accumulate(np.where(valido, posicoes, -1))
+    seguinte = np.minimum.accumulate(np.where(valido, posicoes, n)[::-1])[::-1]
+
+    alvo = np.flatnonzero(~valido & (anterior >= inicio_estacao) & (seguinte < n))
+    antes, depois = anterior[alvo], seguinte[alvo]
+    t0, t1 = tempos_ordenados[antes], tempos_ordenados[depois]
+    ok = (inicio_estacao[depois] == inicio_estacao[alvo]) & (t1 - t0 <= limite_ns)
+    alvo, antes, depois, t0, t1 = alvo[ok], antes[ok], depois[ok], t0[ok], t1[ok]
+
+    saida = valores_ordenados.copy()
+    peso = (tempos_ordenados[alvo] - t0) / (t1 - t0)
+    saida[alvo] = valores_ordenados[antes] + peso * (valores_ordenados[depois] - valores_ordenados[antes])
+    preenchido = np.zeros(n, dtype=bool)
+    preenchido[alvo] = True
+    return saida, preenchido
+
+
+# --- 3. CONTROLE DE QUALIDADE EM UMA PASSADA ---
+
+def controlar_qualidade(df, tabela_estacoes, limite_lacuna_horas=LIMITE_LACUNA_HORAS):
+    """
+    Aplica os testes de FLAGS_QC a ghi/dni/dhi de 'df' (indexado por timestamp,
+    com 'codigo_estacao'), invalida as linhas reprovadas e interpola, dentro de
+    cada estação, as lacunas de até 'limite_lacuna_horas'. Grava a máscara de
+    bits em COLUNA_QC e devolve 'df'.
+    """
+    n = len(df)
+    geometria = calcular_geometria_solar(df, tabela_estacoes)
+    zenite = geometria['zenite_solar'].to_numpy()
+    cos_zenite = np.cos(np.radians(zenite))
+    extraterrestre = geometria['irradiancia_extraterrestre'].to_numpy()
+    ghi, dni, dhi = (df[coluna].to_numpy(dtype=np.float64) for coluna in COLUNAS_IRRADIACAO)
+
+    flags = _limites_fisicos(ghi, dni, dhi, cos_zenite, extraterrestre)
+    flags[_fechamento(ghi, dni, dhi, zenite, cos_zenite)] |= FLAGS_QC['fechamento']
+    flags[(zenite < ZENITE_MAXIMO_ANOMALIAS) & (ghi < LIMITE_GHI_ANOMALO)] |= FLAGS_QC['ghi_baixo_dia']
+
+    ordem, mesma_estacao = _ordem_estacao_tempo(df['codigo_estacao'].to_numpy(), df.index.to_numpy())
+    travado = np.zeros(n, dtype=bool)
+    for valores in (ghi, dni):
+        travado[ordem] |= _travado(valores[ordem], mesma_estacao)
+    flags[travado] |= FLAGS_QC['travado']
+
+    invalidas = (flags & FLAGS_INVALIDAM) != 0
+    tempos_ordenados = df.index.to_numpy()[ordem].astype('datetime64[ns]').astype(np.int64)
+    limite_ns = (limite_lacuna_horas + 1) * 3600 * 10**9
+    preenchido = np.zeros(n, dtype=bool)
+    for coluna, valores in zip(COLUNAS_IRRADIACAO, (ghi, dni, dhi)):
+        valores = np.where(invalidas, np.nan, valores)
+        valores_ordenados, preenchidos = _preencher_lacunas(valores[ordem], tempos_ordenados, mesma_estacao, limite_ns)
+        valores[ordem] = valores_ordenados
+        preenchido[ordem] |= preenchidos
+        df[coluna] = valores.astype(df[coluna].dtype if df[coluna].dtype.kind == 'f' else np.float32)
+
+    flags[preenchido] |= FLAGS_QC['preenchido']
+    flags[df[COLUNAS_IRRADIACAO].isna().any(axis=1).to_numpy()] |= FLAGS_QC['lacuna']
+    df[COLUNA_QC] = flags
+    return df
+
+
+def resumo_qualidade(flags):
+    """Quantidade de linhas com cada bit de FLAGS_QC aceso."""
+    flags = np.asarray(flags, dtype=np.uint8)
+    return {nome: int(np.count_nonzero(flags & bit)) for nome, bit in FLAGS_QC.items()}
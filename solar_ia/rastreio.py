@@ -0,0 +1,206 @@
+import atexit
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from solar_ia.memoria import pico_rss_mb, rss_atual_mb, tamanho_em_disco_bytes
+
+# --- 1. CONFIGURAÇÃO ---
+#
+# Cada etapa dos scripts roda dentro de 'with etapa(nome) as span:'. O span
+# mede a duração e a memória (RSS antes/depois; a diferença é o que a etapa
+# deixou alocado) e guarda linhas de entrada/saída e bytes lidos/gravados
+# informados pela própria etapa. O pico de RSS registrado é o do processo até
+# o fim da etapa (ru_maxrss só cresce), não o da etapa. Spans abertos dentro
+# de outro ficam aninhados nele.
+#
+# Com uma pasta de rastreio (argumento de iniciar_rastreio ou a variável de
+# ambiente SOLAR_IA_RASTREIO, útil nas execuções noturnas), cada span vira uma
+# linha em <pasta>/<processo>.spans.jsonl e, no fim do processo, todos vão para
+# <pasta>/<processo>.trace.json (formato Chrome trace: abra em chrome://tracing
+# ou no Perfetto). Sem pasta, nada é gravado.
+#
+# A etapa com o nome pedido em 'perfil' (ou em SOLAR_IA_PERFIL) roda também
+# sob cProfile e tracemalloc: <processo>.<etapa>.prof (leia com pstats ou
+# snakeviz) e <processo>.<etapa>.tracemalloc.txt (linhas que mais alocaram).
+
+VARIAVEL_PASTA = 'SOLAR_IA_RASTREIO'
+VARIAVEL_PERFIL = 'SOLAR_IA_PERFIL'
+
+# Pasta usada quando só a captura de perfil é pedida
+CAMINHO_RASTREIO = 'data/rastreio'
+
+# Quantas linhas de código (as que mais alocaram) vão para o relatório do tracemalloc
+LINHAS_TRACEMALLOC = 30
+
+
+class Span:
+    """Uma etapa medida. A etapa pode preencher linhas_entrada/linhas_saida e chamar lido/gravado."""
+
+    def __init__(self, nome, pai=None, linhas_entrada=None, **atributos):
+        self.nome = nome
+        self.pai = pai
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.bytes_lidos = 0
+        self.bytes_gravados = 0
+        self.atributos = atributos
+        self.inicio_us = time.time_ns() // 1000
+        self.duracao_s = None
+        self.rss_antes_mb = rss_atual_mb()
+        self.rss_depois_mb = None
+        self.pico_rss_processo_mb = None
+        self._inicio = time.perf_counter()
+
+    def lido(self, *caminhos):
+        """Soma aos bytes lidos o tamanho dos arquivos (ou pastas) em 'caminhos'."""
+        self.bytes_lidos += sum(tamanho_em_disco_bytes(caminho) for caminho in caminhos)
+
+    def gravado(self, *caminhos):
+        """Soma aos bytes gravados o tamanho dos arquivos (ou pastas) em 'caminhos'."""
+        self.bytes_gravados += sum(tamanho_em_disco_bytes(caminho) for caminho in caminhos)
+
+    def encerrar(self):
+        self.duracao_s = time.perf_counter() - self._inicio
+        self.rss_depois_mb = rss_atual_mb()
+        self.pico_rss_processo_mb = pico_rss_mb()
+
+    def como_dict(self):
+        return {
+            'nome': self.nome,
+            'pai': self.pai,
+            'inicio_us': self.inicio_us,
+            'duracao_s': self.duracao_s,
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+            'bytes_lidos': self.bytes_lidos,
+            'bytes_gravados': self.bytes_gravados,
+            'rss_antes_mb': self.rss_antes_mb,
+            'rss_depois_mb': self.rss_depois_mb,
+            'delta_rss_mb': self.rss_depois_mb - self.rss_antes_mb,
+            'pico_rss_processo_mb': self.pico_rss_processo_mb,
+            **self.atributos,
+        }
+
+
+class Rastreador:
+    """Guarda os spans de um processo e grava o JSONL, o Chrome trace e os perfis."""
+
+    def __init__(self, processo='solar-ia', pasta=None, perfil=None):
+        self.processo = processo
+        self.pasta = pasta
+        self.perfil = perfil
+        self.execucao = datetime.now().isoformat(timespec='seconds')
+        self.spans = []
+        self.pilha = []
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+    def _caminho(self, sufixo):
+        return os.path.join(self.pasta, f'{self.processo}.{sufixo}')
+
+    def registrar(self, span):
+        self.spans.append(span)
+        if not self.pasta:
+            return
+        linha = {'processo': self.processo, 'execucao': self.execucao, 'pid': os.getpid(), **span.como_dict()}
+        with open(self._caminho('spans.jsonl'), 'a') as arquivo:
+            arquivo.write(json.dumps(linha, ensure_ascii=False) + '\n')
+
+    def gravar_chrome_trace(self):
+        """Grava todos os spans encerrados como eventos completos ('ph': 'X') do Chrome trace."""
+        if not self.pasta or not self.spans:
+            return
+        pid = os.getpid()
+        eventos = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': self.processo}}]
+        for span in self.spans:
+            argumentos = span.como_dict()
+            eventos.append({
+                'name': span.nome,
+                'cat': span.pai or 'etapa',
+                'ph': 'X',
+                'ts': span.inicio_us,
+                'dur': round(span.duracao_s * 1e6),
+                'pid': pid,
+                'tid': 0,
+                'args': {chave: valor for chave, valor in argumentos.items() if chave not in ('nome', 'inicio_us')},
+            })
+        with open(self._caminho('trace.json'), 'w') as arquivo:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, arquivo, ensure_ascii=False)
+
+    def gravar_perfil(self, nome, perfilador, instantaneo, pico_python):
+        perfilador.dump_stats(self._caminho(f'{nome}.prof'))
+        estatisticas = instantaneo.statistics('lineno')
+        with open(self._caminho(f'{nome}.tracemalloc.txt'), 'w') as arquivo:
+            arquivo.write(f"Pico de memória alocada pelo Python na etapa '{nome}': {pico_python / 1e6:.1f} MB\n")
+            arquivo.write(f"{LINHAS_TRACEMALLOC} linhas que mais alocaram (ainda vivas no fim da etapa):\n\n")
+            for estatistica in estatisticas[:LINHAS_TRACEMALLOC]:
+                arquivo.write(f"{estatistica}\n")
+
+
+_rastreador = Rastreador()
+
+
+def iniciar_rastreio(processo, pasta=None, perfil=None):
+    """
+    Configura o rastreio do processo atual (chame no início do script).
+    'pasta' e 'perfil' caem nas variáveis SOLAR_IA_RASTREIO e SOLAR_IA_PERFIL;
+    sem nenhuma das duas, os spans são medidos mas não gravados.
+    """
+    global _rastreador
+    pasta = pasta or os.environ.get(VARIAVEL_PASTA)
+    perfil = perfil or os.environ.get(VARIAVEL_PERFIL)
+    if perfil and not pasta:
+        pasta = CAMINHO_RASTREIO
+    _rastreador = Rastreador(processo, pasta, perfil)
+    atexit.register(_rastreador.gravar_chrome_trace)
+    return _rastreador
+
+
+def spans():
+    """Spans já encerrados no processo atual."""
+    return list(_rastreador.spans)
+
+
+# --- 2. ETAPAS ---
+
+@contextmanager
+def etapa(nome, linhas_entrada=None, **atributos):
+    """
+    Mede o bloco como um span chamado 'nome'. Use o span devolvido para
+    informar linhas_saida e os arquivos lidos/gravados:
+
+        with etapa('leitura_inmet') as span:
+            df = ler(...)
+            span.linhas_saida = len(df)
+    """
+    rastreador = _rastreador
+    pai = rastreador.pilha[-1].nome if rastreador.pilha else None
+    span = Span(nome, pai, linhas_entrada, **atributos)
+    rastreador.pilha.append(span)
+
+    perfilar = rastreador.perfil == nome
+    if perfilar:
+        perfilador = cProfile.Profile()
+        iniciou_tracemalloc = not tracemalloc.is_tracing()
+        if iniciou_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        perfilador.enable()
+    try:
+        yield span
+    finally:
+        if perfilar:
+            perfilador.disable()
+            instantaneo = tracemalloc.take_snapshot()
+            _, pico_python = tracemalloc.get_traced_memory()
+            if iniciou_tracemalloc:
+                tracemalloc.stop()
+            rastreador.gravar_perfil(nome, perfilador, instantaneo, pico_python)
+        span.encerrar()
+        rastreador.pilha.pop()
+        rastreador.registrar(span)
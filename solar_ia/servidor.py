@@ -0,0 +1,228 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.dataset import FEATURES_ESTACAO, TARGETS
+from solar_ia.modelos import nomes_features
+
+# --- 1. PARÂMETROS DO LOTEAMENTO ---
+
+# Um lote é fechado quando junta MAX_LINHAS_LOTE linhas ou quando o primeiro
+# pedido do lote já esperou ESPERA_LOTE_MS, o que vier primeiro.
+MAX_LINHAS_LOTE = 4096
+ESPERA_LOTE_MS = 2.0
+
+# Quantas latências recentes entram nos percentis de /metricas
+JANELA_METRICAS = 10000
+
+
+# --- 2. MÉTRICAS ---
+
+class MetricasLatencia:
+    """Latências recentes (ms) e contadores de pedidos, linhas e lotes, seguros entre threads."""
+
+    def __init__(self, janela=JANELA_METRICAS):
+        self._latencias = deque(maxlen=janela)
+        self._trava = threading.Lock()
+        self.inicio = time.perf_counter()
+        self.pedidos = self.linhas = self.lotes = 0
+
+    def registrar_pedido(self, latencia_ms, linhas):
+        with self._trava:
+            self._latencias.append(latencia_ms)
+            self.pedidos += 1
+            self.linhas += linhas
+
+    def registrar_lote(self):
+        with self._trava:
+            self.lotes += 1
+
+    def resumo(self):
+        with self._trava:
+            latencias = np.array(self._latencias)
+            duracao = time.perf_counter() - self.inicio
+            pedidos, linhas, lotes = self.pedidos, self.linhas, self.lotes
+        return {
+            'pedidos': pedidos,
+            'linhas': linhas,
+            'lotes': lotes,
+            'linhas_por_lote': linhas / lotes if lotes else 0.0,
+            'pedidos_por_segundo': pedidos / duracao if duracao > 0 else 0.0,
+            'linhas_por_segundo': linhas / duracao if duracao > 0 else 0.0,
+            'latencia_p50_ms': float(np.percentile(latencias, 50)) if len(latencias) else None,
+            'latencia_p99_ms': float(np.percentile(latencias, 99)) if len(latencias) else None,
+        }
+
+
+# --- 3. MICRO-LOTES ---
+
+class _Pedido:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.resultado = None
+        self.erro = None
+        self.pronto = threading.Event()
+
+
+class LoteadorPrevisoes:
+    """
+    Junta os pedidos que chegam ao mesmo tempo (de várias threads) num único
+    predict. Cada chamada a prever() bloqueia até o lote em que ela entrou
+    ser previsto e devolve só as suas linhas.
+    """
+
+    def __init__(self, modelo, max_linhas=MAX_LINHAS_LOTE, espera_ms=ESPERA_LOTE_MS, metricas=None):
+        self.modelo = modelo
+        self.colunas = nomes_features(modelo)
+        self.max_linhas = max_linhas
+        self.espera = espera_ms / 1000.0
+        self.metricas = metricas or MetricasLatencia()
+        self._fila = queue.Queue()
+        threading.Thread(target=self._laco, daemon=True).start()
+
+    def prever(self, linhas):
+        """'linhas' é um array (n, len(colunas)); devolve as previsões (n, n_alvos)."""
+        pedido = _Pedido(linhas)
+        self._fila.put(pedido)
+        pedido.pronto.wait()
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    def _juntar_lote(self):
+        lote = [self._fila.get()]
+        n_linhas = len(lote[0].linhas)
+        prazo = time.perf_counter() + self.espera
+        while n_linhas < self.max_linhas:
+            restante = prazo - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                pedido = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            lote.append(pedido)
+            n_linhas += len(pedido.linhas)
+        return lote
+
+    def _laco(self):
+        while True:
+            lote = self._juntar_lote()
+            try:
+                X = pd.DataFrame(np.vstack([pedido.linhas for pedido in lote]), columns=self.colunas)
+                previsoes = np.asarray(self.modelo.predict(X))
+                fronteiras = np.cumsum([len(pedido.linhas) for pedido in lote])[:-1]
+                for pedido, parte in zip(lote, np.split(previsoes, fronteiras)):
+                    pedido.resultado = parte
+            except Exception as erro:
+                for pedido in lote:
+                    pedido.erro = erro
+            self.metricas.registrar_lote()
+            for pedido in lote:
+                pedido.pronto.set()
+
+
+# --- 4. SERVIDOR HTTP ---
+#
+#   POST /prever/<modelo>  {"linhas": [{"codigo_estacao": "A304", "temp_ar": 27.1, ...}, ...]}
+#                          -> {"modelo": ..., "ghi": [...], "dni": [...]}
+#   GET  /metricas         -> latência p50/p99 e vazão de cada modelo
+#   GET  /saude            -> modelos carregados e suas features
+#
+# Linhas com 'codigo_estacao' e sem latitude/longitude recebem as coordenadas
+# da tabela de estações, como no carregar_xy.
+
+def _linhas_para_matriz(linhas, colunas, tabela_estacoes):
+    df = pd.DataFrame(linhas)
+    faltando_estacao = [col for col in FEATURES_ESTACAO if col in colunas and col not in df.columns]
+    if faltando_estacao and tabela_estacoes is not None and 'codigo_estacao' in df.columns:
+        codigos = df['codigo_estacao'].astype(str).str.upper()
+        desconhecidas = set(codigos) - set(tabela_estacoes.index)
+        if desconhecidas:
+            raise ValueError(f"Estações desconhecidas: {sorted(desconhecidas)}")
+        for coluna in faltando_estacao:
+            df[coluna] = tabela_estacoes[coluna].reindex(codigos).to_numpy()
+    faltando = [col for col in colunas if col not in df.columns]
+    if faltando:
+        raise ValueError(f"Features ausentes: {faltando}")
+    return df[colunas].to_numpy(dtype=np.float32)
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalho e corpo saem em escritas separadas; sem TCP_NODELAY cada resposta
+    # espera o ACK atrasado do cliente (~40 ms)
+    disable_nagle_algorithm = True
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        loteadores = self.server.loteadores
+        if self.path == '/metricas':
+            self._responder(200, {nome: loteador.metricas.resumo() for nome, loteador in loteadores.items()})
+        elif self.path == '/saude':
+            self._responder(200, {nome: loteador.colunas for nome, loteador in loteadores.items()})
+        else:
+            self._responder(404, {'erro': f"Rota desconhecida: {self.path}"})
+
+    def do_POST(self):
+        inicio = time.perf_counter()
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = self.rfile.read(tamanho)
+
+        nome_modelo = self.path.rsplit('/', 1)[-1]
+        loteador = self.server.loteadores.get(nome_modelo)
+        if not self.path.startswith('/prever/') or loteador is None:
+            self._responder(404, {'erro': f"Modelo desconhecido: '{nome_modelo}'",
+                                  'modelos': list(self.server.loteadores)})
+            return
+        try:
+            linhas = json.loads(corpo)['linhas']
+            matriz = _linhas_para_matriz(linhas, loteador.colunas, self.server.tabela_estacoes)
+        except (ValueError, KeyError, TypeError) as erro:
+            self._responder(400, {'erro': str(erro)})
+            return
+
+        try:
+            previsoes = loteador.prever(matriz)
+        except Exception as erro:
+            self._responder(500, {'erro': f"Falha no predict: {erro}"})
+            return
+        resposta = {'modelo': nome_modelo}
+        for i, alvo in enumerate(TARGETS):
+            resposta[alvo] = previsoes[:, i].tolist() if previsoes.ndim == 2 else previsoes.tolist()
+        self._responder(200, resposta)
+        loteador.metricas.registrar_pedido((time.perf_counter() - inicio) * 1000, len(matriz))
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+    # Fila de conexões pendentes do listen(); o padrão (5) derruba clientes sob carga
+    request_queue_size = 256
+
+
+def criar_servidor(modelos, host='127.0.0.1', porta=8050, tabela_estacoes=None,
+                   max_linhas=MAX_LINHAS_LOTE, espera_ms=ESPERA_LOTE_MS):
+    """
+    Servidor HTTP (uma thread por conexão) para os modelos {nome: modelo}, já
+    carregados. Cada modelo tem o seu LoteadorPrevisoes. Chame serve_forever().
+    """
+    servidor = _ServidorHTTP((host, porta), _Manipulador)
+    servidor.loteadores = {nome: LoteadorPrevisoes(modelo, max_linhas, espera_ms) for nome, modelo in modelos.items()}
+    servidor.tabela_estacoes = tabela_estacoes
+    return servidor
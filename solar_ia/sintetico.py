@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.inmet import COLUNAS_MEDICAO_INMET, LINHAS_CABECALHO, NOMES_COLUNAS_INMET
+from solar_ia.nsrdb import COLUNAS_TEMPO_NSRDB, MAPEAMENTO_COLUNAS_NSRDB
+from solar_ia.solar import ZENITE_NOITE, geometria_solar
+
+# Faixa de coordenadas das estações sintéticas (aproximadamente o RN)
+FAIXA_LATITUDE = (-7.0, -4.5)
+FAIXA_LONGITUDE = (-38.5, -35.0)
+
+
+def estacoes_sinteticas(n_estacoes, semente=42):
+    """Tabela de estações sintética: indexada por código ('X000', 'X001', ...), com latitude e longitude."""
+    rng = np.random.default_rng(semente)
+    codigos = [f'X{i:03d}' for i in range(n_estacoes)]
+    return pd.DataFrame({
+        'latitude': rng.uniform(*FAIXA_LATITUDE, n_estacoes),
+        'longitude': rng.uniform(*FAIXA_LONGITUDE, n_estacoes),
+    }, index=pd.Index(codigos, name='codigo_estacao'))
+
+
+def _grade(estacoes, anos):
+    """Produto (timestamp horário x estação), ordenado por timestamp como na ingestão."""
+    horas = pd.date_range(f'{min(anos)}-01-01', f'{max(anos) + 1}-01-01', freq='h', inclusive='left')
+    n_horas, n_estacoes = len(horas), len(estacoes)
+    timestamps = np.repeat(horas.values, n_estacoes)
+    indice_estacao = np.tile(np.arange(n_estacoes), n_horas)
+    return pd.DatetimeIndex(timestamps, name='timestamp'), indice_estacao
+
+
+def _irradiancia(timestamps, latitude, longitude, rng):
+    """
+    GHI/DNI/DHI fisicamente coerentes: o céu limpo de solar_ia/solar.py atenuado
+    por nuvens aleatórias, com GHI = DNI·cos(z) + DHI (passam no controle de
+    qualidade de solar_ia/qualidade.py).
+    """
+    geometria = geometria_solar(timestamps, latitude, longitude)
+    cos_zenite = np.clip(np.cos(np.radians(geometria['zenite_solar'])), 0.0, None)
+    nebulosidade = rng.beta(2.0, 5.0, len(timestamps))
+    dni = geometria['dni_ceu_limpo'] * (1.0 - nebulosidade) ** 2
+    dhi = geometria['ghi_ceu_limpo'] * (0.1 + 0.4 * nebulosidade)
+    ghi = dni * cos_zenite + dhi
+    dia = geometria['zenite_solar'] < ZENITE_NOITE
+    tipo_nuvem = np.where(dia, np.minimum((nebulosidade * 10).astype(np.int64), 9), 0)
+    return ghi, dni, dhi, tipo_nuvem
+
+
+def gerar_inmet(n_estacoes, anos=(2018,), fracao_nulos=0.05, semente=42):
+    """
+    Gera um DataFrame com o mesmo esquema de solar_ia.inmet.ler_estacoes_inmet
+    para 'n_estacoes' estações e os 'anos' pedidos.
+    """
+    rng = np.random.default_rng(semente)
+    estacoes = estacoes_sinteticas(n_estacoes, semente)
+    timestamps, indice_estacao = _grade(estacoes, anos)
+    n = len(timestamps)
+
+    hora = timestamps.hour.values
+    valores = {
+        'temp_ar': 26.0 + 4.0 * np.sin(np.pi * (hora - 9) / 12.0) + rng.normal(0, 1, n),
+        'umidade_rel': np.clip(70.0 - 15.0 * np.sin(np.pi * (hora - 9) / 12.0) + rng.normal(0, 5, n), 5, 100),
+        'pressao_atm_estacao': 1005.0 + rng.normal(0, 2, n),
+        'vento_vel': np.abs(rng.normal(4, 1.5, n)),
+        'vento_dir': rng.uniform(0, 360, n),
+        'precipitacao': np.where(rng.random(n) < 0.05, rng.exponential(2.0, n), 0.0),
+    }
+
+    df_inmet = pd.DataFrame(index=timestamps)
+    df_inmet['codigo_estacao'] = pd.Categorical.from_codes(indice_estacao, estacoes.index)
+    for coluna in COLUNAS_MEDICAO_INMET:
+        serie = valores[coluna].astype(np.float32)
+        serie[rng.random(n) < fracao_nulos] = np.nan
+        df_inmet[coluna] = serie
+    return df_inmet
+
+
+def gerar_nsrdb(n_estacoes, anos=(2018,), semente=42):
+    """
+    Gera um DataFrame com o mesmo esquema de solar_ia.nsrdb.ler_estacoes_nsrdb
+    para as mesmas estações de gerar_inmet (mesma semente).
+    """
+    rng = np.random.default_rng(semente + 1)
+    estacoes = estacoes_sinteticas(n_estacoes, semente)
+    timestamps, indice_estacao = _grade(estacoes, anos)
+    n = len(timestamps)
+    latitude = estacoes['latitude'].to_numpy()[indice_estacao]
+    longitude = estacoes['longitude'].to_numpy()[indice_estacao]
+    ghi, dni, dhi, tipo_nuvem = _irradiancia(timestamps, latitude, longitude, rng)
+
+    df_nsrdb = pd.DataFrame(index=timestamps)
+    df_nsrdb['codigo_estacao'] = pd.Categorical.from_codes(indice_estacao, estacoes.index)
+    df_nsrdb['ghi'] = np.rint(ghi).astype(np.float32)
+    df_nsrdb['dni'] = np.rint(dni).astype(np.float32)
+    df_nsrdb['dhi'] = np.rint(dhi).astype(np.float32)
+    df_nsrdb['temp_ar_nsrdb'] = (26.0 + rng.normal(0, 1.5, n)).astype(np.float32)
+    df_nsrdb['umidade_rel_nsrdb'] = np.clip(rng.normal(70, 10, n), 5, 100).astype(np.float32)
+    df_nsrdb['vento_vel_nsrdb'] = np.abs(rng.normal(4, 1.5, n)).astype(np.float32)
+    df_nsrdb['tipo_nuvem_nsrdb'] = tipo_nuvem.astype(np.int8)
+    df_nsrdb['pressao_nsrdb'] = np.rint(1005.0 + rng.normal(0, 2, n)).astype(np.float32)
+    return df_nsrdb
+
+
+# --- ARQUIVOS BRUTOS NO FORMATO DAS FONTES ---
+#
+# Para medir a leitura (df-inmet.py, df-nsrdb.py) sem os dados reais, os
+# DataFrames sintéticos são gravados como os CSVs que o INMET e a NSRDB
+# distribuem: um arquivo do INMET por estação e uma pasta da NSRDB por
+# estação, com um CSV por ano.
+
+def gravar_csvs_inmet(df_inmet, pasta, semente=42):
+    """Grava 'df_inmet' (de gerar_inmet) como um CSV do INMET por estação em 'pasta'. Devolve os caminhos."""
+    estacoes = estacoes_sinteticas(df_inmet['codigo_estacao'].nunique(), semente)
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    for codigo, df_estacao in df_inmet.groupby('codigo_estacao', observed=True):
+        inicio, fim = df_estacao.index.min(), df_estacao.index.max()
+        cabecalho = [
+            f'Nome: SINTETICA {codigo}',
+            f'Codigo Estacao: {codigo}',
+            f'Latitude: {estacoes.loc[codigo, "latitude"]:.8f}',
+            f'Longitude: {estacoes.loc[codigo, "longitude"]:.8f}',
+            'Altitude: 30',
+            'Situacao: Operante',
+            f'Data Inicial: {inicio:%Y-%m-%d}',
+            f'Data Final: {fim:%Y-%m-%d}',
+            'Periodicidade da Medicao: Horaria',
+        ]
+        cabecalho += [''] * (LINHAS_CABECALHO - len(cabecalho))
+
+        # Colunas que o pipeline não usa saem como 'null', como nos arquivos reais
+        tabela = pd.DataFrame({'data': df_estacao.index.strftime('%Y-%m-%d'),
+                               'hora': df_estacao.index.strftime('%H00')})
+        for coluna in NOMES_COLUNAS_INMET[2:]:
+            tabela[coluna] = df_estacao[coluna].to_numpy() if coluna in COLUNAS_MEDICAO_INMET else np.nan
+
+        caminho = os.path.join(pasta, f'dados_{codigo}_H_{inicio:%Y-%m-%d}_{fim:%Y-%m-%d}.csv')
+        with open(caminho, 'w', encoding='latin-1', newline='') as arquivo:
+            arquivo.write('\n'.join(cabecalho) + '\n')
+            arquivo.write(';'.join(NOMES_COLUNAS_INMET) + '\n')
+            tabela.to_csv(arquivo, sep=';', header=False, index=False, na_rep='null', float_format='%.1f')
+        caminhos.append(caminho)
+    return caminhos
+
+
+def gravar_csvs_nsrdb(df_nsrdb, pasta, semente=42):
+    """
+    Grava 'df_nsrdb' (de gerar_nsrdb) como pastas de estação da NSRDB em
+    'pasta' (ex.: pasta/x000/<id>_<lat>_<lon>_<ano>.csv). Devolve {codigo: [caminhos]}.
+    """
+    estacoes = estacoes_sinteticas(df_nsrdb['codigo_estacao'].nunique(), semente)
+    colunas_originais = {nosso: original for original, nosso in MAPEAMENTO_COLUNAS_NSRDB.items()}
+    caminhos = {}
+    for i, (codigo, df_estacao) in enumerate(df_nsrdb.groupby('codigo_estacao', observed=True)):
+        latitude, longitude = estacoes.loc[codigo, ['latitude', 'longitude']]
+        pasta_estacao = os.path.join(pasta, codigo.lower())
+        os.makedirs(pasta_estacao, exist_ok=True)
+        location_id = 9000000 + i
+        cabecalho = (
+            'Source,Location ID,Latitude,Longitude,Time Zone,Elevation,Local Time Zone,Version\n'
+            f'NSRDB,{location_id},{latitude:.2f},{longitude:.2f},-3,30,-3,4.0.1\n'
+        )
+
+        for ano, df_ano in df_estacao.groupby(df_estacao.index.year):
+            tabela = pd.DataFrame({
+                'Year': df_ano.index.year, 'Month': df_ano.index.month, 'Day': df_ano.index.day,
+                'Hour': df_ano.index.hour, 'Minute': df_ano.index.minute,
+            })
+            for nosso, original in colunas_originais.items():
+                tabela[original] = df_ano[nosso].to_numpy()
+
+            caminho = os.path.join(pasta_estacao, f'{location_id}_{latitude:.2f}_{longitude:.2f}_{ano}.csv')
+            with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+                arquivo.write(cabecalho)
+                tabela[COLUNAS_TEMPO_NSRDB + list(colunas_originais.values())].to_csv(
+                    arquivo, index=False, float_format='%.2f')
+            caminhos.setdefault(codigo, []).append(caminho)
+    return caminhos
@@ -0,0 +1,166 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --- 1. CONSTANTES ---
+
+# Irradiância solar no topo da atmosfera a 1 UA (W/m²)
+CONSTANTE_SOLAR = 1361.0
+
+# Os timestamps do pipeline seguem a hora local padrão da NSRDB ('Local Time Zone'
+# do cabeçalho). Estações sem 'fuso_horario' na tabela de estações usam este (RN: UTC-3).
+FUSO_HORARIO_PADRAO = -3.0
+
+# Sol abaixo do horizonte: zênite a partir de 90°
+ZENITE_NOITE = 90.0
+
+# Colunas adicionadas por adicionar_geometria_solar, na ordem em que entram
+COLUNAS_SOLARES = [
+    'zenite_solar',
+    'azimute_solar',
+    'irradiancia_extraterrestre',
+    'ghi_ceu_limpo',
+    'dni_ceu_limpo',
+]
+
+
+# --- 2. GEOMETRIA SOLAR VETORIZADA ---
+
+def geometria_solar(timestamps, latitude, longitude, fuso_horario=FUSO_HORARIO_PADRAO):
+    """
+    Posição do Sol e irradiância de céu limpo para cada linha, de uma vez só.
+
+    'timestamps' é um DatetimeIndex (ou array datetime64) em hora local padrão;
+    latitude, longitude (graus) e fuso_horario (horas) são escalares ou arrays
+    do mesmo tamanho. Declinação e equação do tempo de Spencer (1971),
+    massa de ar de Kasten e Young (1989), DNI de céu limpo de Meinel e GHI com
+    10% de difusa (Laue). Devolve {coluna: array float64} com as COLUNAS_SOLARES.
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    latitude = np.radians(np.asarray(latitude, dtype=np.float64))
+    longitude = np.asarray(longitude, dtype=np.float64)
+    fuso_horario = np.asarray(fuso_horario, dtype=np.float64)
+
+    hora_local = timestamps.hour.values + timestamps.minute.values / 60.0 + timestamps.second.values / 3600.0
+    gama = 2 * np.pi * (timestamps.dayofyear.values - 1 + (hora_local - 12.0) / 24.0) / 365.0
+
+    declinacao = (0.006918 - 0.399912 * np.cos(gama) + 0.070257 * np.sin(gama)
+                  - 0.006758 * np.cos(2 * gama) + 0.000907 * np.sin(2 * gama)
+                  - 0.002697 * np.cos(3 * gama) + 0.00148 * np.sin(3 * gama))
+    equacao_tempo = 229.18 * (0.000075 + 0.001868 * np.cos(gama) - 0.032077 * np.sin(gama)
+                              - 0.014615 * np.cos(2 * gama) - 0.040849 * np.sin(2 * gama))
+    fator_distancia = (1.000110 + 0.034221 * np.cos(gama) + 0.001280 * np.sin(gama)
+                       + 0.000719 * np.cos(2 * gama) + 0.000077 * np.sin(2 * gama))
+
+    # Hora solar verdadeira (minutos): correção de longitude em relação ao meridiano do fuso
+    minutos_solares = hora_local * 60.0 + 4.0 * (longitude - 15.0 * fuso_horario) + equacao_tempo
+    angulo_horario = np.radians(minutos_solares / 4.0 - 180.0)
+
+    cos_zenite = (np.sin(latitude) * np.sin(declinacao)
+                  + np.cos(latitude) * np.cos(declinacao) * np.cos(angulo_horario))
+    cos_zenite = np.clip(cos_zenite, -1.0, 1.0)
+    zenite = np.degrees(np.arccos(cos_zenite))
+
+    # Azimute a partir do norte, no sentido horário
+    azimute = np.degrees(np.arctan2(
+        np.sin(angulo_horario),
+        np.cos(angulo_horario) * np.sin(latitude) - np.tan(declinacao) * np.cos(latitude),
+    )) + 180.0
+
+    extraterrestre = CONSTANTE_SOLAR * fator_distancia
+
+    dia = zenite < ZENITE_NOITE
+    zenite_dia = np.minimum(zenite, 89.999)
+    massa_ar = 1.0 / (np.cos(np.radians(zenite_dia)) + 0.50572 * (96.07995 - zenite_dia) ** -1.6364)
+    dni_ceu_limpo = np.where(dia, extraterrestre * 0.7 ** (massa_ar ** 0.678), 0.0)
+    ghi_ceu_limpo = np.where(dia, 1.1 * dni_ceu_limpo * cos_zenite, 0.0)
+
+    return {
+        'zenite_solar': zenite,
+        'azimute_solar': azimute,
+        'irradiancia_extraterrestre': extraterrestre,
+        'ghi_ceu_limpo': ghi_ceu_limpo,
+        'dni_ceu_limpo': dni_ceu_limpo,
+    }
+
+
+# --- 3. CACHE POR ESTAÇÃO-ANO ---
+#
+# A geometria de uma estação num ano só depende de (latitude, longitude, fuso,
+# ano): ela é calculada uma vez, numa grade horária do ano inteiro, e as linhas
+# do DataFrame só buscam a sua hora nessa grade. Assim a etapa de anomalias,
+# as features e cada bloco do modo streaming reaproveitam o mesmo cálculo.
+
+@lru_cache(maxsize=1024)
+def geometria_estacao_ano(latitude, longitude, fuso_horario, ano):
+    """Grade horária (índice = hora do ano) com as COLUNAS_SOLARES de uma estação num ano."""
+    horas = pd.date_range(f'{ano}-01-01', f'{ano + 1}-01-01', freq='h', inclusive='left')
+    grade = geometria_solar(horas, latitude, longitude, fuso_horario)
+    matriz = np.column_stack([grade[coluna] for coluna in COLUNAS_SOLARES])
+    matriz.flags.writeable = False
+    return matriz
+
+
+def coordenadas_estacao(tabela_estacoes, codigo_estacao):
+    """(latitude, longitude, fuso_horario) da estação, com as coordenadas da NSRDB como reserva."""
+    linha = tabela_estacoes.loc[codigo_estacao]
+    latitude = linha['latitude'] if pd.notna(linha.get('latitude')) else linha.get('latitude_nsrdb')
+    longitude = linha['longitude'] if pd.notna(linha.get('longitude')) else linha.get('longitude_nsrdb')
+    fuso = linha.get('fuso_horario', FUSO_HORARIO_PADRAO)
+    if pd.isna(latitude) or pd.isna(longitude):
+        raise KeyError(f"Estação '{codigo_estacao}' sem coordenadas na tabela de estações.")
+    return float(latitude), float(longitude), float(FUSO_HORARIO_PADRAO if pd.isna(fuso) else fuso)
+
+
+def calcular_geometria_solar(df, tabela_estacoes):
+    """
+    COLUNAS_SOLARES (float64) para cada linha de 'df' (indexado por timestamp,
+    com 'codigo_estacao'), com as coordenadas da tabela de estações.
+
+    Linhas em hora cheia vêm da grade em cache da sua estação-ano; as demais
+    (ex.: minuto 30) são calculadas diretamente.
+    """
+    n = len(df)
+    saida = np.empty((n, len(COLUNAS_SOLARES)))
+    if n == 0:
+        return pd.DataFrame(saida, index=df.index, columns=COLUNAS_SOLARES)
+
+    codigos = df['codigo_estacao'].astype(str).to_numpy()
+    timestamps = df.index.to_numpy()
+    anos = df.index.year.values
+    grupos, chaves = pd.factorize(pd.MultiIndex.from_arrays([codigos, anos]))
+
+    inicio_ano = pd.to_datetime(anos.astype(str), format='%Y').to_numpy()
+    deslocamento = (timestamps - inicio_ano).astype('timedelta64[s]').astype(np.int64)
+    hora_do_ano = deslocamento // 3600
+    hora_cheia = deslocamento % 3600 == 0
+
+    ordem = np.argsort(grupos, kind='stable')
+    fronteiras = np.flatnonzero(np.diff(grupos[ordem])) + 1
+    for posicoes in np.split(ordem, fronteiras):
+        codigo_estacao, ano = chaves[grupos[posicoes[0]]]
+        latitude, longitude, fuso = coordenadas_estacao(tabela_estacoes, codigo_estacao)
+        grade = geometria_estacao_ano(latitude, longitude, fuso, int(ano))
+
+        cheias = posicoes[hora_cheia[posicoes]]
+        saida[cheias] = grade[hora_do_ano[cheias]]
+        quebradas = posicoes[~hora_cheia[posicoes]]
+        if len(quebradas):
+            direta = geometria_solar(timestamps[quebradas], latitude, longitude, fuso)
+            saida[quebradas] = np.column_stack([direta[coluna] for coluna in COLUNAS_SOLARES])
+
+    return pd.DataFrame(saida, index=df.index, columns=COLUNAS_SOLARES)
+
+
+def adicionar_geometria_solar(df, tabela_estacoes):
+    """Adiciona a 'df' as COLUNAS_SOLARES (float32) calculadas por calcular_geometria_solar."""
+    geometria = calcular_geometria_solar(df, tabela_estacoes)
+    for coluna in COLUNAS_SOLARES:
+        df[coluna] = geometria[coluna].to_numpy(dtype=np.float32)
+    return df
+
+
+def eh_noite(zenite):
+    """Máscara das linhas com o Sol abaixo do horizonte (zênite >= ZENITE_NOITE)."""
+    return np.asarray(zenite) >= ZENITE_NOITE
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+# --- POLÍTICA DE TIPOS DO PIPELINE ---
+#
+# Aplicada por todas as etapas antes de gravar (e pelo carregador ao ler):
+#   - codigo_estacao como categoria (códigos internos int8/int16);
+#   - tipo_nuvem_nsrdb como int8 (valores de -15 a 12);
+#   - máscaras de bits (qc_irradiancia, solar_ia/qualidade.py) como uint8;
+#   - demais medições e features em float32;
+#   - nada de latitude/longitude/altitude repetidas em cada linha: as
+#     coordenadas ficam na tabela de estações (solar_ia/estacoes.py).
+
+COLUNAS_INT8 = ['tipo_nuvem_nsrdb']
+COLUNAS_MASCARA = ['qc_irradiancia']
+PREFIXOS_COORDENADAS = ('latitude', 'longitude', 'altitude')
+
+
+def eh_coluna_coordenada(coluna):
+    """True para 'latitude', 'longitude', 'altitude' e suas versões com sufixo (ex.: 'latitude_inmet')."""
+    return coluna.split('_')[0] in PREFIXOS_COORDENADAS
+
+
+def aplicar_politica_tipos(df):
+    """Devolve 'df' sem colunas de coordenadas e com os tipos da política do pipeline."""
+    df = df.drop(columns=[col for col in df.columns if eh_coluna_coordenada(col)])
+
+    novos_tipos = {}
+    for coluna, tipo in df.dtypes.items():
+        if coluna == 'codigo_estacao':
+            if not isinstance(tipo, pd.CategoricalDtype):
+                novos_tipos[coluna] = 'category'
+        elif coluna in COLUNAS_INT8 and pd.api.types.is_numeric_dtype(tipo) and not df[coluna].isna().any():
+            novos_tipos[coluna] = np.int8
+        elif coluna in COLUNAS_MASCARA and pd.api.types.is_numeric_dtype(tipo) and not df[coluna].isna().any():
+            if tipo != np.uint8:
+                novos_tipos[coluna] = np.uint8
+        elif pd.api.types.is_numeric_dtype(tipo) and not pd.api.types.is_bool_dtype(tipo) and tipo != np.float32:
+            novos_tipos[coluna] = np.float32
+    return df.astype(novos_tipos) if novos_tipos else df
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from solar_ia.grade import GradeHoraria, posicoes_estacoes
+from solar_ia.solar import coordenadas_estacao
+
+# --- 1. ESPECIFICAÇÃO DAS FEATURES DE VIZINHOS ---
+
+# Para cada estação, os 'k' vizinhos mais próximos (pela distância sobre a
+# Terra) e, de cada um, as defasagens (em horas) das colunas abaixo. As nuvens
+# que chegam a uma estação passaram antes pelas vizinhas a barlavento: a
+# irradiação e o tipo de nuvem delas nas últimas horas são o sinal mais
+# barato de nebulosidade para a próxima hora. Só entram horas passadas
+# (lag >= 1): a hora corrente de um vizinho não está disponível ao prever.
+ESPECIFICACAO_VIZINHOS = {
+    'k': 3,
+    'lags': {
+        'ghi': [1, 2],
+        'tipo_nuvem_nsrdb': [1],
+    },
+}
+
+RAIO_TERRA_KM = 6371.0088
+
+
+def nome_vizinho(coluna, ordem, lag):
+    """Ex.: 'ghi_viz1_lag1h' (ordem 1 é o vizinho mais próximo)."""
+    return f'{coluna}_viz{ordem}_lag{lag}h'
+
+
+def colunas_vizinhos(especificacao=ESPECIFICACAO_VIZINHOS):
+    """Nomes das colunas geradas, na ordem em que são adicionadas: por coluna, lag e vizinho."""
+    return [nome_vizinho(coluna, ordem, lag)
+            for coluna, lags in especificacao['lags'].items()
+            for lag in lags
+            for ordem in range(1, especificacao['k'] + 1)]
+
+
+def alcance_vizinhos(especificacao=ESPECIFICACAO_VIZINHOS):
+    """Maior defasagem da especificação, em horas (histórico que um bloco precisa ler antes do seu início)."""
+    return max((lag for lags in especificacao['lags'].values() for lag in lags), default=0)
+
+
+# --- 2. ÍNDICE ESPACIAL DAS ESTAÇÕES ---
+
+class IndiceVizinhos:
+    """
+    Os 'k' vizinhos mais próximos de cada estação, pelas coordenadas da tabela
+    de estações (as da NSRDB como reserva). Uma BallTree com a métrica de
+    haversine responde às consultas em O(log n) por estação, então o índice
+    escala para centenas de estações; ele é montado uma vez por execução.
+
+    'vizinhos' tem uma linha por estação (na ordem de 'estacoes') com as
+    posições dos vizinhos, do mais próximo ao mais distante; 'distancias_km'
+    tem as distâncias correspondentes.
+    """
+
+    def __init__(self, tabela_estacoes, estacoes=None, k=ESPECIFICACAO_VIZINHOS['k']):
+        # Importado aqui: quem importa solar_ia.montagem não carrega o scikit-learn
+        # (e o scipy) quando as features de vizinhos estão desligadas
+        from sklearn.neighbors import BallTree
+
+        codigos = tabela_estacoes.index if estacoes is None else estacoes
+        self.estacoes = sorted({str(codigo).upper() for codigo in codigos})
+        self.k = int(k)
+        if len(self.estacoes) <= self.k:
+            raise ValueError(f"São necessárias mais de {self.k} estações para {self.k} vizinhos "
+                             f"(há {len(self.estacoes)}).")
+
+        coordenadas = np.radians([coordenadas_estacao(tabela_estacoes, codigo)[:2] for codigo in self.estacoes])
+        distancias, indices = BallTree(coordenadas, metric='haversine').query(coordenadas, k=self.k + 1)
+
+        # A própria estação sai da lista. Ela costuma ser a primeira (distância
+        # 0), mas com coordenadas repetidas pode vir depois ou nem aparecer
+        # entre as k + 1; nesse caso sai a última.
+        proprias = indices == np.arange(len(self.estacoes))[:, None]
+        proprias[~proprias.any(axis=1), -1] = True
+        self.vizinhos = indices[~proprias].reshape(len(self.estacoes), self.k)
+        self.distancias_km = distancias[~proprias].reshape(len(self.estacoes), self.k) * RAIO_TERRA_KM
+
+    def posicoes(self, codigos):
+        """Posição de cada código em 'estacoes' (KeyError para estações fora do índice)."""
+        posicoes = posicoes_estacoes(codigos, self.estacoes)
+        if (posicoes < 0).any():
+            faltando = sorted(set(np.asarray(codigos)[posicoes < 0].astype(str)))
+            raise KeyError(f"Estações fora do índice de vizinhos: {faltando}")
+        return posicoes
+
+    def vizinhos_de(self, codigo_estacao):
+        """Códigos dos vizinhos de uma estação, do mais próximo ao mais distante."""
+        return [self.estacoes[i] for i in self.vizinhos[self.posicoes([str(codigo_estacao).upper()])[0]]]
+
+    def resumo(self):
+        """DataFrame estação × ordem com os vizinhos e as distâncias (km), para conferência."""
+        dados = {}
+        for ordem in range(self.k):
+            dados[f'viz{ordem + 1}'] = np.asarray(self.estacoes)[self.vizinhos[:, ordem]]
+            dados[f'viz{ordem + 1}_km'] = self.distancias_km[:, ordem].round(1)
+        return pd.DataFrame(dados, index=pd.Index(self.estacoes, name='codigo_estacao'))
+
+
+# --- 3. CÁLCULO ---
+
+def adicionar_features_vizinhos(df, df_fonte, indice, especificacao=ESPECIFICACAO_VIZINHOS,
+                                coluna_estacao='codigo_estacao'):
+    """
+    Adiciona a 'df' (indexado por timestamp, com 'codigo_estacao') as colunas
+    de colunas_vizinhos(especificacao): o valor de cada coluna em cada vizinho
+    (segundo 'indice'), 'lag' horas antes da hora da linha.
+
+    Os valores vêm de 'df_fonte' (um registro por estação e hora, com as
+    estações vizinhas), posto numa grade estação × hora (solar_ia/grade.py):
+    cada feature é uma leitura indexada da grade, sem junção de quadros. Hora
+    sem registro no vizinho, ou vizinho ausente de 'df_fonte', dá NaN.
+    """
+    if especificacao['k'] > indice.k:
+        raise ValueError(f"A especificação pede {especificacao['k']} vizinhos e o índice tem {indice.k}.")
+
+    grade = GradeHoraria.de_quadro(df_fonte, list(especificacao['lags']), coluna_estacao)
+    # Linha da grade de cada estação do índice (-1 quando a fonte não a tem)
+    linha_na_grade = pd.Index(grade.estacoes).get_indexer(indice.estacoes)
+    posicoes = indice.posicoes(df[coluna_estacao])
+    horas = grade.indices_horas(df.index)
+
+    novas_colunas = {}
+    for ordem in range(especificacao['k']):
+        linhas = linha_na_grade[indice.vizinhos[posicoes, ordem]]
+        presentes = linhas >= 0
+        for coluna, lags in especificacao['lags'].items():
+            for lag in lags:
+                valores = np.full(len(df), np.nan)
+                valores[presentes] = grade.defasado(coluna, lag, linhas[presentes], horas[presentes])
+                novas_colunas[nome_vizinho(coluna, ordem + 1, lag)] = valores
+
+    for nome in colunas_vizinhos(especificacao):
+        df[nome] = novas_colunas[nome]
+    return df
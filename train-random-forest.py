@@ -1,68 +1,98 @@
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import pandas as pd
-import numpy as np
-import time
 import joblib
 
+from solar_ia.avaliacao import avaliar, carregar_quadro_avaliacao, imprimir_avaliacao
+from solar_ia.dataset import CAMINHO_DATAFRAME, carregar_xy
+from solar_ia.floresta import COMPRESSAO_MODELO, PRESETS_RF, treinar_floresta
+from solar_ia.matrizes import CAMINHO_CACHE_MATRIZES, CacheMatrizes
+from solar_ia.memoria import tamanho_em_disco_mb
+from solar_ia.modelos import ModeloDiurno
+from solar_ia.rastreio import etapa, iniciar_rastreio
+
+# Modelo diurno: as linhas de noite (Sol abaixo do horizonte) nem entram no treino
+# e recebem 0 na previsão, sem passar pelo modelo (solar_ia/modelos.py).
+SOMENTE_DIA = True
+
+# Quebras das métricas impressas no fim (todas ficam em 'avaliacao')
+QUEBRAS_IMPRESSAS = ['estacao']
+
+# X/y em .npy float32 abertos por memmap (solar_ia/matrizes.py): o Parquet só é
+# lido na primeira vez depois de cada dataframe.py. None lê direto do Parquet.
+PASTA_MATRIZES = CAMINHO_CACHE_MATRIZES
+
+# Rastreio das etapas (solar_ia/rastreio.py): uma pasta para gravar os spans
+# (JSONL e Chrome trace) e o nome de uma etapa para capturar com cProfile e
+# tracemalloc. None usa as variáveis SOLAR_IA_RASTREIO / SOLAR_IA_PERFIL.
+PASTA_RASTREIO = None
+ETAPA_PERFIL = None
+
+iniciar_rastreio('train-random-forest', PASTA_RASTREIO, ETAPA_PERFIL)
+
 print("Carregando os conjuntos de treino e validação...")
 try:
-    X_train = pd.read_parquet('data/X_train.parquet')
-    y_train = pd.read_parquet('data/y_train.parquet')
-    X_val = pd.read_parquet('data/X_val.parquet')
-    y_val = pd.read_parquet('data/y_val.parquet')
+    # Só as partições de cada período são lidas do dataset final (e, no modo
+    # diurno, só as linhas de dia do treino). A validação vem inteira, com a
+    # noite, para que as métricas sejam comparáveis com as do modelo completo.
+    with etapa('carregamento') as span:
+        if PASTA_MATRIZES is None:
+            X_train, y_train = carregar_xy(CAMINHO_DATAFRAME, 'treino', somente_dia=SOMENTE_DIA)
+            X_val, y_val = carregar_xy(CAMINHO_DATAFRAME, 'validacao')
+            span.lido(CAMINHO_DATAFRAME)
+        else:
+            cache_matrizes = CacheMatrizes(PASTA_MATRIZES)
+            X_train, y_train = cache_matrizes.abrir(CAMINHO_DATAFRAME, 'treino', somente_dia=SOMENTE_DIA)
+            X_val, y_val = cache_matrizes.abrir(CAMINHO_DATAFRAME, 'validacao')
+            span.atributos['matrizes_gravadas'] = cache_matrizes.gravados
+        span.linhas_saida = len(X_train) + len(X_val)
     print("Dados carregados com sucesso.")
 except FileNotFoundError:
-    print("ERRO: Arquivos de treino/validação não encontrados. Execute o script de separação de dados primeiro.")
-    exit()
+    print("ERRO: Dataset final não encontrado. Execute o script 'dataframe.py' primeiro.")
+    exit(1)
 
-rf_model = RandomForestRegressor(
-    n_estimators=100,      # Começaremos com 100 árvores. Um bom ponto de partida.
-    n_jobs=-1,             # MUITO IMPORTANTE: Usa todos os núcleos da sua CPU para acelerar o treino.
-    random_state=42,       # Garante que os resultados sejam reproduzíveis.
-    verbose=2              # Mostra o progresso do treinamento árvore por árvore.
-)
+# Treino econômico em memória (solar_ia/floresta.py): X em float32 contíguo,
+# árvores limitadas pelo preset ('completo', 'compacto' ou 'leve'), bootstrap
+# com max_samples e árvores adicionadas em lotes (warm_start), parando quando o
+# MAE da validação deixa de melhorar. None volta ao treino de 100 árvores completas.
+PRESET_RF = 'compacto'
+MAX_ARVORES = 100
+LOTE_ARVORES = 20
+PACIENCIA_LOTES = 2
 
 print("\nIniciando o treinamento do modelo... (Isso pode levar alguns minutos)")
-start_time = time.time()
-
-rf_model.fit(X_train, y_train)
+with etapa('treino', linhas_entrada=len(X_train), preset=PRESET_RF) as span_treino:
+    if PRESET_RF is None:
+        rf_model = RandomForestRegressor(
+            n_estimators=100,      # Começaremos com 100 árvores. Um bom ponto de partida.
+            n_jobs=-1,             # MUITO IMPORTANTE: Usa todos os núcleos da sua CPU para acelerar o treino.
+            random_state=42,       # Garante que os resultados sejam reproduzíveis.
+            verbose=2              # Mostra o progresso do treinamento árvore por árvore.
+        )
+        if SOMENTE_DIA:
+            rf_model = ModeloDiurno(rf_model)
+        rf_model.fit(X_train, y_train)
+    else:
+        print(f"Preset '{PRESET_RF}': {PRESETS_RF[PRESET_RF]}")
+        rf_model, _ = treinar_floresta(
+            X_train, y_train, X_val, y_val, preset=PRESET_RF, max_arvores=MAX_ARVORES,
+            lote=LOTE_ARVORES, paciencia=PACIENCIA_LOTES, somente_dia=SOMENTE_DIA,
+        )
 
-end_time = time.time()
-training_time = (end_time - start_time) / 60
-print(f"Treinamento concluído em {training_time:.2f} minutos.")
+print(f"Treinamento concluído em {span_treino.duracao_s / 60:.2f} minutos.")
 
 print("\nRealizando previsões no conjunto de validação...")
-predictions = rf_model.predict(X_val)
-
-# O resultado 'predictions' é um array numpy. Vamos convertê-lo para um DataFrame para facilitar a análise.
-pred_df = pd.DataFrame(predictions, index=y_val.index, columns=y_val.columns)
+with etapa('previsao', linhas_entrada=len(X_val)) as span:
+    predictions = rf_model.predict(X_val)
+    span.linhas_saida = len(predictions)
 
 print("\nAvaliando o desempenho do modelo...")
 
-# Como temos duas saídas (GHI e DNI), vamos calcular o erro para cada uma.
-# MAE (Mean Absolute Error): É o erro médio, na mesma unidade do alvo (W/m²). Fácil de interpretar.
-# RMSE (Root Mean Squared Error): Penaliza erros maiores mais fortemente.
-
-# Avaliação para GHI
-mae_ghi = mean_absolute_error(y_val['ghi'], pred_df['ghi'])
-rmse_ghi = np.sqrt(mean_squared_error(y_val['ghi'], pred_df['ghi']))
-
-# Avaliação para DNI
-mae_dni = mean_absolute_error(y_val['dni'], pred_df['dni'])
-rmse_dni = np.sqrt(mean_squared_error(y_val['dni'], pred_df['dni']))
-
-print("\n" + "="*50)
-print("      RESULTADOS DE DESEMPENHO DO MODELO BASELINE (RandomForest)")
-print("="*50)
-print(f"\nTarget: GHI")
-print(f"  - Erro Médio Absoluto (MAE): {mae_ghi:.2f} W/m²")
-print(f"  - Raiz do Erro Quadrático Médio (RMSE): {rmse_ghi:.2f} W/m²")
-print("-"*50)
-print(f"Target: DNI")
-print(f"  - Erro Médio Absoluto (MAE): {mae_dni:.2f} W/m²")
-print(f"  - Raiz do Erro Quadrático Médio (RMSE): {rmse_dni:.2f} W/m²")
-print("="*50)
+# MAE (erro médio, em W/m²), RMSE (penaliza erros maiores), MBE (viés) e skill
+# sobre a persistência de 24h e o céu limpo, na validação inteira e só de dia,
+# quebrados por estação, mês, hora e tipo de nuvem em uma só passada (solar_ia/avaliacao.py).
+with etapa('avaliacao', linhas_entrada=len(predictions)):
+    quadro_val = carregar_quadro_avaliacao(CAMINHO_DATAFRAME, 'validacao')
+    avaliacao = avaliar(quadro_val, predictions)
+imprimir_avaliacao(avaliacao, "RESULTADOS DE DESEMPENHO DO MODELO BASELINE (RandomForest)", quebras=QUEBRAS_IMPRESSAS)
 
 # --- CONTEXTUALIZANDO O ERRO ---
 # Para sabermos se um erro de X W/m² é bom ou ruim, vamos ver a média dos valores reais.
@@ -77,5 +107,8 @@ print("="*50)
 
 # Salvar o modelo treinado para uso futuro
 print("\nSalvando o modelo RandomForest treinado...")
-joblib.dump(rf_model, 'training/random_forest_model.joblib')
-print("Modelo salvo como 'random_forest_model.joblib'")
\ No newline at end of file
+with etapa('gravacao_modelo') as span:
+    joblib.dump(rf_model, 'training/random_forest_model.joblib', compress=COMPRESSAO_MODELO)
+    span.gravado('training/random_forest_model.joblib')
+print(f"Modelo salvo como 'random_forest_model.joblib' "
+      f"({tamanho_em_disco_mb('training/random_forest_model.joblib'):.1f} MB)")
\ No newline at end of file
@@ -1,84 +1,103 @@
-import xgboost as xgb
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import pandas as pd
-import numpy as np
-import time
 import joblib
 
+from solar_ia.avaliacao import avaliar, carregar_quadro_avaliacao, imprimir_avaliacao
+from solar_ia.busca import melhores_parametros
+from solar_ia.dataset import CAMINHO_DATAFRAME, TARGETS, carregar_xy
+from solar_ia.matrizes import CAMINHO_CACHE_MATRIZES, CacheMatrizes
+from solar_ia.modelos import ModeloDiurno, criar_modelo_xgb
+from solar_ia.rastreio import etapa, iniciar_rastreio
+
+# Modelo diurno: as linhas de noite (Sol abaixo do horizonte) nem entram no treino
+# e recebem 0 na previsão, sem passar pelo modelo (solar_ia/modelos.py).
+SOMENTE_DIA = True
+
+# Quebras das métricas impressas no fim (todas ficam em 'avaliacao')
+QUEBRAS_IMPRESSAS = ['estacao']
+
+# X/y em .npy float32 abertos por memmap (solar_ia/matrizes.py): o Parquet só é
+# lido na primeira vez depois de cada dataframe.py. None lê direto do Parquet.
+PASTA_MATRIZES = CAMINHO_CACHE_MATRIZES
+
+# Rastreio das etapas (solar_ia/rastreio.py): uma pasta para gravar os spans
+# (JSONL e Chrome trace) e o nome de uma etapa para capturar com cProfile e
+# tracemalloc. None usa as variáveis SOLAR_IA_RASTREIO / SOLAR_IA_PERFIL.
+PASTA_RASTREIO = None
+ETAPA_PERFIL = None
+
+iniciar_rastreio('train-xgboost', PASTA_RASTREIO, ETAPA_PERFIL)
+
 print("Carregando os conjuntos de treino e validação...")
 try:
-    X_train = pd.read_parquet('data/X_train.parquet')
-    y_train = pd.read_parquet('data/y_train.parquet')
-    X_val = pd.read_parquet('data/X_val.parquet')
-    y_val = pd.read_parquet('data/y_val.parquet')
+    # Só as partições de cada período são lidas do dataset final (e, no modo
+    # diurno, só as linhas de dia do treino). A validação vem inteira, com a
+    # noite, para que as métricas sejam comparáveis com as do modelo completo.
+    with etapa('carregamento') as span:
+        if PASTA_MATRIZES is None:
+            X_train, y_train = carregar_xy(CAMINHO_DATAFRAME, 'treino', somente_dia=SOMENTE_DIA)
+            X_val, y_val = carregar_xy(CAMINHO_DATAFRAME, 'validacao')
+            span.lido(CAMINHO_DATAFRAME)
+        else:
+            cache_matrizes = CacheMatrizes(PASTA_MATRIZES)
+            X_train, y_train = cache_matrizes.abrir(CAMINHO_DATAFRAME, 'treino', somente_dia=SOMENTE_DIA)
+            X_val, y_val = cache_matrizes.abrir(CAMINHO_DATAFRAME, 'validacao')
+            span.atributos['matrizes_gravadas'] = cache_matrizes.gravados
+        span.linhas_saida = len(X_train) + len(X_val)
     print("Dados carregados com sucesso.")
 except FileNotFoundError:
-    print("ERRO: Arquivos de treino/validação não encontrados. Execute o script de separação de dados primeiro.")
-    exit()
-
-# XGBoost pode treinar um modelo para cada alvo separadamente.
-xgb_model_ghi = xgb.XGBRegressor(
-    n_estimators=1000,         # Começamos com um número alto de árvores
-    learning_rate=0.05,        # Taxa de aprendizado
-    n_jobs=-1,                 # Usa todos os núcleos da CPU
-    random_state=42,
-    early_stopping_rounds=50   # Para o treino se não houver melhora em 50 rodadas
-)
-
-# Faremos o mesmo para o DNI
-xgb_model_dni = xgb.XGBRegressor(
-    n_estimators=1000,
-    learning_rate=0.05,
-    n_jobs=-1,
-    random_state=42,
-    early_stopping_rounds=50
-)
+    print("ERRO: Dataset final não encontrado. Execute o script 'dataframe.py' primeiro.")
+    exit(1)
+
+# GHI e DNI num único modelo: X é quantizado uma vez (um QuantileDMatrix para o
+# treino e um para a validação) e reaproveitado pelos dois alvos. As estratégias
+# ('dois_modelos', 'uma_matriz', 'multi_saida') estão em solar_ia/modelos.py.
+ESTRATEGIA_XGB = 'uma_matriz'
+
+PARAMETROS_XGB = {
+    'n_estimators': 1000,          # Começamos com um número alto de árvores
+    'learning_rate': 0.05,         # Taxa de aprendizado
+    'n_jobs': -1,                  # Usa todos os núcleos da CPU
+    'random_state': 42,
+    'early_stopping_rounds': 50,   # Para o treino se não houver melhora em 50 rodadas
+}
+
+# Usa os hiperparâmetros da melhor tentativa de busca-xgboost.py, se houver
+USAR_MELHOR_BUSCA = False
+CAMINHO_REGISTRO_BUSCA = 'training/busca_xgb.jsonl'
+
+if USAR_MELHOR_BUSCA:
+    melhores = melhores_parametros(CAMINHO_REGISTRO_BUSCA)
+    if melhores is None:
+        print(f"AVISO: nenhuma tentativa completa em '{CAMINHO_REGISTRO_BUSCA}'. Usando os parâmetros padrão.")
+    else:
+        PARAMETROS_XGB.update(melhores)
+        print(f"Usando os hiperparâmetros da busca: {melhores}")
+
+xgb_model = criar_modelo_xgb(ESTRATEGIA_XGB, **PARAMETROS_XGB)
+
+if SOMENTE_DIA:
+    xgb_model = ModeloDiurno(xgb_model)
 
 print("\nIniciando o treinamento do modelo... (Isso pode levar alguns minutos)")
-start_time = time.time()
-
-xgb_model_ghi.fit(X_train, y_train['ghi'], eval_set=[(X_val, y_val['ghi'])], verbose=100)
-xgb_model_dni.fit(X_train, y_train['dni'], eval_set=[(X_val, y_val['dni'])], verbose=100)
+with etapa('treino', linhas_entrada=len(X_train)) as span_treino:
+    xgb_model.fit(X_train, y_train[TARGETS], eval_set=[(X_val, y_val[TARGETS])], verbose=100)
 
-end_time = time.time()
-training_time = (end_time - start_time) / 60
-print(f"Treinamento concluído em {training_time:.2f} minutos.")
+print(f"Treinamento concluído em {span_treino.duracao_s / 60:.2f} minutos.")
 
 print("\nRealizando previsões no conjunto de validação...")
-predictions_ghi = xgb_model_ghi.predict(X_val)
-predictions_dni = xgb_model_dni.predict(X_val)
-
-# O resultado 'predictions' é um array numpy. Vamos convertê-lo para um DataFrame para facilitar a análise.
-pred_df = pd.DataFrame({
-    'ghi': predictions_ghi,
-    'dni': predictions_dni
-}, index=y_val.index)
+# Uma única passada de previsão devolve as duas colunas (ghi, dni)
+with etapa('previsao', linhas_entrada=len(X_val)) as span:
+    predictions = xgb_model.predict(X_val)
+    span.linhas_saida = len(predictions)
 
 print("\nAvaliando o desempenho do modelo...")
 
-# Como temos duas saídas (GHI e DNI), vamos calcular o erro para cada uma.
-# MAE (Mean Absolute Error): É o erro médio, na mesma unidade do alvo (W/m²). Fácil de interpretar.
-# RMSE (Root Mean Squared Error): Penaliza erros maiores mais fortemente.
-
-# Avaliação para GHI
-mae_ghi = mean_absolute_error(y_val['ghi'], pred_df['ghi'])
-rmse_ghi = np.sqrt(mean_squared_error(y_val['ghi'], pred_df['ghi']))
-
-# Avaliação para DNI
-mae_dni = mean_absolute_error(y_val['dni'], pred_df['dni'])
-rmse_dni = np.sqrt(mean_squared_error(y_val['dni'], pred_df['dni']))
-
-print("\n" + "="*50)
-print("      RESULTADOS DE DESEMPENHO DO MODELO BASELINE (XGBoost)")
-print("="*50)
-print(f"\nTarget: GHI")
-print(f"  - Erro Médio Absoluto (MAE): {mae_ghi:.2f} W/m²")
-print(f"  - Raiz do Erro Quadrático Médio (RMSE): {rmse_ghi:.2f} W/m²")
-print("-"*50)
-print(f"Target: DNI")
-print(f"  - Erro Médio Absoluto (MAE): {mae_dni:.2f} W/m²")
-print(f"  - Raiz do Erro Quadrático Médio (RMSE): {rmse_dni:.2f} W/m²")
-print("="*50)
+# MAE (erro médio, em W/m²), RMSE (penaliza erros maiores), MBE (viés) e skill
+# sobre a persistência de 24h e o céu limpo, na validação inteira e só de dia,
+# quebrados por estação, mês, hora e tipo de nuvem em uma só passada (solar_ia/avaliacao.py).
+with etapa('avaliacao', linhas_entrada=len(predictions)):
+    quadro_val = carregar_quadro_avaliacao(CAMINHO_DATAFRAME, 'validacao')
+    avaliacao = avaliar(quadro_val, predictions)
+imprimir_avaliacao(avaliacao, "RESULTADOS DE DESEMPENHO DO MODELO BASELINE (XGBoost)", quebras=QUEBRAS_IMPRESSAS)
 
 # --- CONTEXTUALIZANDO O ERRO ---
 # Para sabermos se um erro de X W/m² é bom ou ruim, vamos ver a média dos valores reais.
@@ -93,6 +112,7 @@ print("="*50)
 
 # Salvar o modelo treinado para uso futuro
 print("\nSalvando o modelo XGBoost treinado...")
-joblib.dump(xgb_model_ghi, 'training/xgb_model_ghi.joblib')
-joblib.dump(xgb_model_dni, 'training/xgb_model_dni.joblib')
-print("Modelos salvos como 'xgb_model_ghi.joblib' e 'xgb_model_dni.joblib'")
\ No newline at end of file
+with etapa('gravacao_modelo') as span:
+    joblib.dump(xgb_model, 'training/xgb_model.joblib')
+    span.gravado('training/xgb_model.joblib')
+print("Modelo salvo como 'xgb_model.joblib'")
\ No newline at end of file
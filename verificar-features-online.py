@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from solar_ia.dataset import (
+    CAMINHO_DATAFRAME, CAMINHO_ESTACOES, COLUNAS_NAO_FEATURES, adicionar_coordenadas, carregar_dataset,
+)
+from solar_ia.estacoes import carregar_tabela_estacoes
+from solar_ia.features import ESPECIFICACAO_FEATURES
+from solar_ia.grade import HORA
+from solar_ia.online import COLUNAS_OBSERVACAO, EstadoFeaturesOnline
+
+# --- 1. CONFIGURAÇÃO ---
+
+# Confere se o EstadoFeaturesOnline (solar_ia/online.py), alimentado hora a
+# hora com as observações do dataset final, reproduz as features do pipeline
+# em lote. Estações e período a conferir (None = tudo).
+ESTACOES = None
+INICIO = '2023-01-01'
+FIM = '2024-01-01'
+
+# Diferença máxima aceita (as features são float32)
+TOLERANCIA_RELATIVA = 1e-5
+TOLERANCIA_ABSOLUTA = 1e-3
+
+# --- 2. PIPELINE EM LOTE ---
+
+print("Carregando o dataset final e a tabela de estações...")
+try:
+    tabela_estacoes = carregar_tabela_estacoes(CAMINHO_ESTACOES)
+    df = carregar_dataset(CAMINHO_DATAFRAME, estacoes=ESTACOES, inicio=INICIO, fim=FIM)
+except FileNotFoundError:
+    print("ERRO: Dataset final não encontrado. Execute o script 'dataframe.py' primeiro.")
+    exit(1)
+
+df = adicionar_coordenadas(df.sort_index(kind='stable'), tabela_estacoes)
+colunas_lote = [col for col in df.columns if col not in COLUNAS_NAO_FEATURES]
+
+estado = EstadoFeaturesOnline(tabela_estacoes, ESPECIFICACAO_FEATURES)
+if estado.colunas != colunas_lote:
+    print("ERRO: a ordem das colunas difere do pipeline em lote.")
+    print(f"  online: {estado.colunas}\n  lote:   {colunas_lote}")
+    exit(1)
+print(f"Ordem das {len(estado.colunas)} colunas idêntica à do pipeline em lote.")
+
+# --- 3. FLUXO HORA A HORA ---
+#
+# No lote, os lags das primeiras horas do período vêm de registros anteriores
+# a ele. As 'capacidade' horas antes de INICIO aquecem o estado online (lidas
+# da grade estação × hora, sem passar hora a hora), e todas as horas do
+# período podem ser comparadas.
+
+if INICIO is not None:
+    historico = carregar_dataset(CAMINHO_DATAFRAME, estacoes=ESTACOES,
+                                 inicio=pd.Timestamp(INICIO) - estado.capacidade * HORA, fim=INICIO)
+    inicio = time.perf_counter()
+    estado.aquecer(historico)
+    print(f"Estado aquecido com {len(historico)} registros anteriores ao período "
+          f"({time.perf_counter() - inicio:.3f} s)")
+
+print(f"Alimentando {len(df)} observações de {df['codigo_estacao'].nunique()} estação(ões)...")
+codigos = df['codigo_estacao'].astype(str).to_numpy()
+observacoes = df[COLUNAS_OBSERVACAO].to_numpy(dtype=np.float64)
+vetores, linhas = [], []
+inicio = time.perf_counter()
+for i, (timestamp, codigo_estacao) in enumerate(zip(df.index, codigos)):
+    vetor = estado.atualizar(codigo_estacao, timestamp, dict(zip(COLUNAS_OBSERVACAO, observacoes[i])))
+    if vetor is not None:
+        vetores.append(vetor)
+        linhas.append(i)
+duracao = time.perf_counter() - inicio
+print(f"  {duracao / len(df) * 1e6:.0f} µs por observação ({len(vetores)} vetores comparados)")
+
+# --- 4. COMPARAÇÃO ---
+
+online = np.vstack(vetores)
+lote = df[colunas_lote].iloc[linhas].to_numpy(dtype=np.float32)
+diferenca = np.abs(online - lote)
+limite = TOLERANCIA_ABSOLUTA + TOLERANCIA_RELATIVA * np.abs(lote)
+
+print(f"\n{'coluna':<36} {'dif. máxima':>12}")
+for j, coluna in enumerate(colunas_lote):
+    print(f"{coluna:<36} {diferenca[:, j].max():>12.2e}")
+
+fora = (diferenca > limite).any(axis=1)
+if fora.any():
+    print(f"\nFALHOU: {fora.sum()} linha(s) fora da tolerância.")
+    exit(1)
+print("\nOK: as features online são idênticas às do pipeline em lote (dentro da tolerância).")